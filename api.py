@@ -0,0 +1,423 @@
+"""
+Local HTTP API for the LSTM forecaster.
+
+    python api.py --port 8600
+
+Endpoints (all JSON unless streaming):
+
+    GET /health
+    GET /metrics
+    GET /history/<symbol>?bars=252
+    GET /indicators/<symbol>?bars=252
+    GET /forecast/<symbol>?days=30[&stream=1]
+    GET /forecast/<symbol>?days=30&samples=200&coverage=90
+    GET /forecast/<symbol>?days=30&strategy=direct
+
+Every endpoint takes ``interval`` (``1d`` by default; ``5m``, ``15m``, ``30m``,
+``1h``, ``1wk``): intraday bars are resampled from the stored base interval
+and weekly bars from the daily ones, and ``days`` / ``bars`` count bars.
+
+``/forecast`` with ``stream=1`` (or ``Accept: text/event-stream``) answers with
+server-sent events: one ``step`` event per recursive model call, as soon as it
+is produced, then a ``done`` event carrying the KPI metrics.  A cached forecast
+is replayed immediately.  ``samples`` adds a Monte Carlo dropout band (lower /
+median / upper percentiles of that many stochastic paths) and its latency: as
+``uncertainty`` in the JSON body, or as an ``uncertainty`` event between the
+last ``step`` and ``done`` when streaming.  Every query argument is checked
+before any data is fetched or model run.
+``strategy=direct`` uses the multi-horizon model (``lstm_direct.h5``) instead
+of the recursive one; its steps all arrive after a single model call.
+
+Each symbol is served by the model and scaler the registry (``QL_REGISTRY``)
+maps it to; the default pair starts loading at startup, others on first use.
+Blocking work (fetching, inference, indicators) runs on a thread pool so the
+event loop keeps serving other requests; concurrent forecasts of one model
+share batched model calls through its ``InferenceBroker``.  Every response carries ``Server-Timing`` and
+``X-Response-Time-Ms`` headers; for a stream they measure the time until the
+headers were sent (data ready, before the first step) and each event carries
+its own ``elapsed_ms``.
+
+``/metrics`` is the Prometheus scrape target: request counts and latencies per
+route, the ``telemetry`` spans (download, predict, indicators, …), predict
+batch sizes, and the cache, single-flight, broker and registry counters.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+import tornado.web
+
+from bars import future_index, open_bar_store
+from data_store import DATA_DIR, OHLCVStore
+from engine import DIRECT_MODEL_PATH, ENGINES, MODEL_PATH, SCALER_PATH
+from forecast import (N_STEPS, STRATEGIES, band_percentiles, direct_forecast, forecast_metrics,
+                      iter_recursive_forecast, mc_dropout_paths, percentile_bands, valid_tail)
+from forecast_cache import ForecastCache, engine_fingerprint, forecast_key, scaler_fingerprint
+from indicators import IndicatorEngine
+from market_data import get_provider
+from precompute import WATCHLIST, Precomputer
+from registry import DEFAULT, REGISTRY_PATH, ModelRegistry, read_manifest
+from telemetry import CONTENT_TYPE, TELEMETRY, exposition, relabel
+
+
+MAX_DAYS     = 60
+MAX_SAMPLES  = 1000
+DEFAULT_BARS = 252
+
+log = logging.getLogger("quantumlens.api")
+
+
+def _num(x):
+    """JSON-safe float: NaN / inf become ``null``."""
+    x = float(x)
+    return x if math.isfinite(x) else None
+
+
+def _nums(values):
+    return [_num(v) for v in np.asarray(values, dtype=float).ravel()]
+
+
+def _dates(index):
+    fmt = "%Y-%m-%d" if (index == index.normalize()).all() else "%Y-%m-%dT%H:%M"
+    return [ts.strftime(fmt) for ts in index]
+
+
+class Services:
+    """Everything a request needs, created once per process."""
+
+    def __init__(self, engine_kind="numpy", model_path=MODEL_PATH, scaler_path=SCALER_PATH,
+                 provider=None, data_dir=DATA_DIR, threads=8, direct_model_path=DIRECT_MODEL_PATH,
+                 manifest=REGISTRY_PATH):
+        fetch          = get_provider(provider)
+        models, routes = read_manifest(manifest)
+        models[DEFAULT] = {"model": model_path, "scaler": scaler_path, "direct": direct_model_path}
+        self.kind      = engine_kind
+        self.registry  = ModelRegistry(models, routes, broker=True)
+        self.loader    = self.registry.loader_for(DEFAULT, engine_kind)
+        self.store     = OHLCVStore(os.path.join(data_dir, fetch.name), fetch=fetch)
+        self.bars      = open_bar_store(fetch, data_dir, daily=self.store)
+        self.cache     = ForecastCache(max_entries=int(os.environ.get("QL_FORECAST_CACHE_SIZE", 512)))
+        self.indicator = IndicatorEngine()
+        self.pool      = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="ql-api")
+        self.provider  = fetch
+        self.precomputer = None
+        if WATCHLIST:
+            # Forecasts land in this process's cache, so pre-compute here
+            self.precomputer = Precomputer(self.store, self.assets, self.cache, self.indicator).start()
+
+    def model_path(self, symbol, strategy):
+        return self.registry.model_path(self.registry.resolve(symbol, strategy), strategy)
+
+    def has_model(self, symbol, strategy):
+        return self.registry.has_model(symbol, strategy)
+
+    def assets(self, symbol, strategy="recursive"):
+        """``(engine, scaler)`` serving ``symbol``, the engine behind its broker (blocks until loaded)."""
+        return self.registry.assets(symbol, self.kind, strategy)
+
+    async def run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+
+    def prometheus(self):
+        """Everything ``/metrics`` reports, as one Prometheus text exposition."""
+        return exposition(
+            self.cache.prometheus(),
+            self.store.flights.prometheus("quantumlens_fetch_singleflight"),
+            self.cache.flights.prometheus("quantumlens_forecast_singleflight"),
+            self.registry.prometheus(),
+            *(relabel(b.prometheus(), model=name) for name, b in self.registry.brokers().items()),
+        )
+
+
+# ─────────────────────────────────────────────────────────────────
+# HANDLERS
+# ─────────────────────────────────────────────────────────────────
+class BaseHandler(tornado.web.RequestHandler):
+    def initialize(self, services):
+        self.services = services
+
+    def prepare(self):
+        self._t0      = time.perf_counter()
+        self._t0_ns   = time.perf_counter_ns()
+        self._stamped = False
+
+    def _stamp(self):
+        # Headers can only be set once, before the first byte goes out
+        if not self._stamped:
+            ms = (time.perf_counter() - self._t0) * 1000
+            self.set_header("Server-Timing", f"total;dur={ms:.1f}")
+            self.set_header("X-Response-Time-Ms", f"{ms:.1f}")
+            self._stamped = True
+
+    def flush(self, *args, **kwargs):
+        self._stamp()
+        return super().flush(*args, **kwargs)
+
+    def finish(self, chunk=None):
+        if chunk is not None:
+            self.write(chunk)
+        self._stamp()
+        return super().finish()
+
+    def write_error(self, status_code, **kwargs):
+        self.finish({"error": self._reason, "status": status_code})
+
+    def on_finish(self):
+        if not TELEMETRY.enabled:
+            return
+        route = type(self).__name__.replace("Handler", "").lower()
+        TELEMETRY.count("http_requests", route=route, status=self.get_status())
+        TELEMETRY.record(f"http.{route}", self._t0_ns, time.perf_counter_ns(),
+                         uri=self.request.uri, status=self.get_status())
+
+    def int_arg(self, name, default, lo, hi):
+        try:
+            value = int(self.get_query_argument(name, default))
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason=f"{name} must be an integer")
+        if not lo <= value <= hi:
+            raise tornado.web.HTTPError(400, reason=f"{name} must be between {lo} and {hi}")
+        return value
+
+    def interval_arg(self):
+        interval = self.get_query_argument("interval", "1d")
+        if interval not in self.services.bars.intervals():
+            raise tornado.web.HTTPError(400, reason=f"interval must be one of {self.services.bars.intervals()}")
+        return interval
+
+    async def history(self, symbol, interval="1d"):
+        if interval == "1d":
+            data = await self.services.run(self.services.store.get, symbol)
+        else:
+            data = (await self.price_columns(symbol, interval)).to_frame()
+        if data.empty:
+            raise tornado.web.HTTPError(404, reason=f"no data for {symbol}")
+        return data
+
+    async def price_columns(self, symbol, interval="1d"):
+        data = await self.services.run(self.services.bars.bars, symbol, interval)
+        if data.empty:
+            raise tornado.web.HTTPError(404, reason=f"no data for {symbol}")
+        return data
+
+
+class HealthHandler(BaseHandler):
+    def get(self):
+        loader = self.services.loader
+        self.finish({
+            "status":   loader.status,
+            "engine":   loader.kind,
+            "provider": self.services.provider.name,
+            "timings":  loader.timings,
+            "cache":    self.services.cache.stats(),
+            "brokers":  {name: b.stats() for name, b in self.services.registry.brokers().items()},
+            "registry": self.services.registry.stats(),
+            "telemetry": TELEMETRY.stats(),
+            "store":    self.services.store.stats(),
+            "bars":     self.services.bars.stats(),
+            "precompute": self.services.precomputer.stats() if self.services.precomputer else None,
+            "singleflight": {"fetch":    self.services.store.flights.stats(),
+                             "forecast": self.services.cache.flights.stats()},
+        })
+
+
+class MetricsHandler(BaseHandler):
+    def get(self):
+        self.set_header("Content-Type", CONTENT_TYPE)
+        self.finish(self.services.prometheus())
+
+
+class HistoryHandler(BaseHandler):
+    async def get(self, symbol):
+        bars     = self.int_arg("bars", DEFAULT_BARS, 1, 100_000)
+        interval = self.interval_arg()
+        data     = (await self.history(symbol, interval)).iloc[-bars:]
+        self.finish({
+            "symbol": symbol.upper(),
+            "interval": interval,
+            "dates":  _dates(data.index),
+            **{col.lower(): _nums(data[col]) for col in data.columns},
+        })
+
+
+class IndicatorsHandler(BaseHandler):
+    async def get(self, symbol):
+        bars     = self.int_arg("bars", DEFAULT_BARS, 1, 100_000)
+        interval = self.interval_arg()
+        data     = await self.history(symbol, interval)
+        ind      = await self.services.run(self.services.indicator.get, symbol, data, interval)
+        series = ("close", "rsi", "bb_mid", "bb_upper", "bb_lower", "ma20", "ma50")
+        self.finish({
+            "symbol":   symbol.upper(),
+            "interval": interval,
+            "rsi":      _num(ind["rsi_last"]),
+            "ema12":    _num(ind["ema12"]),
+            "ema26":    _num(ind["ema26"]),
+            "macd":     _num(ind["macd"]),
+            "high_52w": None if ind["high_52w"] is None else _num(ind["high_52w"]),
+            "low_52w":  None if ind["low_52w"] is None else _num(ind["low_52w"]),
+            "vol_avg":  ind["vol_avg"],
+            "dates":    _dates(ind["index"][-bars:]),
+            "series":   {name: _nums(ind[name][-bars:]) for name in series},
+        })
+
+
+class ForecastHandler(BaseHandler):
+    async def get(self, symbol):
+        days   = self.int_arg("days", 30, 1, MAX_DAYS)
+        stream = (self.get_query_argument("stream", "0") not in ("0", "false", "")
+                  or "text/event-stream" in self.request.headers.get("Accept", ""))
+        svc    = self.services
+        strategy = self.get_query_argument("strategy", "recursive")
+        if strategy not in STRATEGIES:
+            raise tornado.web.HTTPError(400, reason=f"strategy must be one of {STRATEGIES}")
+        if not svc.has_model(symbol, strategy):
+            raise tornado.web.HTTPError(404, reason=f"no {strategy} model at {svc.model_path(symbol, strategy)}")
+        direct   = strategy == "direct"
+        interval = self.interval_arg()
+        samples  = self.int_arg("samples", 0, 0, MAX_SAMPLES)
+        coverage = self.int_arg("coverage", 90, 1, 99)
+
+        data   = await self.price_columns(symbol, interval)
+        engine, scaler = await svc.run(svc.assets, symbol, strategy)
+        if direct and days > engine.outputs:
+            raise tornado.web.HTTPError(400, reason=f"the direct model predicts at most {engine.outputs} days")
+        opn    = valid_tail(data["Open"], N_STEPS)
+        if len(opn) < N_STEPS:
+            raise tornado.web.HTTPError(422, reason=f"only {len(opn)} bars, need {N_STEPS}")
+        window = scaler.transform(opn.reshape(-1, 1)).ravel()
+        latest = float(opn[-1])
+        dates  = _dates(future_index(data.index, days, interval))
+        key    = forecast_key(symbol, data.index[-1], engine_fingerprint(engine), scaler_fingerprint(scaler), interval)
+
+        def to_price(scaled):
+            return scaler.inverse_transform(np.asarray(scaled, dtype=float).reshape(-1, 1)).ravel()
+
+        async def uncertainty():
+            t0     = time.perf_counter()
+            paths  = await svc.run(partial(mc_dropout_paths, engine, window, days, samples, strategy=strategy))
+            lo, hi = band_percentiles(coverage)
+            bands  = percentile_bands(to_price(paths).reshape(paths.shape), (lo, 50, hi))
+            return {
+                "method":   "mc_dropout",
+                "samples":  samples,
+                "coverage": coverage,
+                "lower":    _nums(bands[lo]),
+                "median":   _nums(bands[50]),
+                "upper":    _nums(bands[hi]),
+                "ms":       round((time.perf_counter() - t0) * 1000, 3),
+            }
+
+        # A direct forecast is one model call, so it is never cached
+        cached = None if direct else svc.cache.peek(key, days)
+        if not stream:
+            scaled = cached
+            if scaled is None and direct:
+                scaled = (await svc.run(direct_forecast, engine, window, days))[0]
+            elif scaled is None:
+                scaled = await svc.run(svc.cache.forecast, engine, key, window, days)
+            prices = to_price(scaled)
+            body   = {"symbol": symbol.upper(), "interval": interval, "last_date": _dates(data.index[-1:])[0],
+                      "strategy": strategy,
+                      "dates": dates, "forecast": _nums(prices), "cached": cached is not None,
+                      **forecast_metrics(latest, prices)}
+            if samples:
+                body["uncertainty"] = await uncertainty()
+            self.finish(body)
+            return
+
+        self.set_header("Content-Type", "text/event-stream")
+        self.set_header("Cache-Control", "no-cache")
+        self.set_header("X-Accel-Buffering", "no")
+        await self.flush()
+
+        scaled = []
+        if direct:
+            scaled = list((await svc.run(direct_forecast, engine, window, days))[0])
+            for i, price in enumerate(to_price(scaled)):
+                await self._event("step", {"step": i + 1, "date": dates[i], "price": _num(price), "cached": False})
+        elif cached is not None:
+            scaled = list(cached)
+            for i, price in enumerate(to_price(cached)):
+                await self._event("step", {"step": i + 1, "date": dates[i], "price": _num(price), "cached": True})
+        else:
+            steps = iter_recursive_forecast(engine, window, days)
+            for i in range(days):
+                value = await svc.run(next, steps)
+                scaled.append(float(value[0]))
+                await self._event("step", {"step": i + 1, "date": dates[i],
+                                           "price": _num(to_price(value)[0]), "cached": False})
+            svc.cache.put(key, window, scaled)
+        if samples:
+            await self._event("uncertainty", await uncertainty())
+
+        prices = to_price(scaled)
+        await self._event("done", {"symbol": symbol.upper(), "strategy": strategy, "dates": dates, "forecast": _nums(prices),
+                                   **forecast_metrics(latest, prices)})
+        self.finish()
+
+    async def _event(self, name, payload):
+        payload["elapsed_ms"] = round((time.perf_counter() - self._t0) * 1000, 3)
+        self.write(f"event: {name}\ndata: {json.dumps(payload, default=_json_default)}\n\n")
+        await self.flush()
+
+    def on_connection_close(self):
+        log.info("client went away mid-stream: %s", self.request.uri)
+
+
+def _json_default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+# ─────────────────────────────────────────────────────────────────
+# APP
+# ─────────────────────────────────────────────────────────────────
+def make_app(services):
+    kw  = {"services": services}
+    sym = r"([A-Za-z0-9._^=-]+)"
+    return tornado.web.Application([
+        (r"/health", HealthHandler, kw),
+        (r"/metrics", MetricsHandler, kw),
+        (rf"/history/{sym}", HistoryHandler, kw),
+        (rf"/indicators/{sym}", IndicatorsHandler, kw),
+        (rf"/forecast/{sym}", ForecastHandler, kw),
+    ])
+
+
+async def serve(args):
+    services = Services(args.engine, args.model, args.scaler, args.provider, args.data_dir,
+                        direct_model_path=args.direct_model, manifest=args.manifest)
+    app = make_app(services)
+    app.listen(args.port, address=args.host)
+    log.info("listening on http://%s:%d (engine=%s, provider=%s)",
+             args.host, args.port, args.engine, services.provider.name)
+    await asyncio.Event().wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve forecasts, indicators and history over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--engine", choices=ENGINES, default="numpy")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--direct-model", default=DIRECT_MODEL_PATH)
+    parser.add_argument("--scaler", default=SCALER_PATH)
+    parser.add_argument("--manifest", default=REGISTRY_PATH, help="per-symbol models; --model/--scaler are the default")
+    parser.add_argument("--provider", default=None, help="defaults to QL_PROVIDER")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    asyncio.run(serve(args))
+
+
+if __name__ == "__main__":
+    main()
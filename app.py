@@ -1,13 +1,24 @@
 import streamlit as st
-import yfinance as yf
 import numpy as np
-import joblib
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from tensorflow.keras.models import load_model
 from datetime import datetime
 import pandas as pd
-import time
+import os
+
+from bars import future_index, open_bar_store
+from charts import (VIEW_WINDOWS, candlestick_figure, extend_live_figure, forecast_figure, live_figure,
+                    technical_figure)
+from data_store import DATA_DIR, OHLCVStore
+from engine import DIRECT_MODEL_PATH
+from forecast import (DIRECT_HORIZON, N_STEPS, band_percentiles, direct_forecast, forecast_metrics,
+                      forecast_symbols, mc_dropout_paths, percentile_bands, valid_tail)
+from forecast_cache import ForecastCache, engine_fingerprint, forecast_key, scaler_fingerprint
+from indicators import IndicatorEngine
+from live import LIVE_INTERVAL, LiveSession, default_source, make_source
+from market_data import get_provider
+from pipeline import STAGES, StageTimer
+from precompute import WATCHLIST, Precomputer
+from registry import REGISTRY_PATH, ModelRegistry
+from telemetry import METRICS_PORT, exposition, relabel, serve_metrics
 
 # ─────────────────────────────────────────────────────────────────
 # PAGE CONFIG
@@ -583,13 +594,193 @@ hr { border-color: rgba(0,200,255,0.08) !important; }
 # ─────────────────────────────────────────────────────────────────
 # LOAD ASSETS
 # ─────────────────────────────────────────────────────────────────
+ENGINE_LABELS = {
+    "⚙  NumPy · fast, no TensorFlow": "numpy",
+    "🧠  Keras · reference":           "keras",
+    "⚡  Keras XLA · compiled":         "keras-xla",
+    "⚡  Keras XLA · float16":          "keras-xla-fp16",
+    "⚡  Keras XLA · bfloat16":         "keras-xla-bf16",
+    "⚙  NumPy · int8 weights":         "numpy-int8",
+}
+
+WARM_START = os.environ.get("QL_WARM_START", "1") != "0"
+PRECOMPUTE_ENGINE = os.environ.get("QL_PRECOMPUTE_ENGINE", "numpy")
+
+BROKER      = os.environ.get("QL_BROKER", "1") != "0"
+MC_SAMPLES  = int(os.environ.get("QL_MC_SAMPLES", 100))
+MC_COVERAGE = int(os.environ.get("QL_MC_COVERAGE", 90))
+
+@st.cache_resource
+def load_registry():
+    # Symbols map to their own model/scaler (QL_REGISTRY).  Each is loaded on first
+    # use, shared by every session, and behind its own broker so concurrent
+    # sessions' steps share batched predicts; QL_MODEL_BUDGET_MB bounds the total.
+    return ModelRegistry.from_manifest(broker=BROKER)
+
+def load_assets_async(symbol, engine_kind="numpy", strategy="recursive"):
+    # Engine, scaler and a warm-up inference run on a background thread so the
+    # page renders before TensorFlow / HDF5 / sklearn have finished importing.
+    loader = load_registry().loader(symbol, engine_kind, strategy)
+    if not WARM_START:
+        loader.result()
+    return loader
+
+def load_assets(symbol, engine_kind="numpy", strategy="recursive"):
+    return load_registry().assets(symbol, engine_kind, strategy)
+
+@st.cache_resource
+def load_forecast_cache():
+    return ForecastCache(max_entries=int(os.environ.get("QL_FORECAST_CACHE_SIZE", 512)))
+
+@st.cache_resource
+def load_indicator_engine():
+    return IndicatorEngine()
+
+@st.cache_resource
+def load_provider():
+    return get_provider()
+
+@st.cache_resource
+def load_store():
+    provider = load_provider()
+    # One cache directory per provider so replayed or synthetic candles never mix with live ones
+    return OHLCVStore(os.path.join(DATA_DIR, provider.name), fetch=provider)
+
+@st.cache_resource
+def load_bars():
+    # Intraday bars are ingested once at QL_BASE_INTERVAL; coarser intervals are resampled from them
+    return open_bar_store(load_provider(), DATA_DIR, daily=load_store())
+
+BAR_INTERVALS = {
+    "1 Day":   "1d",
+    "1 Week":  "1wk",
+    "1 Hour":  "1h",
+    "30 Min":  "30m",
+    "15 Min":  "15m",
+    "5 Min":   "5m",
+}
+
+
+@st.cache_resource
+def load_precomputer():
+    """Watchlist pre-computation after each close (``QL_WATCHLIST``); ``None`` when unset."""
+    if not WATCHLIST:
+        return None
+    return Precomputer(load_store(), lambda sym: load_assets(sym, PRECOMPUTE_ENGINE),
+                       load_forecast_cache(), load_indicator_engine()).start()
+
+
+def collect_metrics():
+    registry = load_registry()
+    return exposition(
+        load_forecast_cache().prometheus(),
+        load_store().flights.prometheus("quantumlens_fetch_singleflight"),
+        load_forecast_cache().flights.prometheus("quantumlens_forecast_singleflight"),
+        registry.prometheus(),
+        *(relabel(b.prometheus(), model=name) for name, b in registry.brokers().items()),
+    )
+
 @st.cache_resource
-def load_assets():
-    model  = load_model("lstm_model.h5")
-    scaler = joblib.load("scaler.save")
-    return model, scaler
+def load_metrics_server():
+    """Prometheus ``/metrics`` on ``QL_METRICS_PORT`` (Streamlit cannot add routes); ``None`` when unset."""
+    return serve_metrics(collect_metrics) if METRICS_PORT else None
+
+
+@st.fragment(run_every=1.0)
+def poll_model_ready(loader):
+    # Rerun the whole page once the background load finishes so the button enables
+    if loader.ready or loader.status == "failed":
+        st.rerun(scope="app")
+    st.caption(f"Model {loader.status} in background…")
+
+
+# ─────────────────────────────────────────────────────────────────
+# PIPELINE TIMING
+# ─────────────────────────────────────────────────────────────────
+def show_progress(prog):
+    def update(done, total, label):
+        prog.progress(int(done / total * 100), text=label)
+    return update
+
+def render_timing(timing):
+    total = timing["total_ms"] or 1.0
+    rows  = "".join(
+        f'<div class="conf-row"><span class="conf-label">{name}</span>'
+        f'<div class="conf-bar"><div class="conf-fill" style="width:{min(100, ms / total * 100):.1f}%;'
+        f'background:linear-gradient(90deg,#00c8ff,#bf5fff);"></div></div>'
+        f'<span class="conf-pct" style="width:70px;">{ms:,.0f} ms</span></div>'
+        for name, ms in timing["stages_ms"].items()
+    )
+    with st.expander(f"⏱  PIPELINE TIMING · {timing['total_ms']:,.0f} ms · req {timing['request_id']}"):
+        st.markdown(f'<div style="padding:0.5rem 0;">{rows}</div>', unsafe_allow_html=True)
+        st.json(timing, expanded=False)
+
 
-model, scaler = load_assets()
+# ─────────────────────────────────────────────────────────────────
+# LIVE FEED
+# ─────────────────────────────────────────────────────────────────
+def toggle_live():
+    # Runs before the rerun, so the sidebar button already shows the new state
+    st.session_state["live_on"] = not st.session_state.get("live_on", False)
+    st.session_state.pop("live_settings", None)
+
+def start_live(symbol, days, strategy, engine_kind, interval):
+    engine, scaler = load_assets(symbol, engine_kind, strategy)
+    store  = load_store() if interval == "1d" else load_bars().at(interval)
+    source = make_source(default_source(load_provider().name), store, symbol)
+    st.session_state["live"] = LiveSession(symbol, source, engine, scaler, days, strategy,
+                                           cache=load_forecast_cache(), interval=interval)
+    st.session_state.pop("live_fig", None)
+
+@st.fragment(run_every=LIVE_INTERVAL)
+def live_feed():
+    # Only this fragment reruns on each tick; the figure lives in session state
+    # and gets just the new bars appended instead of being rebuilt.
+    live   = st.session_state["live"]
+    update = live.tick()
+    fig    = st.session_state.get("live_fig")
+    if fig is None:
+        view = live.view()
+        fig  = st.session_state["live_fig"] = live_figure(view["dates"], view["series"], view["future"], view["forecast"])
+    elif update is not None:
+        extend_live_figure(fig, update["dates"], update["series"], update["future"], update["forecast"], live.window)
+
+    m         = live.metrics
+    rsi       = live.state.snapshot()["rsi_last"]
+    badge_cls = "up" if m["is_bullish"] else "down"
+    arrow     = "▲" if m["is_bullish"] else "▼"
+    tick_ms   = live.tick_ms[-1] if live.tick_ms else 0.0
+    st.markdown(f"""
+    <div class="kpi-row">
+        <div class="kpi-card c-blue">
+            <div class="kpi-label">Live Open Price</div>
+            <div class="kpi-value">₹{m["latest_price"]:,.2f}</div>
+            <div class="kpi-sub">{live.symbol} · {live.last.strftime("%d %b %Y" if live.interval in ("1d", "1wk") else "%d %b %H:%M")}</div>
+            <div><span class="badge flat">{"REPLAY" if live.source.name == "replay" else "LIVE"}</span></div>
+        </div>
+        <div class="kpi-card {"c-green" if m["is_bullish"] else "c-red"}">
+            <div class="kpi-label">AI Predicted · {live.days}D</div>
+            <div class="kpi-value">₹{m["predicted_price"]:,.2f}</div>
+            <div class="kpi-sub">Re-forecast on every new bar</div>
+            <div><span class="badge {badge_cls}">{arrow} {abs(m["pct_change"]):.2f}%</span></div>
+        </div>
+        <div class="kpi-card c-gold">
+            <div class="kpi-label">RSI (14)</div>
+            <div class="kpi-value">{rsi:.1f}</div>
+            <div class="kpi-sub">Updated incrementally</div>
+            <div><span class="badge flat">{"OVERBOUGHT" if rsi > 70 else "OVERSOLD" if rsi < 30 else "NEUTRAL"}</span></div>
+        </div>
+        <div class="kpi-card c-purple">
+            <div class="kpi-label">Live Ticks</div>
+            <div class="kpi-value">{live.ticks:,}</div>
+            <div class="kpi-sub">{live.bars:,} bars · last update {tick_ms:,.0f} ms</div>
+            <div><span class="badge flat">EVERY {LIVE_INTERVAL:g}s</span></div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    st.plotly_chart(fig, use_container_width=True, key="live_chart")
+    if live.exhausted:
+        st.caption("Replay finished — every held-back bar has been streamed.")
 
 
 # ─────────────────────────────────────────────────────────────────
@@ -606,28 +797,109 @@ with st.sidebar:
     </div>
     """, unsafe_allow_html=True)
 
+    st.markdown('<div class="sidebar-section">Forecast Mode</div>', unsafe_allow_html=True)
+    forecast_mode = st.radio("", ["Single Symbol", "Watchlist Batch", "Live Feed"], horizontal=True, label_visibility="collapsed")
+    batch_mode    = forecast_mode == "Watchlist Batch"
+    live_mode     = forecast_mode == "Live Feed"
+
     st.markdown('<div class="sidebar-section">Market Symbol</div>', unsafe_allow_html=True)
-    stock_symbol = st.text_input("", value="GAIL.NS", label_visibility="collapsed", placeholder="e.g. AAPL, TSLA, GAIL.NS")
+    if batch_mode:
+        symbols_text = st.text_area("", value="GAIL.NS, RELIANCE.NS, TCS.NS, INFY.NS", label_visibility="collapsed",
+                                    placeholder="Comma or newline separated tickers")
+        batch_symbols = list(dict.fromkeys(t.strip().upper() for t in symbols_text.replace("\n", ",").split(",") if t.strip()))
+        stock_symbol  = batch_symbols[0] if batch_symbols else ""
+    else:
+        stock_symbol = st.text_input("", value="GAIL.NS", label_visibility="collapsed", placeholder="e.g. AAPL, TSLA, GAIL.NS")
 
     st.markdown('<div class="sidebar-section">Exchange Region</div>', unsafe_allow_html=True)
     exchange = st.selectbox("", ["🇮🇳  NSE / BSE (.NS / .BO)", "🇺🇸  NYSE / NASDAQ", "🇬🇧  LSE (.L)", "🌏  Other"], label_visibility="collapsed")
 
+    st.markdown('<div class="sidebar-section">Bar Interval</div>', unsafe_allow_html=True)
+    bar_options  = [label for label, iv in BAR_INTERVALS.items() if iv in load_bars().intervals()]
+    bar_interval = BAR_INTERVALS[st.selectbox("", bar_options, label_visibility="collapsed")]
+    if bar_interval != "1d":
+        st.caption("Forecast window and chart windows count bars at this interval.")
+
     st.markdown('<div class="sidebar-section">Forecast Window</div>', unsafe_allow_html=True)
     forecast_days = st.slider("", min_value=7, max_value=60, value=30, step=1, label_visibility="collapsed", format="%d days")
 
+    st.markdown('<div class="sidebar-section">Chart Window</div>', unsafe_allow_html=True)
+    chart_label  = st.select_slider("", options=list(VIEW_WINDOWS), value="MAX", label_visibility="collapsed")
+    chart_window = VIEW_WINDOWS[chart_label]
+
+    st.markdown('<div class="sidebar-section">Forecast Strategy</div>', unsafe_allow_html=True)
+    direct = st.radio("", ["Recursive", f"Direct {DIRECT_HORIZON}D"], horizontal=True, label_visibility="collapsed") != "Recursive"
+    if direct and not load_registry().has_model(stock_symbol, "direct"):
+        # Where the registry looks, paired with the scaler it will load for it
+        artifact = load_registry().models[load_registry().resolve(stock_symbol, "direct")]
+        path     = artifact.get("direct", DIRECT_MODEL_PATH)
+        st.caption(f"No {path} yet — train one with `python train.py --strategy direct "
+                   f"--model-out {path} --scaler-in {artifact['scaler']}`, or map a trained "
+                   f"one in {REGISTRY_PATH}. Using recursive.")
+        direct = False
+    strategy = "direct" if direct else "recursive"
+
+    st.markdown('<div class="sidebar-section">Uncertainty Band</div>', unsafe_allow_html=True)
+    mc_band = st.radio("", ["Volatility ±1.5σ", "MC Dropout"], horizontal=True, label_visibility="collapsed") == "MC Dropout"
+    if mc_band:
+        mc_samples  = st.slider("Sampled paths", min_value=25, max_value=500, value=MC_SAMPLES, step=25)
+        mc_coverage = st.select_slider("Band coverage", options=[50, 80, 90, 95], value=MC_COVERAGE, format_func=lambda c: f"{c}%")
+
+    st.markdown('<div class="sidebar-section">Inference Engine</div>', unsafe_allow_html=True)
+    engine_label = st.selectbox("", list(ENGINE_LABELS), label_visibility="collapsed")
+    engine_kind  = ENGINE_LABELS[engine_label]
+
     st.markdown("<br>", unsafe_allow_html=True)
-    predict_button = st.button(f"⚡  RUN FORECAST · {forecast_days}D")
+    loader = load_assets_async(stock_symbol, engine_kind, strategy)
+    if loader.ready and live_mode:
+        predict_button = st.button("■  STOP LIVE FEED" if st.session_state.get("live_on") else "▶  START LIVE FEED",
+                                   key="live_button", on_click=toggle_live)
+    elif loader.ready:
+        predict_button = st.button(f"⚡  RUN FORECAST · {forecast_days}D")
+    elif loader.status == "failed":
+        predict_button = st.button("⚠  MODEL UNAVAILABLE", disabled=True)
+        st.error(f"Model failed to load: {loader.error}")
+    else:
+        predict_button = st.button(f"⏳  MODEL {loader.status.upper()}…", disabled=True)
+        poll_model_ready(loader)
 
     st.markdown('<div class="sidebar-section">Model Architecture</div>', unsafe_allow_html=True)
-    st.markdown("""
+    cache_stats = load_forecast_cache().stats()
+    precomputer = load_precomputer()
+    load_metrics_server()
+    if precomputer is None:
+        precompute_label = "Off"
+    else:
+        done = sorted((r for r in precomputer.runs.values() if "forecast" in r), key=lambda r: r["finished"])
+        precompute_label = (f"{done[-1]['forecast']} sym · {pd.Timestamp(done[-1]['finished']):%H:%M} UTC"
+                            if done else "Running…")
+    fetch_stats = load_store().flights.stats()
+    coalesced   = cache_stats["coalesced"] + fetch_stats["coalesced"] + fetch_stats["coalesced_remote"]
+    registry       = load_registry()
+    registry_stats = registry.stats()
+    brokers        = [b.stats() for b in registry.brokers().values()]
+    if BROKER and brokers:
+        calls        = sum(b["calls"] for b in brokers)
+        broker_label = f"{sum(b['requests'] for b in brokers) / calls if calls else 0.0:.1f} req / call"
+    else:
+        broker_label = "Off" if not BROKER else "—"
+    model_label = (f"{registry.resolve(stock_symbol, strategy)} · "
+                   f"{registry_stats['resident']} loaded · {registry_stats['resident_bytes'] / 2 ** 20:.1f} MB")
+    st.markdown(f"""
     <div class="model-spec">
         <div class="spec-row"><span class="spec-k">Type</span><span class="spec-v">2× LSTM</span></div>
         <div class="spec-row"><span class="spec-k">Input</span><span class="spec-v">100 days</span></div>
         <div class="spec-row"><span class="spec-k">Feature</span><span class="spec-v">Open Price</span></div>
-        <div class="spec-row"><span class="spec-k">Horizon</span><span class="spec-v">Variable</span></div>
+        <div class="spec-row"><span class="spec-k">Horizon</span><span class="spec-v">{"Direct · 1 call" if direct else "Recursive"}</span></div>
+        <div class="spec-row"><span class="spec-k">Engine</span><span class="spec-v">{engine_kind.title()}</span></div>
+        <div class="spec-row"><span class="spec-k">Weights</span><span class="spec-v">{model_label}</span></div>
         <div class="spec-row"><span class="spec-k">Scaler</span><span class="spec-v">MinMaxScaler</span></div>
-        <div class="spec-row"><span class="spec-k">Source</span><span class="spec-v">Yahoo Finance</span></div>
+        <div class="spec-row"><span class="spec-k">Source</span><span class="spec-v">{load_provider().label}</span></div>
         <div class="spec-row"><span class="spec-k">History</span><span class="spec-v">10 Years</span></div>
+        <div class="spec-row"><span class="spec-k">Batching</span><span class="spec-v">{broker_label}</span></div>
+        <div class="spec-row"><span class="spec-k">Cache Hits</span><span class="spec-v">{cache_stats["hits"] + cache_stats["partial"]} / {cache_stats["hits"] + cache_stats["partial"] + cache_stats["misses"]}</span></div>
+        <div class="spec-row"><span class="spec-k">Precomputed</span><span class="spec-v">{precompute_label}</span></div>
+        <div class="spec-row"><span class="spec-k">Coalesced</span><span class="spec-v">{coalesced} req</span></div>
     </div>
     <div style="border-top:1px solid rgba(0,200,255,0.06); padding-top:1rem; margin-top:1.5rem; padding:0.8rem 1rem 0 1rem;">
         <div style="font-family:'JetBrains Mono',monospace; font-size:0.58rem; color:#2a4060; line-height:1.8; letter-spacing:0.05em;">
@@ -662,75 +934,204 @@ st.markdown(f"""
 # ─────────────────────────────────────────────────────────────────
 # MAIN
 # ─────────────────────────────────────────────────────────────────
-if predict_button:
-    prog = st.progress(0, text="Initializing quantum matrices…")
-    time.sleep(0.15)
+if predict_button and batch_mode:
+    if not batch_symbols:
+        st.error("⚠ Enter at least one ticker.")
+        st.stop()
+
+    prog  = st.progress(0, text=f"🛰 Syncing {len(batch_symbols)} symbols…")
+    timer = StageTimer(("fetch", "load", "infer"), on_progress=show_progress(prog),
+                       mode="batch", symbols=len(batch_symbols), horizon=forecast_days, engine=engine_kind,
+                       strategy=strategy, interval=bar_interval)
+
+    with timer.stage("fetch"):
+        bars   = load_bars()
+        frames = {}
+        for sym in batch_symbols:
+            frame = bars.bars(sym, bar_interval)
+            if not frame.empty:
+                frames[sym] = frame
+
+    with timer.stage("load"):
+        # One batched forecast per model the symbols resolve to
+        groups = [(load_registry().assets_for(name, engine_kind, strategy), syms)
+                  for name, syms in load_registry().group(frames, strategy).items()]
+    short = [engine.outputs for (engine, _), _ in groups if direct and engine.outputs < forecast_days]
+    if short:
+        st.error(f"⚠ The direct model predicts at most {min(short)} days; pick a shorter horizon.")
+        prog.empty()
+        st.stop()
+
+    with timer.stage("infer", f"⚡ Running batched {forecast_days}-day inference · {len(frames)} symbols…"):
+        results, skipped = {}, {}
+        for (engine, scaler), syms in groups:
+            res, skip = forecast_symbols(engine, scaler, {sym: frames[sym] for sym in syms}, forecast_days,
+                                         cache=load_forecast_cache(), strategy=strategy, interval=bar_interval)
+            results.update(res)
+            skipped.update(skip)
+        results = {sym: results[sym] for sym in frames if sym in results}
+    for sym in batch_symbols:
+        if sym not in frames:
+            skipped[sym] = "no data"
+    timing = timer.finish()
+    prog.empty()
+
+    if not results:
+        st.error("⚠ None of the symbols returned enough history to forecast.")
+        st.stop()
+
+    table = pd.DataFrame([
+        {
+            "Symbol":       sym,
+            "Open":         r["latest_price"],
+            f"Pred {forecast_days}D": r["predicted_price"],
+            "Change %":     r["pct_change"],
+            "Peak":         r["peak_price"],
+            "Floor":        r["trough_price"],
+            "Volatility σ": r["volatility"],
+            "Momentum":     r["momentum"],
+            "Signal":       "STRONG BUY" if r["pct_change"] > 5 else "BUY" if r["pct_change"] > 0
+                            else "SELL" if r["pct_change"] > -5 else "STRONG SELL",
+        }
+        for sym, r in results.items()
+    ]).sort_values("Change %", ascending=False)
+
+    n_bull = int((table["Change %"] > 0).sum())
+    best   = table.iloc[0]
+    worst  = table.iloc[-1]
+    st.markdown(f"""
+    <div class="kpi-row">
+        <div class="kpi-card c-blue">
+            <div class="kpi-label">Symbols Forecast</div>
+            <div class="kpi-value">{len(results)}</div>
+            <div class="kpi-sub">{1 if direct else forecast_days} batched model call{"" if direct else "s"}</div>
+            <div><span class="badge flat">BATCH</span></div>
+        </div>
+        <div class="kpi-card c-green">
+            <div class="kpi-label">Bullish</div>
+            <div class="kpi-value">{n_bull} / {len(results)}</div>
+            <div class="kpi-sub">Positive {forecast_days}-day projection</div>
+            <div><span class="badge up">▲ UP</span></div>
+        </div>
+        <div class="kpi-card c-gold">
+            <div class="kpi-label">Top Mover</div>
+            <div class="kpi-value">{best['Symbol']}</div>
+            <div class="kpi-sub">{best['Change %']:+.2f}% in {forecast_days}D</div>
+            <div><span class="badge up">▲ BEST</span></div>
+        </div>
+        <div class="kpi-card c-purple">
+            <div class="kpi-label">Weakest</div>
+            <div class="kpi-value">{worst['Symbol']}</div>
+            <div class="kpi-sub">{worst['Change %']:+.2f}% in {forecast_days}D</div>
+            <div><span class="badge down">▼ WORST</span></div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
 
-    prog.progress(15, text="🛰 Connecting to market data feed…")
-    data = yf.download(stock_symbol, period="10y", interval="1d")
-    prog.progress(35, text="📡 Streaming historical candles…")
+    st.dataframe(table.style.format({c: "{:,.2f}" for c in table.columns if c not in ("Symbol", "Signal", "Momentum")}
+                                    | {"Momentum": "{:+.3f}"}),
+                 use_container_width=True, hide_index=True)
+    if skipped:
+        st.warning("Skipped: " + ", ".join(f"{sym} ({why})" for sym, why in skipped.items()))
+    render_timing(timing)
+
+elif live_mode and st.session_state.get("live_on"):
+    settings = (stock_symbol.upper(), forecast_days, strategy, engine_kind, bar_interval)
+    if st.session_state.get("live_settings") != settings:
+        # (Re)seed from the stored history whenever the symbol or model settings change
+        try:
+            start_live(stock_symbol, forecast_days, strategy, engine_kind, bar_interval)
+        except ValueError as exc:
+            st.session_state["live_on"] = False
+            st.error(f"⚠ Cannot start the live feed: {exc}")
+            st.stop()
+        st.session_state["live_settings"] = settings
+    live_feed()
+
+elif predict_button and not live_mode:
+    prog  = st.progress(0, text="🛰 Connecting to market data feed…")
+    stages = STAGES
+    if mc_band:
+        cut    = STAGES.index("inverse") + 1
+        stages = STAGES[:cut] + ("uncertainty",) + STAGES[cut:]
+    timer  = StageTimer(stages, on_progress=show_progress(prog),
+                        mode="single", symbol=stock_symbol.upper(), horizon=forecast_days, engine=engine_kind,
+                        strategy=strategy, interval=bar_interval,
+                        **({"mc_samples": mc_samples} if mc_band else {}))
+
+    with timer.stage("fetch"):
+        # Memory-mapped float32 columns shared by all sessions; only slices are scaled
+        data = load_bars().bars(stock_symbol, bar_interval)
 
     if data.empty:
         st.error("⚠ Symbol not found. Check ticker and retry.")
         prog.empty()
         st.stop()
 
-    time.sleep(0.15)
-    prog.progress(55, text="🧠 Loading LSTM neural weights…")
-    opn = data[['Open']]
-    ds  = opn.values
-    ds_scaled = scaler.transform(ds)
-
-    last_100  = ds_scaled[-100:]
-    tmp_inp   = last_100.reshape(1, -1).tolist()[0]
-    lst_output = []
-    n_steps = 100
-
-    prog.progress(70, text=f"⚡ Running recursive {forecast_days}-day inference…")
-    for i in range(forecast_days):
-        x_input = np.array(tmp_inp[-100:]).reshape((1, n_steps, 1))
-        yhat = model.predict(x_input, verbose=0)
-        tmp_inp.append(yhat[0][0])
-        lst_output.append(yhat[0][0])
-
-    prog.progress(88, text="📊 Generating analytics…")
-    forecast_array = np.array(lst_output).reshape(-1, 1)
-    ds_new = np.vstack((ds_scaled, forecast_array))
-    final_graph = scaler.inverse_transform(ds_new)
-    prog.progress(100, text="✅ Forecast complete!")
-    time.sleep(0.25)
-    prog.empty()
+    with timer.stage("load"):
+        engine, scaler = load_assets(stock_symbol, engine_kind, strategy)
+    if direct and forecast_days > engine.outputs:
+        # A direct model trained with a shorter ``train.py --horizon`` than the slider allows
+        st.error(f"⚠ The direct model predicts at most {engine.outputs} days; pick a shorter horizon.")
+        prog.empty()
+        st.stop()
+
+    with timer.stage("scale"):
+        opn      = data["Open"]
+        last_100 = scaler.transform(valid_tail(opn, N_STEPS).reshape(-1, 1))
+
+    with timer.stage("infer", f"⚡ Running {strategy} {forecast_days}-day inference…"):
+        if direct:
+            lst_output = direct_forecast(engine, last_100.ravel(), forecast_days)[0]
+        else:
+            cache_key  = forecast_key(stock_symbol, data.index[-1], engine_fingerprint(engine), scaler_fingerprint(scaler),
+                                      bar_interval)
+            # Watchlist symbols are usually pre-computed; only a miss runs the loop
+            lst_output = load_forecast_cache().peek(cache_key, forecast_days)
+            timer.context["cache_hit"] = lst_output is not None
+            if lst_output is None:
+                lst_output = load_forecast_cache().forecast(engine, cache_key, last_100.ravel(), forecast_days)
+
+    with timer.stage("inverse"):
+        forecast_vals = scaler.inverse_transform(lst_output.reshape(-1, 1)).ravel()
+
+    mc_bands = None
+    if mc_band:
+        with timer.stage("uncertainty", f"🎲 Sampling {mc_samples} dropout paths · {forecast_days} steps…"):
+            mc_paths = mc_dropout_paths(engine, last_100.ravel(), forecast_days, mc_samples, strategy=strategy)
+            mc_paths = scaler.inverse_transform(mc_paths.reshape(-1, 1)).reshape(mc_paths.shape)
+            mc_lo, mc_hi = band_percentiles(mc_coverage)
+            mc_bands = percentile_bands(mc_paths, (mc_lo, mc_hi))
 
     # ── Derived Metrics ──
-    latest_price    = float(opn.values[-1][0])
-    predicted_price = float(final_graph[-1][0])
-    price_change    = predicted_price - latest_price
-    pct_change      = (price_change / latest_price) * 100
-    is_bullish      = price_change >= 0
-
-    forecast_vals = final_graph[-forecast_days:].flatten()
-    peak_price    = float(forecast_vals.max())
-    trough_price  = float(forecast_vals.min())
-    volatility    = float(np.std(forecast_vals))
-    momentum      = float(np.mean(np.diff(forecast_vals)))
-
-    high_52w = float(data['High'].tail(252).max())  if 'High'   in data.columns else None
-    low_52w  = float(data['Low'].tail(252).min())   if 'Low'    in data.columns else None
-    vol_avg  = int(data['Volume'].tail(30).mean())  if 'Volume' in data.columns else 0
-    data_pts = len(data)
-
-    closes   = data['Close'].values.flatten()
-    delta    = np.diff(closes)
-    gain_arr = np.where(delta > 0, delta, 0)
-    loss_arr = np.where(delta < 0, -delta, 0)
-    avg_g    = np.mean(gain_arr[-14:])
-    avg_l    = np.mean(loss_arr[-14:])
-    rsi      = 100 - (100 / (1 + avg_g / avg_l)) if avg_l != 0 else 50.0
-
-    ema12    = float(pd.Series(closes).ewm(span=12, adjust=False).mean().iloc[-1])
-    ema26    = float(pd.Series(closes).ewm(span=26, adjust=False).mean().iloc[-1])
-    macd_val = ema12 - ema26
-    conf     = min(95, max(55, 80 - volatility / latest_price * 100))
+    with timer.stage("indicators"):
+        latest_price  = float(opn[-1])
+        metrics       = forecast_metrics(latest_price, forecast_vals)
+
+        predicted_price = metrics["predicted_price"]
+        price_change    = metrics["price_change"]
+        pct_change      = metrics["pct_change"]
+        is_bullish      = metrics["is_bullish"]
+        peak_price      = metrics["peak_price"]
+        trough_price    = metrics["trough_price"]
+        volatility      = metrics["volatility"]
+        momentum        = metrics["momentum"]
+
+        ind = load_indicator_engine().get(stock_symbol, data, bar_interval)
+
+        high_52w = ind["high_52w"]
+        low_52w  = ind["low_52w"]
+        vol_avg  = ind["vol_avg"]
+        data_pts = len(data)
+        rsi      = ind["rsi_last"]
+        macd_val = ind["macd"]
+        conf     = min(95, max(55, 80 - volatility / latest_price * 100))
+
+        close_series = ind["close"]
+        rsi_s        = ind["rsi"]
+        bb_mid       = ind["bb_mid"]
+        bb_upper_s   = ind["bb_upper"]
+        bb_lower_s   = ind["bb_lower"]
 
     # ── DISCLAIMER ──
     st.markdown("""
@@ -822,95 +1223,29 @@ if predict_button:
     tab1, tab2, tab3 = st.tabs(["📈  FORECAST CHART", "🕯  CANDLESTICK + OVERLAY", "📊  TECHNICAL ANALYSIS"])
 
     historical_dates = data.index
-    future_dates = pd.date_range(
-        start=historical_dates[-1] + pd.Timedelta(days=1),
-        periods=forecast_days, freq='B'
-    )
-    all_dates = historical_dates.append(future_dates)
-    n_hist    = len(historical_dates)
-    hist_y    = final_graph[:n_hist].flatten()
-    fore_full = final_graph.flatten()
-    band_upper = forecast_vals + volatility * 1.5
-    band_lower = forecast_vals - volatility * 1.5
+    future_dates = future_index(historical_dates, forecast_days, bar_interval)
+    hist_y     = opn
+    if mc_bands is not None:
+        band_lower, band_upper = mc_bands[mc_lo], mc_bands[mc_hi]
+        band_name  = f"MC Dropout {mc_coverage}% · {mc_samples} paths"
+        band_desc  = f"{mc_coverage}% Monte Carlo dropout band ({mc_samples} paths, {timer.timings['uncertainty']:,.0f} ms)"
+    else:
+        band_upper = forecast_vals + volatility * 1.5
+        band_lower = forecast_vals - volatility * 1.5
+        band_name  = "Confidence Band"
+        band_desc  = f"±{round(volatility,1)} σ band"
+
+    # All three charts in one stage, so the progress bar only moves forward
+    with timer.stage("figures"):
+        fig  = forecast_figure(historical_dates, hist_y, future_dates, forecast_vals, band_upper, band_lower,
+                               predicted_price, forecast_days, window=chart_window, band_name=band_name)
+        candle_data = data.tail(120)
+        fig2 = candlestick_figure(candle_data, ind["ma20"][-len(candle_data):], ind["ma50"][-len(candle_data):],
+                                  future_dates, forecast_vals, forecast_days)
+        fig3 = technical_figure(data.index, close_series, bb_upper_s, bb_lower_s, bb_mid, rsi_s, window=chart_window)
 
     # ─── TAB 1: FORECAST ───
     with tab1:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=historical_dates, y=hist_y,
-            mode='lines', name='Historical',
-            line=dict(color='rgba(0,200,255,0.7)', width=1.5),
-            fill='tozeroy', fillcolor='rgba(0,200,255,0.03)',
-            hovertemplate='<b>%{x|%d %b %Y}</b><br>Open: ₹%{y:,.2f}<extra>Historical</extra>'
-        ))
-        fig.add_trace(go.Scatter(
-            x=list(future_dates) + list(future_dates[::-1]),
-            y=list(band_upper) + list(band_lower[::-1]),
-            fill='toself', fillcolor='rgba(0,255,136,0.05)',
-            line=dict(color='rgba(0,0,0,0)'),
-            name='Confidence Band', hoverinfo='skip'
-        ))
-        fig.add_trace(go.Scatter(
-            x=future_dates, y=band_upper,
-            mode='lines', name='Upper Band',
-            line=dict(color='rgba(0,255,136,0.2)', width=1, dash='dot'),
-            hovertemplate='Upper: ₹%{y:,.2f}<extra></extra>'
-        ))
-        fig.add_trace(go.Scatter(
-            x=future_dates, y=band_lower,
-            mode='lines', name='Lower Band',
-            line=dict(color='rgba(255,51,102,0.2)', width=1, dash='dot'),
-            hovertemplate='Lower: ₹%{y:,.2f}<extra></extra>'
-        ))
-        fig.add_trace(go.Scatter(
-            x=all_dates[n_hist - 1:], y=fore_full[n_hist - 1:],
-            mode='lines', name='AI Forecast',
-            line=dict(color='#00ff88', width=2.5),
-            hovertemplate='<b>%{x|%d %b %Y}</b><br>Forecast: ₹%{y:,.2f}<extra>LSTM</extra>'
-        ))
-        fig.add_trace(go.Scatter(
-            x=future_dates, y=forecast_vals,
-            mode='markers', showlegend=False,
-            marker=dict(color='#00ff88', size=3.5, opacity=0.6),
-            hovertemplate='₹%{y:,.2f}<extra></extra>'
-        ))
-        fig.add_shape(type="line",
-            x0=str(historical_dates[-1]), x1=str(historical_dates[-1]),
-            y0=0, y1=1, yref='paper',
-            line=dict(color="#ffd700", width=1.5, dash="dash"))
-        fig.add_annotation(
-            x=str(historical_dates[-1]), y=0.98, yref='paper',
-            text="◀ HISTORICAL  ┃  FORECAST ▶",
-            showarrow=False,
-            font=dict(family="JetBrains Mono", size=8, color="#ffd700"),
-            bgcolor="rgba(255,215,0,0.08)",
-            bordercolor="rgba(255,215,0,0.3)",
-            borderwidth=1, borderpad=5)
-        fig.add_shape(type="line",
-            x0=str(all_dates[0]), x1=str(all_dates[-1]),
-            y0=predicted_price, y1=predicted_price,
-            line=dict(color="rgba(0,255,136,0.3)", width=1, dash="dot"))
-        fig.add_annotation(
-            x=str(all_dates[-1]), y=predicted_price,
-            text=f" {forecast_days}D Target ₹{round(predicted_price,2):,.0f}",
-            showarrow=False, xanchor="right",
-            font=dict(family="JetBrains Mono", size=9, color="#00ff88"))
-        fig.update_layout(
-            template="plotly_dark",
-            paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
-            height=520, margin=dict(l=10, r=10, t=10, b=10),
-            hovermode="x unified",
-            legend=dict(orientation="h", x=0, y=1.06,
-                font=dict(family="JetBrains Mono", size=9, color="#6d8fa8"),
-                bgcolor="rgba(0,0,0,0)"),
-            xaxis=dict(showgrid=False, zeroline=False, type="date",
-                tickfont=dict(family="JetBrains Mono", size=8, color="#2a4060"),
-                rangeslider=dict(visible=True, bgcolor="#060c14", bordercolor="#1a2d4a", thickness=0.04)),
-            yaxis=dict(showgrid=True, gridcolor="rgba(0,200,255,0.05)", zeroline=False,
-                tickfont=dict(family="JetBrains Mono", size=8, color="#2a4060"), tickprefix="₹"),
-            hoverlabel=dict(bgcolor="#0e1a2e", bordercolor="#1a2d4a",
-                font=dict(family="JetBrains Mono", size=11, color="#e2f4ff"))
-        )
         st.plotly_chart(fig, use_container_width=True)
 
         col_c1, col_c2 = st.columns([2, 1])
@@ -930,118 +1265,17 @@ if predict_button:
             <div class="signal-card {sig_class}" style="height:100%;display:flex;flex-direction:column;justify-content:center;">
                 <div class="signal-label">AI SIGNAL</div>
                 <div class="signal-value {sig_class}">{signal_str}</div>
-                <div class="signal-desc">Based on {forecast_days}-day LSTM recursive projection with ±{round(volatility,1)} σ band</div>
+                <div class="signal-desc">Based on {forecast_days}-day LSTM {strategy} projection with {band_desc}</div>
                 <div style="margin-top:0.8rem;"><span class="badge {badge_cls}">{arrow} {abs(round(pct_change,2))}% in {forecast_days}D</span></div>
             </div>
             """, unsafe_allow_html=True)
 
     # ─── TAB 2: CANDLESTICK ───
     with tab2:
-        candle_data = data.tail(120)
-        fig2 = make_subplots(rows=2, cols=1, shared_xaxes=True,
-            vertical_spacing=0.03, row_heights=[0.75, 0.25])
-
-        fig2.add_trace(go.Candlestick(
-            x=candle_data.index,
-            open=candle_data['Open'].values.flatten(),
-            high=candle_data['High'].values.flatten(),
-            low=candle_data['Low'].values.flatten(),
-            close=candle_data['Close'].values.flatten(),
-            name='OHLC',
-            increasing_line_color='#00ff88', decreasing_line_color='#ff3366',
-            increasing_fillcolor='rgba(0,255,136,0.6)', decreasing_fillcolor='rgba(255,51,102,0.6)',
-        ), row=1, col=1)
-
-        ma20 = candle_data['Close'].rolling(20).mean()
-        fig2.add_trace(go.Scatter(x=candle_data.index, y=ma20.values.flatten(),
-            mode='lines', name='MA(20)', line=dict(color='#ffd700', width=1.2)), row=1, col=1)
-
-        ma50 = candle_data['Close'].rolling(50).mean()
-        fig2.add_trace(go.Scatter(x=candle_data.index, y=ma50.values.flatten(),
-            mode='lines', name='MA(50)', line=dict(color='#bf5fff', width=1.2)), row=1, col=1)
-
-        fig2.add_trace(go.Scatter(x=list(future_dates), y=forecast_vals,
-            mode='lines', name=f'{forecast_days}D Forecast',
-            line=dict(color='#00ff88', width=2, dash='dash')), row=1, col=1)
-
-        colors_vol = ['rgba(0,255,136,0.5)' if c >= o else 'rgba(255,51,102,0.5)'
-                      for c, o in zip(candle_data['Close'].values.flatten(), candle_data['Open'].values.flatten())]
-        fig2.add_trace(go.Bar(
-            x=candle_data.index, y=candle_data['Volume'].values.flatten(),
-            name='Volume', marker_color=colors_vol, showlegend=False), row=2, col=1)
-
-        fig2.update_layout(
-            template="plotly_dark",
-            paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
-            height=560, margin=dict(l=10, r=10, t=10, b=10), hovermode="x unified",
-            legend=dict(orientation="h", x=0, y=1.05,
-                font=dict(family="JetBrains Mono", size=9, color="#6d8fa8"), bgcolor="rgba(0,0,0,0)"),
-            xaxis=dict(showgrid=False, zeroline=False, rangeslider=dict(visible=False),
-                tickfont=dict(family="JetBrains Mono", size=8, color="#2a4060")),
-            xaxis2=dict(showgrid=False, zeroline=False, rangeslider=dict(visible=False),
-                tickfont=dict(family="JetBrains Mono", size=8, color="#2a4060")),
-            yaxis=dict(showgrid=True, gridcolor="rgba(0,200,255,0.05)", zeroline=False,
-                tickfont=dict(family="JetBrains Mono", size=8, color="#2a4060"), tickprefix="₹"),
-            yaxis2=dict(showgrid=False, zeroline=False,
-                tickfont=dict(family="JetBrains Mono", size=7, color="#2a4060"))
-        )
         st.plotly_chart(fig2, use_container_width=True)
 
     # ─── TAB 3: TECHNICAL ───
     with tab3:
-        close_series = pd.Series(data['Close'].values.flatten(), index=data.index)
-        delta_s      = close_series.diff()
-        gain_s       = delta_s.clip(lower=0).rolling(14).mean()
-        loss_s       = (-delta_s.clip(upper=0)).rolling(14).mean()
-        rs_s         = gain_s / loss_s
-        rsi_s        = 100 - (100 / (1 + rs_s))
-
-        bb_mid   = close_series.rolling(20).mean()
-        bb_std   = close_series.rolling(20).std()
-        bb_upper_s = bb_mid + 2 * bb_std
-        bb_lower_s = bb_mid - 2 * bb_std
-
-        fig3 = make_subplots(rows=2, cols=1, shared_xaxes=True,
-            vertical_spacing=0.05, subplot_titles=("Bollinger Bands (20, 2σ)", "RSI (14)"),
-            row_heights=[0.6, 0.4])
-
-        fig3.add_trace(go.Scatter(
-            x=list(data.index) + list(data.index[::-1]),
-            y=list(bb_upper_s.values) + list(bb_lower_s.values[::-1]),
-            fill='toself', fillcolor='rgba(0,200,255,0.05)',
-            line=dict(color='rgba(0,0,0,0)'), name='BB Band', hoverinfo='skip'), row=1, col=1)
-        fig3.add_trace(go.Scatter(x=data.index, y=close_series.values,
-            mode='lines', name='Close', line=dict(color='rgba(0,200,255,0.8)', width=1.5)), row=1, col=1)
-        fig3.add_trace(go.Scatter(x=data.index, y=bb_upper_s.values,
-            mode='lines', name='BB Upper', line=dict(color='rgba(0,200,255,0.3)', width=1)), row=1, col=1)
-        fig3.add_trace(go.Scatter(x=data.index, y=bb_lower_s.values,
-            mode='lines', name='BB Lower', line=dict(color='rgba(255,51,102,0.3)', width=1)), row=1, col=1)
-        fig3.add_trace(go.Scatter(x=data.index, y=bb_mid.values,
-            mode='lines', name='BB Mid', line=dict(color='rgba(255,215,0,0.4)', width=1, dash='dot')), row=1, col=1)
-
-        fig3.add_trace(go.Scatter(x=data.index, y=rsi_s.values,
-            mode='lines', name='RSI(14)', line=dict(color='#ffd700', width=1.5),
-            fill='tozeroy', fillcolor='rgba(255,215,0,0.04)'), row=2, col=1)
-        fig3.add_shape(type='line', row=2, col=1,
-            x0=data.index[0], x1=data.index[-1], y0=70, y1=70,
-            line=dict(color='rgba(255,51,102,0.4)', width=1, dash='dash'))
-        fig3.add_shape(type='line', row=2, col=1,
-            x0=data.index[0], x1=data.index[-1], y0=30, y1=30,
-            line=dict(color='rgba(0,255,136,0.4)', width=1, dash='dash'))
-
-        fig3.update_layout(
-            template="plotly_dark",
-            paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
-            height=560, margin=dict(l=10, r=10, t=30, b=10),
-            showlegend=False, hovermode="x unified",
-            font=dict(family="JetBrains Mono", size=9, color="#6d8fa8"),
-            xaxis=dict(showgrid=False, zeroline=False, tickfont=dict(family="JetBrains Mono", size=8, color="#2a4060")),
-            xaxis2=dict(showgrid=False, zeroline=False, tickfont=dict(family="JetBrains Mono", size=8, color="#2a4060")),
-            yaxis=dict(showgrid=True, gridcolor="rgba(0,200,255,0.04)", zeroline=False,
-                tickfont=dict(family="JetBrains Mono", size=8, color="#2a4060")),
-            yaxis2=dict(showgrid=True, gridcolor="rgba(0,200,255,0.04)", zeroline=False,
-                tickfont=dict(family="JetBrains Mono", size=8, color="#2a4060"))
-        )
         st.plotly_chart(fig3, use_container_width=True)
 
         st.markdown(f"""
@@ -1064,13 +1298,17 @@ if predict_button:
         </div>
         """, unsafe_allow_html=True)
 
+    timing = timer.finish()
+    prog.empty()
+    render_timing(timing)
+
     # ── FOOTER ──
     st.markdown(f"""
     <div class="footer-bar">
         <div class="footer-left">
             QuantumLens AI <span class="footer-dot">·</span>
             LSTM Neural Engine v3.0 <span class="footer-dot">·</span>
-            Data: Yahoo Finance <span class="footer-dot">·</span>
+            Data: {load_provider().label} <span class="footer-dot">·</span>
             Not Financial Advice
         </div>
         <div class="footer-right">Last Run: {datetime.now().strftime('%d %b %Y · %H:%M:%S')}</div>
@@ -0,0 +1,165 @@
+"""
+Batched walk-forward backtest of the recursive forecaster.
+
+    python backtest.py GAIL.NS --horizon 60 --stride 5
+    python backtest.py --tickers universe.txt --horizon 30 --out backtest.csv
+
+Every ``stride``-th bar (after the first 100) is a forecast origin.  The
+100-day input windows of all origins are taken at once from a zero-copy
+``sliding_window_view`` and advanced together by ``recursive_forecast`` in
+chunks of ``--chunk`` rows, so ``horizon`` batched model calls per chunk
+replace ``origins × horizon`` batch-1 calls.
+
+For each horizon ``h`` (1 … ``--horizon``) the report gives, over all origins:
+
+    rmse / mape        error of the forecast price ``h`` days ahead
+    directional        share of origins where the forecast moved the same way
+                       (up / down from the last known price) as the market did
+    naive_rmse         RMSE of a flat "price stays put" forecast, for scale
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from engine import ENGINES, MODEL_PATH, SCALER_PATH
+from forecast import N_STEPS, recursive_forecast
+from train import make_windows
+
+
+def origins_for(n_bars, horizon, stride=1, n_steps=N_STEPS, first=None):
+    """Bar positions ``t`` whose window ``[t - n_steps, t)`` and horizon ``[t, t + horizon)`` both fit."""
+    lo = n_steps if first is None else max(n_steps, first)
+    return np.arange(lo, n_bars - horizon + 1, stride)
+
+
+def walk_forward(engine, scaler, prices, horizon, stride=1, chunk=1024, first=None, n_steps=N_STEPS):
+    """Forecast from every origin of one price series.
+
+    Returns ``(origins, predicted, actual, last)``: origin positions, ``(M, horizon)``
+    forecast and realized prices, and the last known price at each origin.
+    """
+    prices  = np.asarray(prices, dtype=float).ravel()
+    scaled  = scaler.transform(prices.reshape(-1, 1)).astype(np.float32).ravel()
+    origins = origins_for(len(prices), horizon, stride, n_steps, first)
+    X, _    = make_windows(scaled, n_steps)
+    scaled_pred = np.empty((len(origins), horizon), dtype=np.float32)
+    for i in range(0, len(origins), chunk):
+        rows = origins[i:i + chunk] - n_steps
+        scaled_pred[i:i + chunk] = recursive_forecast(engine, X[rows], horizon, n_steps)
+
+    predicted = scaler.inverse_transform(scaled_pred.reshape(-1, 1)).reshape(scaled_pred.shape)
+    actual    = np.lib.stride_tricks.sliding_window_view(prices, horizon)[origins]
+    last      = prices[origins - 1]
+    return origins, predicted, actual, last
+
+
+def horizon_metrics(predicted, actual, last):
+    """Per-horizon RMSE / MAPE / directional accuracy over all origins."""
+    err  = predicted - actual
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ape = np.abs(err / actual)
+    hits = np.sign(predicted - last[:, None]) == np.sign(actual - last[:, None])
+    return pd.DataFrame({
+        "horizon":     np.arange(1, predicted.shape[1] + 1),
+        "origins":     len(predicted),
+        "rmse":        np.sqrt(np.mean(err ** 2, axis=0)),
+        "mape":        np.nanmean(np.where(np.isfinite(ape), ape, np.nan), axis=0) * 100,
+        "directional": hits.mean(axis=0) * 100,
+        "naive_rmse":  np.sqrt(np.mean((actual - last[:, None]) ** 2, axis=0)),
+    })
+
+
+def backtest(engine, scaler, frames, horizon=30, stride=1, chunk=1024, start=None):
+    """Walk-forward over ``frames`` (symbol → OHLCV); returns ``(per_horizon, per_symbol, info)``."""
+    preds, actuals, lasts, per_symbol = [], [], [], []
+    t0 = time.perf_counter()
+    for sym, data in frames.items():
+        opn   = data["Open"].dropna()
+        first = None if start is None else int(opn.index.searchsorted(pd.Timestamp(start)))
+        if len(origins_for(len(opn), horizon, stride, first=first)) == 0:
+            print(f"  {sym}: not enough history for a {horizon}-day backtest, skipped", file=sys.stderr)
+            continue
+        _, p, a, l = walk_forward(engine, scaler, opn.to_numpy(), horizon, stride, chunk, first)
+        preds.append(p)
+        actuals.append(a)
+        lasts.append(l)
+        m = horizon_metrics(p, a, l).iloc[-1]
+        per_symbol.append({"symbol": sym, "origins": len(p), f"rmse_{horizon}d": m["rmse"],
+                           f"mape_{horizon}d": m["mape"], f"directional_{horizon}d": m["directional"]})
+    elapsed = time.perf_counter() - t0
+    if not preds:
+        raise SystemExit("no symbol has enough history to backtest")
+
+    per_horizon = horizon_metrics(np.concatenate(preds), np.concatenate(actuals), np.concatenate(lasts))
+    origins     = int(per_horizon["origins"].iloc[0])
+    info = {
+        "symbols":       len(preds),
+        "origins":       origins,
+        "horizon":       horizon,
+        "model_calls":   sum(-(-len(p) // chunk) for p in preds) * horizon,
+        "seconds":       round(elapsed, 3),
+        "origins_per_s": round(origins / elapsed, 1) if elapsed > 0 else None,
+    }
+    return per_horizon, pd.DataFrame(per_symbol), info
+
+
+def main(argv=None):
+    import joblib
+
+    from batch_forecast import read_tickers
+    from data_store import DATA_DIR, OHLCVStore
+    from engine import load_engine
+    from market_data import PROVIDER, PROVIDERS, get_provider
+
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the recursive forecaster.")
+    parser.add_argument("symbols", nargs="*")
+    parser.add_argument("--tickers", help="file with one ticker per line")
+    parser.add_argument("--horizon", type=int, default=30)
+    parser.add_argument("--stride", type=int, default=1, help="use every k-th bar as an origin")
+    parser.add_argument("--start", help="first origin date (default: as early as the history allows)")
+    parser.add_argument("--chunk", type=int, default=1024, help="origins per batched model call")
+    parser.add_argument("--engine", choices=ENGINES, default="numpy")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--scaler", default=SCALER_PATH)
+    parser.add_argument("--provider", choices=tuple(PROVIDERS), default=PROVIDER)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--out", help="write the per-horizon table here (.csv, .json or .parquet)")
+    args = parser.parse_args(argv)
+
+    symbols = list(args.symbols) + (read_tickers(args.tickers) if args.tickers else [])
+    if not symbols:
+        parser.error("give at least one symbol or --tickers")
+    if args.horizon < 1 or args.stride < 1 or args.chunk < 1:
+        parser.error("--horizon, --stride and --chunk must be positive")
+
+    fetch  = get_provider(args.provider)
+    store  = OHLCVStore(os.path.join(args.data_dir, fetch.name), fetch=fetch)
+    frames = {sym: store.get(sym, history=None) for sym in symbols}
+    frames = {sym: data for sym, data in frames.items() if not data.empty}
+    engine = load_engine(args.engine, args.model)
+    scaler = joblib.load(args.scaler)
+
+    per_horizon, per_symbol, info = backtest(engine, scaler, frames, args.horizon, args.stride,
+                                             args.chunk, args.start)
+    with pd.option_context("display.float_format", "{:,.3f}".format, "display.width", 120):
+        print(per_horizon.to_string(index=False), file=sys.stderr)
+        if len(per_symbol) > 1:
+            print("\n" + per_symbol.to_string(index=False), file=sys.stderr)
+    if args.out:
+        ext = os.path.splitext(args.out)[1]
+        if ext == ".parquet":
+            per_horizon.to_parquet(args.out, index=False)
+        elif ext == ".json":
+            per_horizon.to_json(args.out, orient="records", indent=2)
+        else:
+            per_horizon.to_csv(args.out, index=False)
+    print(json.dumps(info))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Multi-interval OHLCV bars resampled from the finest stored granularity.
+
+    bars = BarStore(daily_store, intraday_store)   # intraday ingested at QL_BASE_INTERVAL
+    bars.bars("AAPL", "1h")                        # PriceColumns of hourly bars
+
+Two granularities are downloaded, each into its own ``OHLCVStore``:
+
+    intraday   ``QL_BASE_INTERVAL`` bars (5m by default), as far back as the
+               provider serves them (60 days from Yahoo)
+    daily      the ten-year daily history the app has always used
+
+Every other interval is resampled from one of them, never downloaded:
+15m / 30m / 1h from the intraday bars (any multiple of the base), 1wk from the
+daily bars.  1d itself comes straight from the daily store, because 60 days of
+intraday history could never fill a 100-bar daily window.
+
+Resampling is vectorized.  Each fine bar gets the start of its bucket, and the
+buckets are reduced with ``reduceat``: first Open, ``fmax`` High, ``fmin`` Low,
+last Close, summed Volume.  Intraday buckets are anchored at the session open
+(09:15, 10:15, … for NSE hourly bars), taken as the most common first-bar time
+over the stored days, so a day missing its opening bar keeps the same
+buckets.  Weeks start on Monday.  Every bar is labelled with the start of its
+bucket.
+
+Aggregates are cached per (symbol, interval) and kept up to date as fine bars
+arrive.  Every update re-aggregates the fine bars from the start of the last
+bucket, whether or not new ones arrived, since the store re-downloads (and
+may revise) the last fine bar.  The coarse bars that came from them are
+replaced and everything earlier is kept, so an update costs the new bars plus
+one bucket.  ``bars`` returns a copy taken under the store's lock, because
+updates rewrite the end of the cached buffers in place.
+
+``future_index`` lays forecast stamps on the same calendar: business days,
+and for intraday intervals the session hours found in the history.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from data_store import PriceColumns
+from market_data import INTERVAL_MINUTES, OHLCV
+
+
+BASE_INTERVAL      = os.environ.get("QL_BASE_INTERVAL", "5m")
+INTRADAY_MAX_AGE   = float(os.environ.get("QL_INTRADAY_MAX_AGE", 300))
+CALENDAR_INTERVALS = ("1d", "1wk")
+INTERVALS          = tuple(INTERVAL_MINUTES) + CALENDAR_INTERVALS
+
+_DAY = 86_400 * 10 ** 9
+
+
+# ─────────────────────────────────────────────────────────────────
+# RESAMPLING
+# ─────────────────────────────────────────────────────────────────
+def session_hours(stamps, step):
+    """``(open, close)`` of the trading session as nanoseconds after midnight.
+
+    The most common first-bar time and last-bar end over the days in
+    ``stamps``, so a day missing its opening bar (or a still-forming last
+    day) does not move them.  ``step`` is the bar length in nanoseconds.
+    """
+    stamps = np.asarray(stamps, dtype=np.int64)
+    days   = stamps // _DAY
+    first  = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+    last   = np.r_[first[1:], len(stamps)] - 1
+
+    def mode(values):
+        values, counts = np.unique(values, return_counts=True)
+        return int(values[np.argmax(counts)])
+
+    return mode(stamps[first] % _DAY), mode(stamps[last] % _DAY) + step
+
+
+def bucket_starts(stamps, interval, session_open=None):
+    """Start of the ``interval`` bucket of every sorted int64 nanosecond timestamp.
+
+    Intraday buckets count from ``session_open`` (nanoseconds after midnight,
+    by default the open found in ``stamps``).
+    """
+    stamps = np.asarray(stamps, dtype=np.int64)
+    days   = stamps // _DAY
+    if interval == "1d":
+        return days * _DAY
+    if interval == "1wk":
+        # 1970-01-01 was a Thursday; (days + 3) % 7 is the weekday with Monday = 0
+        return (days - (days + 3) % 7) * _DAY
+    step   = INTERVAL_MINUTES[interval] * 60 * 10 ** 9
+    if session_open is None:
+        session_open = session_hours(stamps, step)[0] if len(stamps) else 0
+    opens  = days * _DAY + session_open
+    return opens + (stamps - opens) // step * step
+
+
+def resample(index, columns, interval, session_open=None):
+    """Aggregate sorted bars to ``interval``; returns ``(labels, columns, bucket_ids)``.
+
+    ``columns`` maps OHLCV names to arrays aligned with ``index``.
+    ``bucket_ids`` gives, for every input bar, the position of its output bar.
+    """
+    stamps = np.asarray(index.values, dtype="datetime64[ns]").view(np.int64)
+    starts = bucket_starts(stamps, interval, session_open)
+    if not len(starts):
+        return starts, {c: np.empty(0) for c in columns}, starts
+    first = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    last  = np.r_[first[1:], len(starts)] - 1
+    out   = {}
+    for name, values in columns.items():
+        values = np.asarray(values, dtype=float)
+        if name == "Open":
+            out[name] = values[first]
+        elif name == "High":
+            out[name] = np.fmax.reduceat(values, first)
+        elif name == "Low":
+            out[name] = np.fmin.reduceat(values, first)
+        elif name == "Volume":
+            out[name] = np.add.reduceat(np.nan_to_num(values), first)
+        else:
+            out[name] = values[last]
+    ids = np.cumsum(np.r_[True, starts[1:] != starts[:-1]]) - 1
+    return starts[first], out, ids
+
+
+def future_index(index, periods, interval="1d", session=None):
+    """Timestamps for ``periods`` bars after the bars in ``index``.
+
+    Trading days for 1d, Mondays for 1wk.  Intraday bars follow the session
+    hours seen in ``index`` on weekdays, skipping nights and weekends; a caller
+    that already knows them (``session_hours``) passes ``session`` and then
+    only ``index[-1]`` is read.
+    """
+    last = index[-1]
+    if interval == "1d":
+        return pd.date_range(start=last + pd.Timedelta(days=1), periods=periods, freq="B")
+    if interval == "1wk":
+        return pd.date_range(start=last + pd.Timedelta(days=1), periods=periods, freq="W-MON")
+    step   = INTERVAL_MINUTES[interval] * 60 * 10 ** 9
+    if session is None:
+        session = session_hours(np.asarray(index.values, dtype="datetime64[ns]").view(np.int64), step)
+    slots  = np.arange(*session, step)
+    days   = pd.bdate_range(start=last.normalize(), periods=periods // len(slots) + 2)
+    grid   = (days.values.view(np.int64)[:, None] + slots[None, :]).ravel()
+    return pd.DatetimeIndex(grid[grid > last.value][:periods].view("datetime64[ns]"))
+
+
+# ─────────────────────────────────────────────────────────────────
+# CACHED AGGREGATES
+# ─────────────────────────────────────────────────────────────────
+class _Aggregate:
+    """One (symbol, interval) series of coarse bars in amortized-growth buffers."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.n        = 0
+        self.index    = np.empty(16, dtype=np.int64)
+        self.cols     = {}
+        self.restart  = None   # first fine timestamp still contributing to a forming bar
+        self.open     = None   # session open intraday buckets count from
+
+    def update(self, fine):
+        """Fold in ``fine`` bars; returns ``"full"`` or ``"incremental"``.
+
+        The last bucket is always re-aggregated, even when no new bar has
+        arrived: the store re-downloads the last fine bar, which may have been
+        revised since.
+        """
+        stamps = np.asarray(fine.index.values, dtype="datetime64[ns]").view(np.int64)
+        pos = 0
+        if self.restart is not None:
+            pos = int(np.searchsorted(stamps, self.restart))
+        if self.restart is None or pos == len(stamps) or stamps[pos] != self.restart:
+            # First use, or the fine history changed under the cached bars
+            self.n, pos, kind = 0, 0, "full"
+            if self.interval not in CALENDAR_INTERVALS and len(stamps):
+                self.open = session_hours(stamps, INTERVAL_MINUTES[self.interval] * 60 * 10 ** 9)[0]
+        else:
+            first  = bucket_starts(stamps[pos:pos + 1], self.interval, self.open)[0]
+            self.n = int(np.searchsorted(self.index[:self.n], first))
+            kind   = "incremental"
+
+        tail = fine.iloc[pos:]
+        labels, cols, ids = resample(tail.index, {c: tail[c] for c in tail.columns}, self.interval, self.open)
+        self._extend(labels, cols)
+        if len(stamps):
+            # Restart from the first fine bar of the last (possibly forming) bucket
+            self.restart = int(stamps[pos:][np.searchsorted(ids, ids[-1])])
+        return kind
+
+    def _extend(self, labels, cols):
+        need = self.n + len(labels)
+        if need > len(self.index) or not self.cols:
+            size = max(need, 2 * len(self.index))
+            grown = np.empty(size, dtype=np.int64)
+            grown[:self.n] = self.index[:self.n]
+            self.index = grown
+            for name in cols:
+                col = np.empty(size)
+                if name in self.cols:
+                    col[:self.n] = self.cols[name][:self.n]
+                self.cols[name] = col
+        self.index[self.n:need] = labels
+        for name, values in cols.items():
+            self.cols[name][self.n:need] = values
+        self.n = need
+
+    def view(self):
+        """A copy: the next ``update`` rewrites the tail of the buffers in place."""
+        index = pd.DatetimeIndex(self.index[:self.n].view("datetime64[ns]"), name="Date", copy=True)
+        return PriceColumns(index, {name: col[:self.n].copy() for name, col in self.cols.items()})
+
+
+# ─────────────────────────────────────────────────────────────────
+# STORE
+# ─────────────────────────────────────────────────────────────────
+class BarStore:
+    """Serves any interval in ``INTERVALS`` from the daily and intraday stores."""
+
+    def __init__(self, daily, intraday=None, base=BASE_INTERVAL, max_series=256):
+        if base not in INTERVAL_MINUTES:
+            raise ValueError(f"Unknown base interval '{base}', expected one of {tuple(INTERVAL_MINUTES)}")
+        self.daily       = daily
+        self.intraday    = intraday
+        self.base        = base
+        self.max_series  = max_series
+        self._aggs       = OrderedDict()
+        self._lock       = threading.Lock()
+        self.full        = 0
+        self.incremental = 0
+
+    def intervals(self):
+        """The intervals this store can serve."""
+        if self.intraday is None:
+            return CALENDAR_INTERVALS
+        step = INTERVAL_MINUTES[self.base]
+        return tuple(i for i, m in INTERVAL_MINUTES.items() if m % step == 0) + CALENDAR_INTERVALS
+
+    def _source(self, interval):
+        if interval in CALENDAR_INTERVALS:
+            return self.daily, "1d"
+        if interval not in self.intervals():
+            raise ValueError(f"Interval '{interval}' is not available, expected one of {self.intervals()}")
+        return self.intraday, self.base
+
+    def bars(self, symbol, interval="1d", refresh=False):
+        """``PriceColumns`` of ``interval`` bars for ``symbol`` (empty if unknown)."""
+        store, base = self._source(interval)
+        fine = store.columns(symbol, refresh=refresh) if base == "1d" else store.columns(symbol, None, refresh)
+        if interval == base or fine.empty:
+            return fine
+
+        key = (symbol.upper(), interval)
+        with self._lock:
+            agg = self._aggs.get(key)
+            if agg is None:
+                agg = self._aggs[key] = _Aggregate(interval)
+                while len(self._aggs) > self.max_series:
+                    self._aggs.popitem(last=False)
+            self._aggs.move_to_end(key)
+            kind = agg.update(fine)
+            setattr(self, kind, getattr(self, kind) + 1)
+            return agg.view()
+
+    def at(self, interval):
+        """A view with the ``columns(symbol, history, refresh)`` method of an ``OHLCVStore``."""
+        return IntervalView(self, interval)
+
+    def stats(self):
+        with self._lock:
+            return {"base": self.base, "series": len(self._aggs), "full": self.full,
+                    "incremental": self.incremental}
+
+
+class IntervalView:
+    """One interval of a ``BarStore``, usable wherever an ``OHLCVStore`` is read."""
+
+    def __init__(self, bars, interval):
+        self.bars     = bars
+        self.interval = interval
+
+    def columns(self, symbol, history=None, refresh=False):
+        return self.bars.bars(symbol, self.interval, refresh).window(history)
+
+
+def open_bar_store(provider, data_dir, daily=None, base=BASE_INTERVAL, max_age=INTRADAY_MAX_AGE):
+    """A ``BarStore`` over ``daily`` (or a new daily store) and an intraday store, cached per provider."""
+    from data_store import OHLCVStore
+    root = os.path.join(data_dir, provider.name)
+    if daily is None:
+        daily = OHLCVStore(root, fetch=provider)
+    intraday = OHLCVStore(os.path.join(root, base), fetch=provider.fetcher(base), max_age=max_age)
+    return BarStore(daily, intraday, base)
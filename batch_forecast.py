@@ -0,0 +1,255 @@
+"""
+Headless batch forecasting over a universe of tickers.
+
+    python batch_forecast.py tickers.txt --out forecasts.parquet --days 30
+
+Symbols are split into chunks and spread over a process pool.  Each worker
+opens its own ``OHLCVStore`` and ``ModelRegistry`` once (in the pool
+initializer), loads each model the registry (``--manifest``) maps its symbols
+to on first use, then fetches, scales and forecasts a chunk with one batched
+``forecast_symbols`` call per model.  Every finished chunk is written to
+``<out>.parts/`` straight away, so an interrupted run picks up where it left
+off when started again with the same arguments; ``--fresh`` discards the parts.
+Once every chunk is done the parts are merged into ``--out``: one row per symbol
+with the forecast path and the KPI metrics.
+"""
+import argparse
+import glob
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from engine import ENGINES, MODEL_PATH, SCALER_PATH
+from registry import DEFAULT, REGISTRY_PATH, read_manifest
+
+
+STATUS_OK   = "ok"
+
+# Per-process state, populated by ``_init_worker``
+_worker = {}
+
+
+# ─────────────────────────────────────────────────────────────────
+# WORKER
+# ─────────────────────────────────────────────────────────────────
+def _init_worker(engine_kind, models, routes, provider, data_dir):
+    from data_store import OHLCVStore
+    from market_data import get_provider
+    from registry import ModelRegistry
+
+    if engine_kind.startswith("keras"):
+        # One TensorFlow runtime per process (XLA and reduced-precision modes
+        # included); let the pool provide the parallelism
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(1)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    fetch = get_provider(provider)
+    _worker["kind"]     = engine_kind
+    _worker["registry"] = ModelRegistry(models, routes)
+    _worker["store"]    = OHLCVStore(os.path.join(data_dir, fetch.name), fetch=fetch)
+
+
+def _forecast_chunk(chunk_id, symbols, days):
+    """Fetch, scale and forecast one chunk; returns ``(chunk_id, rows)``."""
+    from forecast import forecast_symbols
+
+    started = pd.Timestamp.now(tz="UTC")
+    frames, rows = {}, []
+    for sym in symbols:
+        try:
+            data = _worker["store"].columns(sym)
+        except Exception as exc:
+            rows.append({"symbol": sym, "status": "error", "message": f"{type(exc).__name__}: {exc}"})
+            continue
+        if data.empty:
+            rows.append({"symbol": sym, "status": "skipped", "message": "no data"})
+            continue
+        frames[sym] = data
+
+    results, skipped, served = {}, {}, {}
+    # One batched forecast per model the chunk's symbols resolve to
+    for name, syms in _worker["registry"].group(frames).items():
+        try:
+            engine, scaler = _worker["registry"].assets_for(name, _worker["kind"])
+        except Exception as exc:
+            for sym in syms:
+                rows.append({"symbol": sym, "status": "error", "message": f"{type(exc).__name__}: {exc}"})
+            continue
+        res, skip = forecast_symbols(engine, scaler, {sym: frames[sym] for sym in syms}, days)
+        results.update(res)
+        skipped.update(skip)
+        served.update(dict.fromkeys(syms, name))
+    for sym, reason in skipped.items():
+        rows.append({"symbol": sym, "status": "skipped", "message": reason})
+    for sym, res in results.items():
+        last = frames[sym].index[-1]
+        rows.append({
+            "symbol":    sym,
+            "status":    STATUS_OK,
+            "message":   "",
+            "model":     served[sym],
+            "last_date": last,
+            "horizon":   days,
+            "forecast_dates": list(pd.bdate_range(start=last + pd.Timedelta(days=1), periods=days)),
+            **res,
+            "forecast":  [float(v) for v in res["forecast"]],
+        })
+    for row in rows:
+        row["computed_at"] = started
+    return chunk_id, rows
+
+
+# ─────────────────────────────────────────────────────────────────
+# RUN STATE
+# ─────────────────────────────────────────────────────────────────
+def read_tickers(path):
+    """One symbol per line (commas also accepted); ``#`` starts a comment."""
+    with open(path) as f:
+        text = "\n".join(line.split("#", 1)[0] for line in f)
+    return list(dict.fromkeys(t.strip().upper() for t in text.replace(",", "\n").split() if t.strip()))
+
+
+def _parts_dir(out):
+    return out + ".parts"
+
+
+def _models(args):
+    """``(models, routes)`` of the manifest, with ``--model`` / ``--scaler`` as the default pair."""
+    models, routes = read_manifest(args.manifest)
+    models[DEFAULT] = {**models[DEFAULT], "model": os.path.abspath(args.model), "scaler": os.path.abspath(args.scaler)}
+    return models, routes
+
+
+def _run_config(args):
+    models, routes = _models(args)
+    return {"days": args.days, "engine": args.engine, "models": models, "routes": routes,
+            "provider": args.provider, "data_dir": os.path.abspath(args.data_dir)}
+
+
+def _completed(parts_dir, config):
+    """Symbols already finished by an earlier run with the same configuration."""
+    manifest = os.path.join(parts_dir, "run.json")
+    if not os.path.exists(manifest):
+        return set()
+    with open(manifest) as f:
+        if json.load(f) != config:
+            raise SystemExit(f"{parts_dir} belongs to a run with different settings; pass --fresh to restart")
+    done = set()
+    for part in glob.glob(os.path.join(parts_dir, "part-*.parquet")):
+        table = pd.read_parquet(part, columns=["symbol", "status"])
+        # Errors (network, provider) are retried; skipped symbols would only skip again
+        done.update(table.loc[table["status"] != "error", "symbol"])
+    return done
+
+
+def _write_part(parts_dir, rows):
+    path = os.path.join(parts_dir, f"part-{time.time_ns()}.parquet")
+    tmp  = path + ".tmp"
+    pd.DataFrame(rows).to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def merge_parts(parts_dir, out):
+    """Combine every part into ``out``, keeping the latest row per symbol."""
+    parts = sorted(glob.glob(os.path.join(parts_dir, "part-*.parquet")))
+    if not parts:
+        return pd.DataFrame()
+    table = pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+    table = table.drop_duplicates("symbol", keep="last").sort_values("symbol").reset_index(drop=True)
+    tmp   = out + ".tmp"
+    table.to_parquet(tmp, index=False)
+    os.replace(tmp, out)
+    return table
+
+
+# ─────────────────────────────────────────────────────────────────
+# DRIVER
+# ─────────────────────────────────────────────────────────────────
+def run(args):
+    symbols   = read_tickers(args.tickers)
+    parts_dir = _parts_dir(args.out)
+    config    = _run_config(args)
+    if args.fresh and os.path.isdir(parts_dir):
+        for path in glob.glob(os.path.join(parts_dir, "*")):
+            os.remove(path)
+    os.makedirs(parts_dir, exist_ok=True)
+
+    done    = _completed(parts_dir, config)
+    pending = [s for s in symbols if s not in done]
+    with open(os.path.join(parts_dir, "run.json"), "w") as f:
+        json.dump(config, f)
+    print(f"{len(symbols)} symbols · {len(done & set(symbols))} already done · {len(pending)} to run "
+          f"· {args.workers} workers · chunks of {args.chunk}", file=sys.stderr)
+
+    # Each worker is single-threaded; BLAS / OpenMP must not oversubscribe the cores.
+    # Spawned children read these before importing NumPy.
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ.setdefault(var, "1")
+
+    chunks  = [pending[i:i + args.chunk] for i in range(0, len(pending), args.chunk)]
+    counts  = {}
+    t0      = time.perf_counter()
+    if chunks:
+        ctx = mp.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(chunks)), mp_context=ctx,
+                                 initializer=_init_worker,
+                                 initargs=(args.engine, config["models"], config["routes"], args.provider,
+                                           args.data_dir)) as pool:
+            futures  = [pool.submit(_forecast_chunk, i, chunk, args.days) for i, chunk in enumerate(chunks)]
+            finished = 0
+            for fut in as_completed(futures):
+                _, rows = fut.result()
+                _write_part(parts_dir, rows)
+                for row in rows:
+                    counts[row["status"]] = counts.get(row["status"], 0) + 1
+                finished += len(rows)
+                elapsed   = time.perf_counter() - t0
+                print(f"  {finished}/{len(pending)} symbols · {finished / elapsed:.1f} symbols/s", file=sys.stderr)
+    elapsed = time.perf_counter() - t0
+
+    table = merge_parts(parts_dir, args.out)
+    summary = {
+        "symbols":        len(symbols),
+        "resumed":        len(done & set(symbols)),
+        "processed":      len(pending),
+        **{status: n for status, n in sorted(counts.items())},
+        "seconds":        round(elapsed, 3),
+        "symbols_per_s":  round(len(pending) / elapsed, 2) if pending else None,
+        "workers":        args.workers,
+        "out":            args.out,
+        "rows":           len(table),
+    }
+    print(json.dumps(summary))
+    return summary
+
+
+def main(argv=None):
+    from market_data import PROVIDER, PROVIDERS
+    from data_store import DATA_DIR
+
+    parser = argparse.ArgumentParser(description="Forecast a list of tickers into one Parquet file.")
+    parser.add_argument("tickers", help="file with one ticker per line")
+    parser.add_argument("--out", default="forecasts.parquet")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--engine", choices=ENGINES, default="numpy")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--scaler", default=SCALER_PATH)
+    parser.add_argument("--manifest", default=REGISTRY_PATH, help="per-symbol models; --model/--scaler are the default")
+    parser.add_argument("--provider", choices=tuple(PROVIDERS), default=PROVIDER)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk", type=int, default=32, help="symbols per batched forecast")
+    parser.add_argument("--fresh", action="store_true", help="ignore results from an earlier run")
+    args = parser.parse_args(argv)
+    if args.days < 1 or args.workers < 1 or args.chunk < 1:
+        parser.error("--days, --workers and --chunk must be positive")
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Benchmarks for the end-to-end forecast path.
+
+    python bench.py --out bench.json
+    python bench.py --out after.json --compare bench.json
+
+Runs every stage of a single-symbol forecast against a 10-year synthetic price
+history (``SyntheticProvider``, so results never depend on the network) and the
+shipped ``lstm_model.h5`` / ``scaler.save``:
+
+    scale            scaler.transform over the full history
+    infer.<N>d       recursive predict loop for 7 / 30 / 60 days
+    direct.<N>d      one forward pass of the direct multi-horizon model
+    mc.<S>x30d       S Monte Carlo dropout paths of 30 days in one batch
+    inverse          scaler.inverse_transform of history + forecast
+    indicators       compute_indicators over the full history
+    figure.<name>    building each of the three Plotly figures
+    figure.<name>.json   serializing it, as st.plotly_chart does
+    live.indicators  folding one new bar into the indicator state
+    live.figure      appending one bar to the live chart (``extend_live_figure``)
+    telemetry.<off|on>.1k   1,000 empty spans with telemetry disabled / enabled
+
+Each benchmark runs ``--warmup`` untimed and ``--repeat`` timed iterations,
+reporting mean / p50 / p95 / min in milliseconds, plus peak traced memory
+from one extra run under ``tracemalloc``.  ``--compare`` prints the p50 change
+against an earlier JSON report.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from charts import candlestick_figure, extend_live_figure, forecast_figure, live_figure, technical_figure
+from engine import DIRECT_MODEL_PATH, ENGINES, MODEL_PATH, SCALER_PATH, load_engine
+from forecast import (DIRECT_HORIZON, N_STEPS, direct_forecast, forecast_metrics, mc_dropout_paths,
+                      recursive_forecast)
+from indicators import IndicatorState, compute_indicators
+from live import LIVE_SERIES, LIVE_WINDOW
+from market_data import SyntheticProvider
+from telemetry import Telemetry
+
+
+HORIZONS    = (7, 30, 60)
+MC_SAMPLES  = (50, 200)
+HISTORY     = 2520   # ~10 years of trading days
+
+
+def _spans(telemetry, n):
+    for _ in range(n):
+        with telemetry.span("bench"):
+            pass
+
+
+def _measure(fn, repeat, warmup):
+    for _ in range(warmup):
+        fn()
+    times = np.empty(repeat)
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times[i] = (time.perf_counter() - t0) * 1000
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "mean_ms":   round(float(times.mean()), 4),
+        "p50_ms":    round(float(np.percentile(times, 50)), 4),
+        "p95_ms":    round(float(np.percentile(times, 95)), 4),
+        "min_ms":    round(float(times.min()), 4),
+        "repeat":    repeat,
+        "peak_kib":  round(peak / 1024, 1),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_direct_engine(kind, path):
+    """The direct model, or an untrained one of the same shape when none is trained yet.
+
+    Latency does not depend on the weights, so the stand-in still measures
+    the cost of one multi-horizon forward pass.
+    """
+    if os.path.exists(path):
+        return load_engine(kind, path)
+    import tempfile
+    from train import build_model
+
+    tmp = os.path.join(tempfile.mkdtemp(), "direct_untrained.h5")
+    build_model(outputs=DIRECT_HORIZON).save(tmp)
+    print(f"{path} not found; timing an untrained direct model of the same shape", file=sys.stderr)
+    return load_engine(kind, tmp)
+
+
+def build_cases(engine, scaler, bars=HISTORY, days=30, direct=None):
+    """``{name: zero-arg callable}`` for every stage, on one synthetic symbol."""
+    data   = SyntheticProvider(bars=bars).generate("BENCH")
+    opn    = data[["Open"]].values
+    scaled = scaler.transform(opn)
+    window = scaled[-N_STEPS:].ravel()
+
+    forecast = recursive_forecast(engine, window, days)[0]
+    full     = scaler.inverse_transform(np.vstack((scaled, forecast.reshape(-1, 1))))
+    vals     = full[-days:].ravel()
+    metrics  = forecast_metrics(float(opn[-1, 0]), vals)
+    ind      = compute_indicators(data)
+    future   = pd.date_range(start=data.index[-1] + pd.Timedelta(days=1), periods=days, freq="B")
+    band     = metrics["volatility"] * 1.5
+    candles  = data.tail(120)
+
+    figures = {
+        "forecast":    lambda: forecast_figure(data.index, full[:len(data)].ravel(), future, vals,
+                                               vals + band, vals - band, metrics["predicted_price"], days),
+        "candlestick": lambda: candlestick_figure(candles, ind["ma20"][-len(candles):], ind["ma50"][-len(candles):],
+                                                  future, vals, days),
+        "technical":   lambda: technical_figure(data.index, ind["close"], ind["bb_upper"], ind["bb_lower"],
+                                                ind["bb_mid"], ind["rsi"]),
+    }
+
+    cases = {"scale": lambda: scaler.transform(opn)}
+    for h in HORIZONS:
+        cases[f"infer.{h}d"] = lambda h=h: recursive_forecast(engine, window, h)
+    if direct is not None:
+        for h in HORIZONS:
+            cases[f"direct.{h}d"] = lambda h=h: direct_forecast(direct, window, h)
+    for s in MC_SAMPLES:
+        cases[f"mc.{s}x{days}d"] = lambda s=s: mc_dropout_paths(engine, window, days, s, seed=0)
+    cases["inverse"]    = lambda: scaler.inverse_transform(np.vstack((scaled, forecast.reshape(-1, 1))))
+    cases["indicators"] = lambda: compute_indicators(data)
+    for name, build in figures.items():
+        fig = build()
+        cases[f"figure.{name}"]      = build
+        cases[f"figure.{name}.json"] = lambda fig=fig: fig.to_json()
+
+    # One bar arriving in live mode; neither step should grow with ``bars``
+    state    = IndicatorState.from_frame(data.iloc[:-1])
+    new_bar  = data.iloc[-1:]
+    live     = {"open": opn[-LIVE_WINDOW:, 0], **{k: ind[k][-LIVE_WINDOW:] for k in LIVE_SERIES}}
+    live_fig = live_figure(data.index[-LIVE_WINDOW:], live, future, vals)
+    last     = {k: v[-1:] for k, v in live.items()}
+    cases["live.indicators"] = lambda: state.append_frame(new_bar)
+    cases["live.figure"]     = lambda: extend_live_figure(live_fig, data.index[-1:], last, future, vals, LIVE_WINDOW)
+
+    # What instrumenting the path costs; the trace file is left out
+    off, on = Telemetry(enabled=False), Telemetry(enabled=True, trace_path=None)
+    cases["telemetry.off.1k"] = lambda: _spans(off, 1000)
+    cases["telemetry.on.1k"]  = lambda: _spans(on, 1000)
+    return cases
+
+
+def run(args):
+    engine = load_engine(args.engine, args.model)
+    scaler = joblib.load(args.scaler)
+    direct = None if args.no_direct else load_direct_engine(args.engine, args.direct_model)
+    cases  = build_cases(engine, scaler, bars=args.bars, direct=direct)
+    if args.only:
+        cases = {k: v for k, v in cases.items() if any(k.startswith(p) for p in args.only)}
+
+    results = {}
+    for name, fn in cases.items():
+        results[name] = _measure(fn, args.repeat, args.warmup)
+        r = results[name]
+        print(f"{name:<24} mean {r['mean_ms']:>9.3f}  p50 {r['p50_ms']:>9.3f}  p95 {r['p95_ms']:>9.3f} ms"
+              f"   peak {r['peak_kib']:>9.1f} KiB", file=sys.stderr)
+
+    return {
+        "commit":    _git_commit(),
+        "timestamp": pd.Timestamp.now(tz="UTC").isoformat(),
+        "engine":    args.engine,
+        "bars":      args.bars,
+        "python":    platform.python_version(),
+        "numpy":     np.__version__,
+        "machine":   f"{platform.system()} {platform.machine()} · {os.cpu_count()} cpus",
+        "results":   results,
+    }
+
+
+def compare(report, baseline):
+    print(f"\n{'benchmark':<24} {'before':>10} {'after':>10} {'change':>8}   (p50 ms; "
+          f"{baseline.get('commit')} → {report.get('commit')})")
+    for name, r in report["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"{name:<24} {'—':>10} {r['p50_ms']:>10.3f}")
+            continue
+        change = (r["p50_ms"] / old["p50_ms"] - 1) * 100 if old["p50_ms"] else 0.0
+        print(f"{name:<24} {old['p50_ms']:>10.3f} {r['p50_ms']:>10.3f} {change:>+7.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark each stage of the forecast path.")
+    parser.add_argument("--engine", choices=ENGINES, default="numpy")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--direct-model", default=DIRECT_MODEL_PATH)
+    parser.add_argument("--no-direct", action="store_true", help="skip the direct-strategy cases (needs TensorFlow "
+                                                                   "when no direct model is trained)")
+    parser.add_argument("--scaler", default=SCALER_PATH)
+    parser.add_argument("--bars", type=int, default=HISTORY)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--only", nargs="*", help="benchmark name prefixes to run")
+    parser.add_argument("--out", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", help="earlier JSON report to diff against")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    text   = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
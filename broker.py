@@ -0,0 +1,190 @@
+"""
+Micro-batching inference broker.
+
+Streamlit sessions share one engine.  Without coordination ten concurrent users
+issue ten interleaved batch-1 ``predict`` calls per forecast step.
+``InferenceBroker`` owns the engine on a single thread: callers submit their
+``(rows, 100, 1)`` inputs through a queue, the broker concatenates whatever is
+waiting into one batched ``predict`` and hands each caller back its own rows.
+
+The broker only lingers (up to ``max_wait`` seconds) for more requests once it
+has actually seen concurrent callers, so a lone session pays no extra latency.
+Requests that queue up while a batch is running are coalesced on the next call
+regardless of ``max_wait``.
+
+``InferenceBroker`` has the same ``predict`` / ``name`` / ``path`` / ``outputs`` surface as an
+engine, so it can be passed anywhere an engine is expected.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from telemetry import Histogram
+
+
+MAX_BATCH = int(os.environ.get("QL_BROKER_MAX_BATCH", 64))
+MAX_WAIT  = float(os.environ.get("QL_BROKER_MAX_WAIT_MS", 2)) / 1000
+
+
+class InferenceBroker:
+    def __init__(self, engine, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+        self.engine    = engine
+        self.max_batch = max_batch
+        self.max_wait  = max_wait
+        self._queue    = queue.Queue()
+        self._stop     = threading.Event()
+        self._closing  = threading.Lock()
+        self.calls     = 0
+        self.requests  = 0
+        self.rows      = 0
+        self.batch_rows     = Histogram((1, 2, 4, 8, 16, 32, 64, 128, 256))
+        self.batch_requests = Histogram((1, 2, 4, 8, 16, 32, 64))
+        self.queue_depth    = Histogram((0, 1, 2, 4, 8, 16, 32, 64))
+        self.wait_ms        = Histogram((0.1, 0.5, 1, 2, 5, 10, 25, 50, 100))
+        self._concurrent    = False
+        self._carry         = None
+        self._thread   = threading.Thread(target=self._run, name="inference-broker", daemon=True)
+        self._thread.start()
+
+    # Engine interface
+    @property
+    def name(self):
+        return self.engine.name
+
+    @property
+    def path(self):
+        return self.engine.path
+
+    @property
+    def outputs(self):
+        return self.engine.outputs
+
+    def predict(self, x):
+        """Blocking ``engine.predict`` that shares a batch with other callers."""
+        return self.submit(x).result()
+
+    def predict_stochastic(self, x, rng=None):
+        # Dropout samples cannot share a call with deterministic requests
+        return self.engine.predict_stochastic(x, rng)
+
+    def submit(self, x):
+        fut = Future()
+        x   = np.asarray(x, dtype=np.float32)
+        with self._closing:
+            if not self._stop.is_set():
+                self._queue.put((x, fut, time.perf_counter()))
+                return fut
+        # Closed (e.g. evicted from the model registry): serve on the caller's thread
+        fut.set_result(np.asarray(self.engine.predict(x)))
+        return fut
+
+    def close(self):
+        """Stop the broker thread; requests still queued, or submitted later, run unbatched."""
+        with self._closing:
+            self._stop.set()
+            self._queue.put(None)
+        self._thread.join()
+        pending = [self._carry] if self._carry is not None else []
+        self._carry = None
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                pending.append(item)
+        for x, fut, _ in pending:
+            try:
+                fut.set_result(np.asarray(self.engine.predict(x)))
+            except Exception as exc:
+                fut.set_exception(exc)
+
+    # Broker thread
+    def _collect(self):
+        """Block for one request, then gather more without exceeding ``max_batch`` rows."""
+        first, self._carry = self._carry, None
+        if first is None:
+            first = self._queue.get()
+        if first is None:
+            return []
+        self.queue_depth.observe(self._queue.qsize())
+        batch    = [first]
+        rows     = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+        while rows < self.max_batch:
+            try:
+                if self._concurrent:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._stop.set()
+                break
+            if rows + len(item[0]) > self.max_batch:
+                # Too big for this call; it leads the next one
+                self._carry = item
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if not batch:
+                break
+            now = time.perf_counter()
+            for _, _, t in batch:
+                self.wait_ms.observe((now - t) * 1000)
+            self._concurrent = len(batch) > 1
+            try:
+                inputs = batch[0][0] if len(batch) == 1 else np.concatenate([x for x, _, _ in batch])
+                out    = np.asarray(self.engine.predict(inputs))
+            except Exception as exc:
+                for _, fut, _ in batch:
+                    fut.set_exception(exc)
+                continue
+            self.calls    += 1
+            self.requests += len(batch)
+            self.rows     += len(inputs)
+            self.batch_rows.observe(len(inputs))
+            self.batch_requests.observe(len(batch))
+            start = 0
+            for x, fut, _ in batch:
+                fut.set_result(out[start:start + len(x)])
+                start += len(x)
+
+    def stats(self):
+        return {
+            "calls":          self.calls,
+            "requests":       self.requests,
+            "rows":           self.rows,
+            "queue_depth":    self._queue.qsize(),
+            "coalescing":     self.requests / self.calls if self.calls else 0.0,
+            "max_batch":      self.max_batch,
+            "max_wait_ms":    self.max_wait * 1000,
+            "batch_rows":     self.batch_rows.snapshot(),
+            "batch_requests": self.batch_requests.snapshot(),
+            "queue_depth_at_dequeue": self.queue_depth.snapshot(),
+            "wait_ms":        self.wait_ms.snapshot(),
+        }
+
+    def prometheus(self, prefix="quantumlens_broker"):
+        """Counters and histograms in Prometheus text exposition format."""
+        lines = []
+        for name in ("calls", "requests", "rows"):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {getattr(self, name)}")
+        lines.append(f"# TYPE {prefix}_queue_depth gauge")
+        lines.append(f"{prefix}_queue_depth {self._queue.qsize()}")
+        lines += self.batch_rows.prometheus(f"{prefix}_batch_rows")
+        lines += self.batch_requests.prometheus(f"{prefix}_batch_requests")
+        lines += self.queue_depth.prometheus(f"{prefix}_queue_depth_at_dequeue")
+        lines += self.wait_ms.prometheus(f"{prefix}_wait_ms")
+        return "\n".join(lines) + "\n"
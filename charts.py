@@ -0,0 +1,366 @@
+"""
+Plotly figure builders for the forecast, candlestick and technical tabs.
+
+Long daily series are thinned before they reach the browser:
+
+* ``lttb`` (largest-triangle-three-buckets) keeps the visual shape of a line
+  with far fewer points than the raw series.
+* ``view_indices`` keeps the selected view window at full resolution when it
+  fits in ``max_points`` and LTTB-samples it otherwise; history outside the
+  window gets only a coarse sample, which is enough for the range slider.
+  With no window (MAX) the most recent ``context_points`` bars stay at full
+  resolution and only the older history is sampled.
+* Long traces render with ``Scattergl`` and bands are built with
+  ``np.concatenate`` instead of Python list concatenation.
+
+The live chart is the exception: it only ever holds the last few hundred bars,
+and ``extend_live_figure`` appends each tick's new bars to it in place instead
+of rebuilding it.
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from telemetry import traced
+
+
+MAX_POINTS     = 1200
+CONTEXT_POINTS = 300
+
+VIEW_WINDOWS = {
+    "3M":  63,
+    "6M":  126,
+    "1Y":  252,
+    "2Y":  504,
+    "5Y":  1260,
+    "MAX": None,
+}
+
+_TICKFONT = dict(family="JetBrains Mono", size=8, color="#2a4060")
+
+
+# ─────────────────────────────────────────────────────────────────
+# DOWNSAMPLING
+# ─────────────────────────────────────────────────────────────────
+def lttb(x, y, n_out):
+    """Indices of the ``n_out`` points LTTB keeps from ``(x, y)``; NaNs are never chosen."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Bucket i covers [edges[i], edges[i + 1]) over the interior points 1 .. n-2
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(int)
+    fill  = np.nan_to_num(y, nan=np.nanmean(y) if np.isfinite(y).any() else 0.0)
+    valid = np.isfinite(y)
+
+    out    = np.empty(n_out, dtype=int)
+    out[0] = 0
+    out[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo    = hi
+        nhi    = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x  = x[nlo:nhi].mean()
+        avg_y  = fill[nlo:nhi].mean()
+        area   = np.abs((x[a] - avg_x) * (fill[lo:hi] - fill[a]) - (x[a] - x[lo:hi]) * (avg_y - fill[a]))
+        area[~valid[lo:hi]] = -1.0
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def view_indices(dates, y, window=None, max_points=MAX_POINTS, context_points=CONTEXT_POINTS):
+    """Row indices to plot: dense inside the last ``window`` bars, sparse before it.
+
+    Without a window (MAX) the last ``context_points`` bars stay dense and only
+    the older ones are LTTB-sampled into the rest of ``max_points``.
+    """
+    n = len(dates)
+    if n <= max_points and window is None:
+        return np.arange(n)
+    x     = np.asarray(dates.asi8 if isinstance(dates, pd.DatetimeIndex) else dates, dtype=float)
+    if window is None:
+        recent = n - min(context_points, max_points - 3)
+        older  = lttb(x[:recent + 1], y[:recent + 1], max_points - (n - recent) + 1)
+        return np.concatenate([older[:-1], np.arange(recent, n)])
+    start = max(0, n - window)
+
+    view = np.arange(start, n)
+    if len(view) > max_points:
+        view = start + lttb(x[start:], y[start:], max_points)
+    if start == 0:
+        return view
+    context = lttb(x[:start + 1], y[:start + 1], min(context_points, start + 1))
+    return np.concatenate([context[:-1], view])
+
+
+def _x_range(dates, future_dates, window):
+    if window is None or window >= len(dates):
+        return None
+    end = future_dates[-1] if future_dates is not None and len(future_dates) else dates[-1]
+    return [dates[-window], end]
+
+
+# ─────────────────────────────────────────────────────────────────
+# FIGURES
+# ─────────────────────────────────────────────────────────────────
+@traced("figure.forecast")
+def forecast_figure(dates, hist_y, future_dates, forecast_vals, band_upper, band_lower,
+                    predicted_price, forecast_days, window=None, max_points=MAX_POINTS,
+                    band_name='Confidence Band'):
+    idx = view_indices(dates, hist_y, window, max_points)
+
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(
+        x=dates[idx], y=hist_y[idx],
+        mode='lines', name='Historical',
+        line=dict(color='rgba(0,200,255,0.7)', width=1.5),
+        fill='tozeroy', fillcolor='rgba(0,200,255,0.03)',
+        hovertemplate='<b>%{x|%d %b %Y}</b><br>Open: ₹%{y:,.2f}<extra>Historical</extra>'
+    ))
+    fig.add_trace(go.Scatter(
+        x=np.concatenate([future_dates.values, future_dates.values[::-1]]),
+        y=np.concatenate([band_upper, band_lower[::-1]]),
+        fill='toself', fillcolor='rgba(0,255,136,0.05)',
+        line=dict(color='rgba(0,0,0,0)'),
+        name=band_name, hoverinfo='skip'
+    ))
+    fig.add_trace(go.Scatter(
+        x=future_dates, y=band_upper,
+        mode='lines', name='Upper Band',
+        line=dict(color='rgba(0,255,136,0.2)', width=1, dash='dot'),
+        hovertemplate='Upper: ₹%{y:,.2f}<extra></extra>'
+    ))
+    fig.add_trace(go.Scatter(
+        x=future_dates, y=band_lower,
+        mode='lines', name='Lower Band',
+        line=dict(color='rgba(255,51,102,0.2)', width=1, dash='dot'),
+        hovertemplate='Lower: ₹%{y:,.2f}<extra></extra>'
+    ))
+    fig.add_trace(go.Scatter(
+        x=dates[-1:].append(future_dates), y=np.concatenate([hist_y[-1:], forecast_vals]),
+        mode='lines', name='AI Forecast',
+        line=dict(color='#00ff88', width=2.5),
+        hovertemplate='<b>%{x|%d %b %Y}</b><br>Forecast: ₹%{y:,.2f}<extra>LSTM</extra>'
+    ))
+    fig.add_trace(go.Scatter(
+        x=future_dates, y=forecast_vals,
+        mode='markers', showlegend=False,
+        marker=dict(color='#00ff88', size=3.5, opacity=0.6),
+        hovertemplate='₹%{y:,.2f}<extra></extra>'
+    ))
+    fig.add_shape(type="line",
+        x0=str(dates[-1]), x1=str(dates[-1]),
+        y0=0, y1=1, yref='paper',
+        line=dict(color="#ffd700", width=1.5, dash="dash"))
+    fig.add_annotation(
+        x=str(dates[-1]), y=0.98, yref='paper',
+        text="◀ HISTORICAL  ┃  FORECAST ▶",
+        showarrow=False,
+        font=dict(family="JetBrains Mono", size=8, color="#ffd700"),
+        bgcolor="rgba(255,215,0,0.08)",
+        bordercolor="rgba(255,215,0,0.3)",
+        borderwidth=1, borderpad=5)
+    fig.add_shape(type="line",
+        x0=str(dates[0]), x1=str(future_dates[-1]),
+        y0=predicted_price, y1=predicted_price,
+        line=dict(color="rgba(0,255,136,0.3)", width=1, dash="dot"))
+    fig.add_annotation(
+        x=str(future_dates[-1]), y=predicted_price,
+        text=f" {forecast_days}D Target ₹{round(predicted_price,2):,.0f}",
+        showarrow=False, xanchor="right",
+        font=dict(family="JetBrains Mono", size=9, color="#00ff88"))
+    fig.update_layout(
+        template="plotly_dark",
+        paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
+        height=520, margin=dict(l=10, r=10, t=10, b=10),
+        hovermode="x unified",
+        legend=dict(orientation="h", x=0, y=1.06,
+            font=dict(family="JetBrains Mono", size=9, color="#6d8fa8"),
+            bgcolor="rgba(0,0,0,0)"),
+        xaxis=dict(showgrid=False, zeroline=False, type="date",
+            range=_x_range(dates, future_dates, window),
+            tickfont=_TICKFONT,
+            rangeslider=dict(visible=True, bgcolor="#060c14", bordercolor="#1a2d4a", thickness=0.04)),
+        yaxis=dict(showgrid=True, gridcolor="rgba(0,200,255,0.05)", zeroline=False,
+            tickfont=_TICKFONT, tickprefix="₹"),
+        hoverlabel=dict(bgcolor="#0e1a2e", bordercolor="#1a2d4a",
+            font=dict(family="JetBrains Mono", size=11, color="#e2f4ff"))
+    )
+    return fig
+
+
+@traced("figure.candlestick")
+def candlestick_figure(candle_data, ma20, ma50, future_dates, forecast_vals, forecast_days):
+    opn   = candle_data['Open'].values.ravel()
+    close = candle_data['Close'].values.ravel()
+
+    fig2 = make_subplots(rows=2, cols=1, shared_xaxes=True,
+        vertical_spacing=0.03, row_heights=[0.75, 0.25])
+
+    fig2.add_trace(go.Candlestick(
+        x=candle_data.index,
+        open=opn,
+        high=candle_data['High'].values.ravel(),
+        low=candle_data['Low'].values.ravel(),
+        close=close,
+        name='OHLC',
+        increasing_line_color='#00ff88', decreasing_line_color='#ff3366',
+        increasing_fillcolor='rgba(0,255,136,0.6)', decreasing_fillcolor='rgba(255,51,102,0.6)',
+    ), row=1, col=1)
+
+    fig2.add_trace(go.Scatter(x=candle_data.index, y=ma20,
+        mode='lines', name='MA(20)', line=dict(color='#ffd700', width=1.2)), row=1, col=1)
+
+    fig2.add_trace(go.Scatter(x=candle_data.index, y=ma50,
+        mode='lines', name='MA(50)', line=dict(color='#bf5fff', width=1.2)), row=1, col=1)
+
+    fig2.add_trace(go.Scatter(x=future_dates, y=forecast_vals,
+        mode='lines', name=f'{forecast_days}D Forecast',
+        line=dict(color='#00ff88', width=2, dash='dash')), row=1, col=1)
+
+    colors_vol = np.where(close >= opn, 'rgba(0,255,136,0.5)', 'rgba(255,51,102,0.5)')
+    fig2.add_trace(go.Bar(
+        x=candle_data.index, y=candle_data['Volume'].values.ravel(),
+        name='Volume', marker_color=colors_vol, showlegend=False), row=2, col=1)
+
+    fig2.update_layout(
+        template="plotly_dark",
+        paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
+        height=560, margin=dict(l=10, r=10, t=10, b=10), hovermode="x unified",
+        legend=dict(orientation="h", x=0, y=1.05,
+            font=dict(family="JetBrains Mono", size=9, color="#6d8fa8"), bgcolor="rgba(0,0,0,0)"),
+        xaxis=dict(showgrid=False, zeroline=False, rangeslider=dict(visible=False), tickfont=_TICKFONT),
+        xaxis2=dict(showgrid=False, zeroline=False, rangeslider=dict(visible=False), tickfont=_TICKFONT),
+        yaxis=dict(showgrid=True, gridcolor="rgba(0,200,255,0.05)", zeroline=False,
+            tickfont=_TICKFONT, tickprefix="₹"),
+        yaxis2=dict(showgrid=False, zeroline=False,
+            tickfont=dict(family="JetBrains Mono", size=7, color="#2a4060"))
+    )
+    return fig2
+
+
+@traced("figure.technical")
+def technical_figure(dates, close, bb_upper, bb_lower, bb_mid, rsi, window=None, max_points=MAX_POINTS):
+    # Bollinger traces share the close's sample so the band stays aligned with price
+    idx     = view_indices(dates, close, window, max_points)
+    rsi_idx = view_indices(dates, rsi, window, max_points)
+    x       = dates[idx]
+
+    fig3 = make_subplots(rows=2, cols=1, shared_xaxes=True,
+        vertical_spacing=0.05, subplot_titles=("Bollinger Bands (20, 2σ)", "RSI (14)"),
+        row_heights=[0.6, 0.4])
+
+    fig3.add_trace(go.Scattergl(
+        x=np.concatenate([x.values, x.values[::-1]]),
+        y=np.concatenate([bb_upper[idx], bb_lower[idx][::-1]]),
+        fill='toself', fillcolor='rgba(0,200,255,0.05)',
+        line=dict(color='rgba(0,0,0,0)'), name='BB Band', hoverinfo='skip'), row=1, col=1)
+    fig3.add_trace(go.Scattergl(x=x, y=close[idx],
+        mode='lines', name='Close', line=dict(color='rgba(0,200,255,0.8)', width=1.5)), row=1, col=1)
+    fig3.add_trace(go.Scattergl(x=x, y=bb_upper[idx],
+        mode='lines', name='BB Upper', line=dict(color='rgba(0,200,255,0.3)', width=1)), row=1, col=1)
+    fig3.add_trace(go.Scattergl(x=x, y=bb_lower[idx],
+        mode='lines', name='BB Lower', line=dict(color='rgba(255,51,102,0.3)', width=1)), row=1, col=1)
+    fig3.add_trace(go.Scattergl(x=x, y=bb_mid[idx],
+        mode='lines', name='BB Mid', line=dict(color='rgba(255,215,0,0.4)', width=1, dash='dot')), row=1, col=1)
+
+    fig3.add_trace(go.Scattergl(x=dates[rsi_idx], y=rsi[rsi_idx],
+        mode='lines', name='RSI(14)', line=dict(color='#ffd700', width=1.5),
+        fill='tozeroy', fillcolor='rgba(255,215,0,0.04)'), row=2, col=1)
+    fig3.add_shape(type='line', row=2, col=1,
+        x0=dates[0], x1=dates[-1], y0=70, y1=70,
+        line=dict(color='rgba(255,51,102,0.4)', width=1, dash='dash'))
+    fig3.add_shape(type='line', row=2, col=1,
+        x0=dates[0], x1=dates[-1], y0=30, y1=30,
+        line=dict(color='rgba(0,255,136,0.4)', width=1, dash='dash'))
+
+    x_range = _x_range(dates, None, window)
+    fig3.update_layout(
+        template="plotly_dark",
+        paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
+        height=560, margin=dict(l=10, r=10, t=30, b=10),
+        showlegend=False, hovermode="x unified",
+        font=dict(family="JetBrains Mono", size=9, color="#6d8fa8"),
+        xaxis=dict(showgrid=False, zeroline=False, range=x_range, tickfont=_TICKFONT),
+        xaxis2=dict(showgrid=False, zeroline=False, range=x_range, tickfont=_TICKFONT),
+        yaxis=dict(showgrid=True, gridcolor="rgba(0,200,255,0.04)", zeroline=False, tickfont=_TICKFONT),
+        yaxis2=dict(showgrid=True, gridcolor="rgba(0,200,255,0.04)", zeroline=False, tickfont=_TICKFONT)
+    )
+    return fig3
+
+
+# ─────────────────────────────────────────────────────────────────
+# LIVE
+# ─────────────────────────────────────────────────────────────────
+@traced("figure.live")
+def live_figure(dates, series, future_dates, forecast_vals):
+    """Rolling live chart: Open with MA / Bollinger overlays and the forecast, RSI below.
+
+    ``series`` maps ``open``, ``ma20``, ``ma50``, ``bb_upper``, ``bb_lower`` and
+    ``rsi`` to arrays aligned with ``dates``.  Traces are tagged with ``meta`` so
+    ``extend_live_figure`` can find them again.
+    """
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True,
+        vertical_spacing=0.04, row_heights=[0.72, 0.28])
+
+    fig.add_trace(go.Scatter(x=dates, y=series["bb_upper"], meta="bb_upper",
+        mode='lines', name='BB Upper', line=dict(color='rgba(0,200,255,0.25)', width=1)), row=1, col=1)
+    fig.add_trace(go.Scatter(x=dates, y=series["bb_lower"], meta="bb_lower",
+        mode='lines', name='BB Lower', line=dict(color='rgba(255,51,102,0.25)', width=1),
+        fill='tonexty', fillcolor='rgba(0,200,255,0.04)'), row=1, col=1)
+    fig.add_trace(go.Scatter(x=dates, y=series["open"], meta="open",
+        mode='lines', name='Open', line=dict(color='rgba(0,200,255,0.9)', width=1.6),
+        hovertemplate='<b>%{x|%d %b %Y %H:%M}</b><br>Open: ₹%{y:,.2f}<extra></extra>'), row=1, col=1)
+    fig.add_trace(go.Scatter(x=dates, y=series["ma20"], meta="ma20",
+        mode='lines', name='MA(20)', line=dict(color='#ffd700', width=1.1)), row=1, col=1)
+    fig.add_trace(go.Scatter(x=dates, y=series["ma50"], meta="ma50",
+        mode='lines', name='MA(50)', line=dict(color='#bf5fff', width=1.1)), row=1, col=1)
+    fig.add_trace(go.Scatter(x=dates[-1:].append(future_dates), y=np.concatenate([series["open"][-1:], forecast_vals]),
+        meta="forecast", mode='lines', name='AI Forecast', line=dict(color='#00ff88', width=2, dash='dash'),
+        hovertemplate='<b>%{x|%d %b %Y}</b><br>Forecast: ₹%{y:,.2f}<extra>LSTM</extra>'), row=1, col=1)
+
+    fig.add_trace(go.Scatter(x=dates, y=series["rsi"], meta="rsi",
+        mode='lines', name='RSI(14)', line=dict(color='#ffd700', width=1.3)), row=2, col=1)
+    fig.add_hline(y=70, row=2, col=1, line=dict(color='rgba(255,51,102,0.4)', width=1, dash='dash'))
+    fig.add_hline(y=30, row=2, col=1, line=dict(color='rgba(0,255,136,0.4)', width=1, dash='dash'))
+
+    fig.update_layout(
+        template="plotly_dark",
+        paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
+        height=560, margin=dict(l=10, r=10, t=10, b=10), hovermode="x unified",
+        # Keep the user's zoom and legend toggles across ticks
+        uirevision="live",
+        legend=dict(orientation="h", x=0, y=1.05,
+            font=dict(family="JetBrains Mono", size=9, color="#6d8fa8"), bgcolor="rgba(0,0,0,0)"),
+        xaxis=dict(showgrid=False, zeroline=False, tickfont=_TICKFONT),
+        xaxis2=dict(showgrid=False, zeroline=False, tickfont=_TICKFONT),
+        yaxis=dict(showgrid=True, gridcolor="rgba(0,200,255,0.05)", zeroline=False,
+            tickfont=_TICKFONT, tickprefix="₹"),
+        yaxis2=dict(showgrid=True, gridcolor="rgba(0,200,255,0.04)", zeroline=False,
+            range=[0, 100], tickfont=_TICKFONT)
+    )
+    return fig
+
+
+@traced("figure.live_extend")
+def extend_live_figure(fig, dates, series, future_dates, forecast_vals, keep):
+    """Append new bars to a ``live_figure`` in place and swap in the new forecast.
+
+    Each history trace keeps its last ``keep`` points, so the work per tick is
+    bounded by the live window, never by the length of the stored history.
+    """
+    x_new = np.asarray(dates.values)
+    with fig.batch_update():
+        for trace in fig.data:
+            if trace.meta in series:
+                trace.x = np.concatenate([np.asarray(trace.x), x_new])[-keep:]
+                trace.y = np.concatenate([np.asarray(trace.y, dtype=float), series[trace.meta]])[-keep:]
+            elif trace.meta == "forecast":
+                trace.x = np.concatenate([x_new[-1:], np.asarray(future_dates.values)])
+                trace.y = np.concatenate([series["open"][-1:], forecast_vals])
+    return fig
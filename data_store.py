@@ -0,0 +1,381 @@
+"""
+Local columnar cache of daily OHLCV candles.
+
+Each symbol lives in its own Parquet file under ``root``.  On ``get`` the store
+serves the local copy if it was refreshed within ``max_age`` seconds; otherwise
+it asks ``fetch`` (a market-data provider by default) only for the bars since
+the last stored date, merges them in and rewrites the file.  A refresh that
+brings nothing new leaves the copy stale and is retried after ``retry_after``
+seconds.  A small JSON index tracks refresh/access times so the
+least recently used symbols are evicted once the files exceed ``max_bytes``.
+Processes sharing ``root`` update the index under a ``flock`` and merge each
+other's entries; read-only hits only bump access times in memory, which are
+written out with the next update.
+
+Pre-seed a store with ``seed`` to run the app completely offline.
+
+Refreshes go through a ``SingleFlight``: concurrent ``get`` calls for the same
+stale symbol share one download, within the process and (via a lock file)
+with other processes using the same cache directory.
+
+Next to every Parquet file the store writes a ``.cols`` file: a 64-byte header,
+the int64 timestamps, then one contiguous float32 array per column.
+``columns`` maps it read-only, so every session and worker process reading a
+symbol shares the same page-cache pages instead of holding its own float64
+DataFrame; callers slice out the bars they need (the last 100 for inference,
+the visible range for a chart) and scale only those.  Rewrites go through
+``os.replace``, so an existing mapping keeps the old inode and stays valid.
+"""
+import json
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from market_data import OHLCV, get_provider, normalize_ohlcv
+from singleflight import SingleFlight
+from telemetry import count, span
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not POSIX
+    fcntl = None
+
+DATA_DIR     = os.environ.get("QL_DATA_DIR", "data_cache")
+MAX_AGE      = float(os.environ.get("QL_DATA_MAX_AGE", 6 * 3600))
+RETRY_AFTER  = float(os.environ.get("QL_DATA_RETRY_AFTER", 300))
+MAX_BYTES    = int(float(os.environ.get("QL_DATA_MAX_MB", 512)) * 1024 * 1024)
+HISTORY      = pd.DateOffset(years=10)
+_INDEX_FILE  = "_index.json"
+_TOUCH_SECS  = 60   # access times of read-only hits are persisted at most this often
+_COLS_MAGIC  = b"QLCOLS01"
+_COLS_HEADER = 64
+
+
+# ─────────────────────────────────────────────────────────────────
+# MEMORY-MAPPED COLUMNS
+# ─────────────────────────────────────────────────────────────────
+@contextmanager
+def _replacing(path):
+    """A private temp file next to ``path`` that replaces it on success.
+
+    Every writer gets its own name, so processes writing the same symbol never
+    clobber or rename each other's half-written files.
+    """
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=os.path.dirname(path) or ".")
+    os.close(fd)
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def write_columns(path, data):
+    """Write ``data`` as int64 nanosecond timestamps plus float32 column arrays."""
+    names = ",".join(data.columns).encode()
+    if len(names) > _COLS_HEADER - 24:
+        raise ValueError(f"too many columns for a .cols header: {list(data.columns)}")
+    index = np.asarray(data.index.values, dtype="datetime64[ns]").view(np.int64)
+    cols  = np.empty((len(data.columns), len(data)), dtype=np.float32)
+    for i, col in enumerate(data.columns):
+        cols[i] = data[col].to_numpy(dtype=np.float32)
+    header = _COLS_MAGIC + struct.pack("<qq", len(data), len(data.columns)) + names
+    with _replacing(path) as tmp:
+        with open(tmp, "wb") as f:
+            f.write(header.ljust(_COLS_HEADER, b"\0"))
+            f.write(index.tobytes())
+            f.write(cols.tobytes())
+
+
+class PriceColumns:
+    """Read-only OHLCV history as float32 column views over a memory map.
+
+    Slicing (``iloc[a:b]``, ``window``) returns another ``PriceColumns`` over the
+    same pages; nothing is copied until a caller converts a slice.
+    """
+
+    def __init__(self, index, columns):
+        self.index    = index
+        self._columns = columns
+
+    @classmethod
+    def open(cls, path):
+        buf = np.memmap(path, dtype=np.uint8, mode="r")
+        if len(buf) < _COLS_HEADER or bytes(buf[:8]) != _COLS_MAGIC:
+            raise ValueError(f"{path} is not a price-columns file")
+        n, k  = struct.unpack("<qq", bytes(buf[8:24]))
+        names = bytes(buf[24:_COLS_HEADER]).rstrip(b"\0").decode().split(",") if k else []
+        start = _COLS_HEADER + 8 * n
+        index = pd.DatetimeIndex(buf[_COLS_HEADER:start].view("datetime64[ns]"), name="Date")
+        cols  = buf[start:start + 4 * n * k].view(np.float32).reshape(k, n)
+        return cls(index, dict(zip(names, cols)))
+
+    @property
+    def columns(self):
+        return pd.Index(list(self._columns))
+
+    @property
+    def empty(self):
+        return len(self.index) == 0
+
+    @property
+    def nbytes(self):
+        return self.index.nbytes + sum(c.nbytes for c in self._columns.values())
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, col):
+        return self._columns[col]
+
+    @property
+    def iloc(self):
+        return _ILoc(self)
+
+    def window(self, history=None):
+        """The bars within ``history`` (a ``DateOffset``) of the last one."""
+        if history is None or self.empty:
+            return self
+        return self.iloc[int(self.index.searchsorted(self.index[-1] - history)):]
+
+    def tail(self, n):
+        """The last ``n`` bars as a small float64 DataFrame."""
+        return self.iloc[-n:].to_frame()
+
+    def to_frame(self):
+        return pd.DataFrame({c: v.astype("float64") for c, v in self._columns.items()}, index=self.index)
+
+
+class _ILoc:
+    def __init__(self, cols):
+        self.cols = cols
+
+    def __getitem__(self, rows):
+        if not isinstance(rows, slice):
+            raise TypeError("PriceColumns.iloc only supports slices")
+        return PriceColumns(self.cols.index[rows], {c: v[rows] for c, v in self.cols._columns.items()})
+
+
+class OHLCVStore:
+    def __init__(self, root=DATA_DIR, max_age=MAX_AGE, max_bytes=MAX_BYTES, fetch=None, flights=None,
+                 retry_after=RETRY_AFTER):
+        self.root      = root
+        self.max_age   = max_age
+        self.retry_after = retry_after
+        self._retry_at = {}
+        self.max_bytes = max_bytes
+        self.fetch     = fetch if fetch is not None else get_provider()
+        self._lock     = threading.RLock()
+        self._mapped   = {}
+        self.flights   = flights if flights is not None else SingleFlight()
+        os.makedirs(root, exist_ok=True)
+        self._index    = self._load_index()
+        self._saved    = time.time()
+
+    # ── paths & index ──
+    def path(self, symbol):
+        return os.path.join(self.root, re.sub(r"[^A-Za-z0-9._^-]", "_", symbol.upper()) + ".parquet")
+
+    def columns_path(self, symbol):
+        return os.path.splitext(self.path(symbol))[0] + ".cols"
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.root, _INDEX_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @contextmanager
+    def _index_locked(self):
+        """Hold the index for an update, across threads and processes sharing ``root``.
+
+        ``_index`` is merged with the file on entry and written back on exit,
+        so processes keep each other's entries instead of replacing them.
+        """
+        with self._lock, open(os.path.join(self.root, _INDEX_FILE + ".lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)   # released when the file closes
+            self._merge_index(self._load_index())
+            yield self._index
+            self._save_index()
+
+    def _merge_index(self, disk):
+        for sym, theirs in disk.items():
+            mine = self._index.get(sym)
+            if mine is None:
+                self._index[sym] = theirs
+            else:
+                newer = theirs if theirs["refreshed"] > mine["refreshed"] else mine
+                self._index[sym] = {**newer, "accessed": max(mine["accessed"], theirs["accessed"])}
+        for sym in [s for s in self._index if s not in disk]:
+            if not os.path.exists(self.path(sym)):
+                del self._index[sym]   # evicted by another process
+
+    def _save_index(self):
+        with _replacing(os.path.join(self.root, _INDEX_FILE)) as tmp:
+            with open(tmp, "w") as f:
+                json.dump(self._index, f)
+        self._saved = time.time()
+
+    # ── raw read / write ──
+    def read(self, symbol):
+        """The full stored history for ``symbol`` or ``None``; never fetches."""
+        path = self.path(symbol)
+        if not os.path.exists(path):
+            return None
+        return pd.read_parquet(path)
+
+    def write(self, symbol, data, refreshed_at=None):
+        data = normalize_ohlcv(data)
+        path = self.path(symbol)
+        with _replacing(path) as tmp:
+            data.to_parquet(tmp)
+        write_columns(self.columns_path(symbol), data)
+        with self._index_locked() as index:
+            now = time.time()
+            index[symbol.upper()] = {
+                "refreshed": now if refreshed_at is None else refreshed_at,
+                "accessed":  now,
+                "bytes":     os.path.getsize(path) + os.path.getsize(self.columns_path(symbol)),
+            }
+            self._evict(keep=symbol.upper())
+        return data
+
+    def seed(self, symbol, data, refreshed_at=None):
+        """Store ``data`` as if freshly downloaded (for offline runs and tests)."""
+        return self.write(symbol, data, refreshed_at)
+
+    # ── cache policy ──
+    def is_fresh(self, symbol):
+        """Whether the stored copy can be served without a download right now."""
+        entry = self._index.get(symbol.upper())
+        if entry is None:
+            return False
+        now = time.time()
+        return now - entry["refreshed"] < self.max_age or now < self._retry_at.get(symbol.upper(), 0)
+
+    def _evict(self, keep=None):
+        total = sum(e["bytes"] for e in self._index.values())
+        for sym, entry in sorted(self._index.items(), key=lambda kv: kv[1]["accessed"]):
+            if total <= self.max_bytes:
+                break
+            if sym == keep:
+                continue
+            for path in (self.path(sym), self.columns_path(sym)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._mapped.pop(sym, None)
+            total -= entry["bytes"]
+            del self._index[sym]
+
+    def _sync_index(self, symbol):
+        """Adopt ``symbol``'s index entry from disk if another process refreshed it since."""
+        disk = self._load_index().get(symbol.upper())
+        with self._lock:
+            mine = self._index.get(symbol.upper())
+            if disk is not None and (mine is None or disk["refreshed"] > mine["refreshed"]):
+                self._index[symbol.upper()] = disk
+
+    def _touch(self, symbol):
+        """Record a cache hit; the index file picks it up with the next write."""
+        with self._lock:
+            entry = self._index.get(symbol.upper())
+            if entry is None:
+                return
+            entry["accessed"] = time.time()
+            if time.time() - self._saved < _TOUCH_SECS:
+                return
+        with self._index_locked():
+            pass
+
+    # ── public API ──
+    def get(self, symbol, history=HISTORY, refresh=False):
+        """Last ``history`` of daily candles, refreshing only the missing tail.
+
+        ``refresh`` asks the provider for new bars even if the copy is fresh.
+        """
+        stored = self.read(symbol)
+        if stored is not None and self.is_fresh(symbol) and not refresh:
+            self._touch(symbol)
+            return self._window(stored, history)
+        merged = self.flights.do(("fetch", os.path.abspath(self.root), symbol.upper(), refresh),
+                                 self._refresh, symbol, refresh)
+        return self._window(merged, history)
+
+    def _refresh(self, symbol, force=False):
+        """Download what is missing for ``symbol``; one call per symbol at a time."""
+        self._sync_index(symbol)
+        stored = self.read(symbol)
+        if stored is not None and self.is_fresh(symbol) and not force:
+            # Another process refreshed it while this one waited for the lock
+            return stored
+        if stored is None or stored.empty:
+            fresh = self._download(symbol)
+            if fresh is None or fresh.empty:
+                return pd.DataFrame(columns=OHLCV)
+            return self.write(symbol, fresh)
+        # Re-request the last stored bar too: it may have been a partial session
+        fresh = self._download(symbol, start=stored.index[-1].strftime("%Y-%m-%d"))
+        if fresh is None or fresh.empty:
+            # Nothing new (provider down, or no session yet): still stale, so
+            # only hold off for a short while instead of a whole ``max_age``
+            self._retry_at[symbol.upper()] = time.time() + self.retry_after
+            self._touch(symbol)
+            return stored
+        self._retry_at.pop(symbol.upper(), None)
+        return self.write(symbol, pd.concat([stored, normalize_ohlcv(fresh)]))
+
+    def _download(self, symbol, start=None):
+        count("downloads")
+        with span("download", symbol=symbol, start=start or ""):
+            return self.fetch(symbol) if start is None else self.fetch(symbol, start=start)
+
+    def columns(self, symbol, history=HISTORY, refresh=False):
+        """Like ``get`` but returns memory-mapped ``PriceColumns`` (empty if unknown).
+
+        The mapping is opened once per file version and shared by every caller
+        in this process.
+        """
+        path = self.columns_path(symbol)
+        if self.is_fresh(symbol) and os.path.exists(path) and not refresh:
+            self._touch(symbol)
+        else:
+            data = self.get(symbol, history=None, refresh=refresh)
+            if data.empty:
+                return PriceColumns(pd.DatetimeIndex([], name="Date"), {})
+            if not os.path.exists(path):
+                # Parquet cached before the .cols format existed
+                write_columns(path, data)
+        st  = os.stat(path)
+        key = symbol.upper()
+        with self._lock:
+            version, cols = self._mapped.get(key, (None, None))
+            if version != (st.st_ino, st.st_mtime_ns):
+                cols = PriceColumns.open(path)
+                self._mapped[key] = ((st.st_ino, st.st_mtime_ns), cols)
+        return cols.window(history)
+
+    @staticmethod
+    def _window(data, history):
+        if history is None or data.empty:
+            return data
+        return data[data.index >= data.index[-1] - history]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "symbols": len(self._index),
+                "bytes":   sum(e["bytes"] for e in self._index.values()),
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,464 @@
+"""
+Inference engines for the recursive LSTM forecaster.
+
+Every engine exposes ``predict(x)`` taking a ``(batch, 100, 1)`` array of
+scaled prices and returning a ``(batch, outputs)`` array (1 for the recursive
+model, 60 for the direct one), so the forecast loop in
+``app.py`` does not care which one it is talking to.  ``predict_stochastic``
+is the same pass with dropout left on, for Monte Carlo uncertainty bands.
+
+``NumpyLSTM`` reads the weights straight out of the Keras HDF5 file and runs
+the forward pass in NumPy, without importing TensorFlow.  ``KerasEngine`` is
+the reference implementation and is what ``check_parity`` compares against.
+
+Opt-in modes trade exactness for speed; ``precision.py`` measures both
+against the float32 reference on real tickers:
+
+    keras-xla         float32 forward pass compiled with XLA (``jit_compile``)
+    keras-xla-fp16    float16 weights and math, XLA-compiled
+    keras-xla-bf16    bfloat16 weights and math, XLA-compiled
+    numpy-int8        int8 dynamic-range weights (symmetric, per output column);
+                      NumPy has no int8 GEMM, so they are dequantized at load
+                      and this mode shows the accuracy cost, not a speed-up
+"""
+import json
+import os
+import threading
+import time
+
+import h5py
+import numpy as np
+
+from telemetry import TELEMETRY, ROW_BUCKETS
+
+
+MODEL_PATH        = "lstm_model.h5"
+DIRECT_MODEL_PATH = "lstm_direct.h5"
+SCALER_PATH       = "scaler.save"
+KERAS_MODES       = {
+    "keras":          ("float32", False),
+    "keras-xla":      ("float32", True),
+    "keras-xla-fp16": ("float16", True),
+    "keras-xla-bf16": ("bfloat16", True),
+}
+ENGINES           = ("numpy", "numpy-int8") + tuple(KERAS_MODES)
+
+
+# ─────────────────────────────────────────────────────────────────
+# ACTIVATIONS (in-place, so the step loop never allocates)
+# ─────────────────────────────────────────────────────────────────
+def _sigmoid_(a):
+    # 0.5 * (1 + tanh(x / 2)) never overflows, unlike 1 / (1 + exp(-x))
+    a *= 0.5
+    np.tanh(a, out=a)
+    a += 1.0
+    a *= 0.5
+    return a
+
+
+def _hard_sigmoid_(a):
+    # Keras 2 legacy definition used by older checkpoints
+    a *= 0.2
+    a += 0.5
+    np.clip(a, 0.0, 1.0, out=a)
+    return a
+
+
+def _tanh_(a):
+    return np.tanh(a, out=a)
+
+
+_ACTIVATIONS = {
+    "sigmoid":      _sigmoid_,
+    "hard_sigmoid": _hard_sigmoid_,
+    "tanh":         _tanh_,
+}
+
+
+# ─────────────────────────────────────────────────────────────────
+# HDF5 WEIGHT LOADING
+# ─────────────────────────────────────────────────────────────────
+def _layer_weights(group):
+    """Collect ``{kernel, recurrent_kernel, bias}`` datasets below a layer group."""
+    found = {}
+
+    def visit(name, obj):
+        if isinstance(obj, h5py.Dataset):
+            key = name.rsplit("/", 1)[-1].split(":")[0]
+            found[key] = np.array(obj)
+
+    group.visititems(visit)
+    return found
+
+
+def read_h5_layers(path):
+    """Return ``[(class_name, config, weights), ...]`` in model order."""
+    with h5py.File(path, "r") as f:
+        cfg = f.attrs["model_config"]
+        cfg = json.loads(cfg.decode() if isinstance(cfg, bytes) else cfg)
+        weights_root = f["model_weights"] if "model_weights" in f else f
+        layers = []
+        for layer in cfg["config"]["layers"]:
+            name = layer["config"]["name"]
+            weights = _layer_weights(weights_root[name]) if name in weights_root else {}
+            layers.append((layer["class_name"], layer["config"], weights))
+    return layers
+
+
+def quantize_int8(w):
+    """Symmetric per-output-column int8 quantization: ``(q, scale)`` with ``w ≈ q * scale``."""
+    scale = np.abs(w).max(axis=0) / 127.0
+    scale[scale == 0] = 1.0
+    q = np.clip(np.round(w / scale), -127, 127).astype(np.int8)
+    return q, scale.astype(np.float32)
+
+
+def _dequantized(w):
+    q, scale = quantize_int8(w)
+    return q * scale
+
+
+# ─────────────────────────────────────────────────────────────────
+# ENGINES
+# ─────────────────────────────────────────────────────────────────
+def _predict_span(engine, x):
+    # One ``predict`` span per model call; its batch size goes to ``predict_batch_rows``
+    if TELEMETRY.enabled:
+        TELEMETRY.observe("predict_batch_rows", len(x), ROW_BUCKETS, engine=engine.name)
+    return TELEMETRY.span("predict", engine=engine.name, rows=len(x))
+
+
+class NumpyLSTM:
+    """Vectorized NumPy forward pass of the stacked LSTM → Dense model.
+
+    ``quantize="int8"`` rounds every kernel to int8 (biases stay float).
+    """
+
+    name = "numpy"
+
+    def __init__(self, path=MODEL_PATH, dtype=np.float32, quantize=None):
+        if quantize not in (None, "int8"):
+            raise ValueError(f"Unsupported quantization '{quantize}', expected 'int8'")
+        self.path  = path
+        self.dtype = np.dtype(dtype)
+        self.quantize = quantize
+        if quantize:
+            self.name = f"numpy-{quantize}"
+        self.lstm  = []
+        self.dense = []
+        for cls, cfg, w in read_h5_layers(path):
+            if quantize:
+                w = {k: _dequantized(v) if k.endswith("kernel") else v for k, v in w.items()}
+            if cls == "LSTM":
+                self.lstm.append(self._prepare_lstm(cfg, w))
+            elif cls == "Dense":
+                self.dense.append((w["kernel"].astype(self.dtype), w["bias"].astype(self.dtype)))
+            elif cls == "Dropout":
+                # Only used by predict_stochastic; inference mode is the identity
+                if self.lstm and not self.dense:
+                    self.lstm[-1]["dropout"] = float(cfg.get("rate", 0.0))
+            elif cls != "InputLayer":
+                raise ValueError(f"Unsupported layer type for NumPy engine: {cls}")
+        if not self.lstm or not self.dense:
+            raise ValueError(f"{path} is not an LSTM → Dense model")
+        # Scratch buffers are per thread: Streamlit sessions share one engine
+        self._local = threading.local()
+
+    def _prepare_lstm(self, cfg, w):
+        units = w["recurrent_kernel"].shape[0]
+        # Keras packs gates as [i, f, c, o]; reorder to [i, f, o, c] so the three
+        # sigmoid gates are one contiguous slice of the fused pre-activation.
+        order = np.concatenate([np.arange(0, 2 * units),
+                                np.arange(3 * units, 4 * units),
+                                np.arange(2 * units, 3 * units)])
+        bias = w.get("bias", np.zeros(4 * units))
+        return {
+            "units":            units,
+            "kernel":           np.ascontiguousarray(w["kernel"][:, order], dtype=self.dtype),
+            "recurrent":        np.ascontiguousarray(w["recurrent_kernel"][:, order], dtype=self.dtype),
+            "bias":             np.ascontiguousarray(bias[order], dtype=self.dtype),
+            "activation":       _ACTIVATIONS[cfg.get("activation", "tanh")],
+            "recurrent_activation": _ACTIVATIONS[cfg.get("recurrent_activation", "sigmoid")],
+            "return_sequences": cfg.get("return_sequences", False),
+            "dropout":          0.0,
+        }
+
+    def _scratch(self, layer_idx, batch, steps, units, sequences):
+        key  = (layer_idx, batch, steps)
+        bufs = self._local.__dict__.setdefault("buffers", {})
+        buf  = bufs.get(key)
+        if buf is None:
+            buf = {
+                "h":   np.empty((batch, units), dtype=self.dtype),
+                "c":   np.empty((batch, units), dtype=self.dtype),
+                "z":   np.empty((batch, 4 * units), dtype=self.dtype),
+                "tmp": np.empty((batch, units), dtype=self.dtype),
+                "seq": np.empty((batch, steps, units), dtype=self.dtype) if sequences else None,
+            }
+            bufs[key] = buf
+        return buf
+
+    def _run_lstm(self, idx, layer, x):
+        batch, steps, _ = x.shape
+        u     = layer["units"]
+        buf   = self._scratch(idx, batch, steps, u, layer["return_sequences"])
+        h, c, z, tmp, seq = buf["h"], buf["c"], buf["z"], buf["tmp"], buf["seq"]
+        act, rec_act = layer["activation"], layer["recurrent_activation"]
+
+        # Input contribution for every timestep in a single matmul
+        x_proj = x @ layer["kernel"]
+        x_proj += layer["bias"]
+
+        h.fill(0.0)
+        c.fill(0.0)
+        for t in range(steps):
+            np.matmul(h, layer["recurrent"], out=z)
+            z += x_proj[:, t]
+            rec_act(z[:, :3 * u])
+            act(z[:, 3 * u:])
+            # c = f * c + i * g
+            c *= z[:, u:2 * u]
+            np.multiply(z[:, :u], z[:, 3 * u:], out=tmp)
+            c += tmp
+            # h = o * act(c)
+            np.copyto(tmp, c)
+            act(tmp)
+            np.multiply(z[:, 2 * u:3 * u], tmp, out=h)
+            if seq is not None:
+                seq[:, t] = h
+        return seq if seq is not None else h
+
+    @property
+    def outputs(self):
+        return self.dense[-1][0].shape[1]
+
+    @property
+    def nbytes(self):
+        """Bytes held by the weight arrays (per-thread scratch buffers excluded)."""
+        arrays = [layer[k] for layer in self.lstm for k in ("kernel", "recurrent", "bias")]
+        return sum(a.nbytes for a in arrays) + sum(k.nbytes + b.nbytes for k, b in self.dense)
+
+    def predict(self, x):
+        with _predict_span(self, x):
+            out = np.asarray(x, dtype=self.dtype)
+            for idx, layer in enumerate(self.lstm):
+                out = self._run_lstm(idx, layer, out)
+            for kernel, bias in self.dense:
+                out = out @ kernel + bias
+            return out
+
+    def predict_stochastic(self, x, rng=None):
+        """Forward pass with the Dropout layers active (Monte Carlo dropout).
+
+        Every row draws its own masks, so a batch of identical inputs yields
+        independent samples.
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        out = np.asarray(x, dtype=self.dtype)
+        for idx, layer in enumerate(self.lstm):
+            out  = self._run_lstm(idx, layer, out)
+            rate = layer["dropout"]
+            if rate > 0:
+                # Inverted dropout, as Keras applies it in training mode
+                keep = rng.random(out.shape, dtype=np.float32) >= rate
+                out  = out * keep * self.dtype.type(1.0 / (1.0 - rate))
+        for kernel, bias in self.dense:
+            out = out @ kernel + bias
+        return out
+
+
+def _cast_model(model, dtype):
+    """Rebuild ``model`` with every layer's weights and math in ``dtype``."""
+    config = model.get_config()
+    for layer in config["layers"]:
+        if layer["class_name"] == "InputLayer":
+            continue
+        layer["config"]["dtype"] = dtype
+        # The weights are overwritten below, and the orthogonal initializer
+        # has no bfloat16 kernel
+        for key, value in layer["config"].items():
+            if key.endswith("_initializer") and value is not None:
+                layer["config"][key] = "zeros"
+    cast = type(model).from_config(config)
+    cast.set_weights(model.get_weights())
+    return cast
+
+
+_SHORT_DTYPES = {"float16": "fp16", "bfloat16": "bf16"}
+
+
+class KerasEngine:
+    """Reference engine; imports TensorFlow only when constructed.
+
+    With ``xla`` the forward pass is a ``tf.function(jit_compile=True)``.  XLA
+    compiles once per input shape, so batches are zero-padded up to the next
+    power of two to keep the broker's varying batch sizes to a few programs.
+    """
+
+    name = "keras"
+
+    def __init__(self, path=MODEL_PATH, precision="float32", xla=False):
+        import tensorflow as tf
+        from tensorflow.keras.models import load_model
+
+        self.path      = path
+        self.precision = precision
+        self.xla       = xla
+        self.name      = "-".join(["keras"] + (["xla"] if xla else []) +
+                                  ([_SHORT_DTYPES[precision]] if precision != "float32" else []))
+        model          = load_model(path)
+        self.model     = model if precision == "float32" else _cast_model(model, precision)
+        self._forward  = None
+        if xla or precision != "float32":
+            self._forward = tf.function(lambda t: self.model(t, training=False), jit_compile=xla)
+        self._stochastic = None
+
+    @property
+    def outputs(self):
+        return int(self.model.output_shape[-1])
+
+    @property
+    def nbytes(self):
+        """Bytes of weights at the cast precision; TensorFlow's own runtime is not counted."""
+        return self.model.count_params() * (4 if self.precision == "float32" else 2)
+
+    def predict(self, x):
+        with _predict_span(self, x):
+            x = np.asarray(x, dtype=np.float32)
+            if self._forward is None:
+                return self.model.predict(x, verbose=0)
+            n = len(x)
+            if self.xla:
+                padded = 1 << max(n - 1, 0).bit_length()
+                if padded != n:
+                    x = np.concatenate((x, np.zeros((padded - n,) + x.shape[1:], dtype=np.float32)))
+            return np.asarray(self._forward(x), dtype=np.float32)[:n]
+
+    def predict_stochastic(self, x, rng=None):
+        # ``rng`` is accepted for interface parity; TensorFlow draws its own masks
+        if self._stochastic is None:
+            import tensorflow as tf
+            self._stochastic = tf.function(lambda t: self.model(t, training=True), reduce_retracing=True)
+        return np.asarray(self._stochastic(np.asarray(x, dtype=np.float32)), dtype=np.float32)
+
+
+def load_engine(kind="numpy", path=MODEL_PATH):
+    if kind == "numpy":
+        return NumpyLSTM(path)
+    if kind == "numpy-int8":
+        return NumpyLSTM(path, quantize="int8")
+    if kind in KERAS_MODES:
+        precision, xla = KERAS_MODES[kind]
+        return KerasEngine(path, precision, xla)
+    raise ValueError(f"Unknown engine '{kind}', expected one of {ENGINES}")
+
+
+# ─────────────────────────────────────────────────────────────────
+# BACKGROUND LOADING
+# ─────────────────────────────────────────────────────────────────
+def warm_up(engine, batch_sizes=(1,), n_steps=100):
+    """Run throwaway inferences so graph tracing / buffer allocation happens now."""
+    for batch in batch_sizes:
+        engine.predict(np.zeros((batch, n_steps, 1), dtype=np.float32))
+
+
+def _rss():
+    """This process's resident set size in bytes (0 where ``/proc`` is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+# Loads run one at a time so each one's RSS growth is its own
+_LOAD_LOCK = threading.Lock()
+
+
+class EngineLoader:
+    """Loads an engine (plus any ``extras``) on a daemon thread, then warms it up.
+
+    ``status`` moves through ``loading`` → ``warming`` → ``ready`` (or
+    ``failed``) so a UI can render immediately and poll for readiness.
+    ``resident_bytes`` is how much the process grew over the load and warm-up:
+    the weights plus whatever the runtime built for them (TensorFlow graphs,
+    XLA executables), which ``engine.nbytes`` does not see.
+    """
+
+    def __init__(self, kind="numpy", path=MODEL_PATH, extras=None, warm_batches=(1,)):
+        self.kind         = kind
+        self.path         = path
+        self.status       = "loading"
+        self.engine       = None
+        self.extras       = {}
+        self.error        = None
+        self.timings      = {}
+        self.resident_bytes = 0
+        self._extra_fns   = extras or {}
+        self._warm        = warm_batches
+        self._done        = threading.Event()
+        self._thread      = threading.Thread(target=self._run, name=f"engine-loader-{kind}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            with _LOAD_LOCK:
+                if self.kind in KERAS_MODES:
+                    import tensorflow   # noqa: F401  the one-off runtime import is no model's cost
+                rss = _rss()
+                t0  = time.perf_counter()
+                self.engine = load_engine(self.kind, self.path)
+                grown = _rss() - rss
+                # Extras (the scaler) are left out: their first load mostly imports libraries
+                for name, fn in self._extra_fns.items():
+                    self.extras[name] = fn()
+                self.timings["load_ms"] = (time.perf_counter() - t0) * 1000
+
+                self.status = "warming"
+                rss = _rss()
+                t0  = time.perf_counter()
+                warm_up(self.engine, self._warm)
+                self.timings["warmup_ms"] = (time.perf_counter() - t0) * 1000
+                self.resident_bytes = max(0, grown + _rss() - rss)
+            self.status = "ready"
+        except Exception as exc:
+            self.error  = exc
+            self.status = "failed"
+        finally:
+            self._done.set()
+
+    @property
+    def ready(self):
+        return self.status == "ready"
+
+    def result(self, timeout=None):
+        """Block until loaded; re-raises any load failure."""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"{self.kind} engine still {self.status} after {timeout}s")
+        if self.error is not None:
+            raise self.error
+        return self.engine
+
+
+# ─────────────────────────────────────────────────────────────────
+# PARITY CHECK
+# ─────────────────────────────────────────────────────────────────
+def check_parity(engine, reference, batch=8, n_steps=100, seed=0):
+    """Max absolute difference between two engines on random scaled windows."""
+    rng = np.random.default_rng(seed)
+    x   = rng.random((batch, n_steps, 1), dtype=np.float32)
+    return float(np.max(np.abs(engine.predict(x) - reference.predict(x))))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare the NumPy engine against Keras.")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--tol", type=float, default=1e-5)
+    args = parser.parse_args()
+
+    diff = check_parity(NumpyLSTM(args.model), KerasEngine(args.model), batch=args.batch)
+    print(f"max |numpy - keras| = {diff:.3e}  (tolerance {args.tol:.0e})")
+    raise SystemExit(0 if diff <= args.tol else 1)
@@ -0,0 +1,165 @@
+"""
+Recursive LSTM forecasting over one or many symbols.
+
+The forecaster feeds its own output back in as the newest input value, so a
+``days``-long horizon always needs ``days`` model calls.  ``recursive_forecast``
+stacks the windows of every symbol into one ``(N, 100, 1)`` batch so those
+calls are shared: 200 symbols over 60 days cost 60 calls, not 12,000.
+
+``direct_forecast`` is the alternative strategy: a model trained to emit all
+60 days at once, so any horizon costs one call and errors do not compound.
+"""
+import numpy as np
+
+from telemetry import traced
+
+
+N_STEPS        = 100
+DIRECT_HORIZON = 60
+STRATEGIES     = ("recursive", "direct")
+
+
+@traced("forecast.recursive")
+def recursive_forecast(engine, windows, days, n_steps=N_STEPS):
+    """Advance scaled ``windows`` of shape ``(N, n_steps)`` by ``days`` steps.
+
+    Returns the scaled forecasts as an ``(N, days)`` array.
+    """
+    buf = _step_buffer(windows, days, n_steps)
+    for _ in _advance(engine.predict, buf, days, n_steps):
+        pass
+    return buf[:, n_steps:]
+
+
+@traced("forecast.direct")
+def direct_forecast(engine, windows, days, n_steps=N_STEPS):
+    """One forward pass of a multi-output model; returns the first ``days`` outputs as ``(N, days)``."""
+    if days > engine.outputs:
+        raise ValueError(f"direct model predicts {engine.outputs} days, asked for {days}")
+    windows = np.asarray(windows, dtype=np.float32)
+    if windows.ndim == 1:
+        windows = windows[None, :]
+    out = np.asarray(engine.predict(windows[:, -n_steps:, None]))
+    return out[:, :days]
+
+
+def iter_recursive_forecast(engine, windows, days, n_steps=N_STEPS):
+    """Like ``recursive_forecast`` but yields each step's ``(N,)`` scaled values
+    as soon as the model produces them, so a caller can stream day 1 first."""
+    buf = _step_buffer(windows, days, n_steps)
+    for i in _advance(engine.predict, buf, days, n_steps):
+        yield buf[:, n_steps + i].copy()
+
+
+def _step_buffer(windows, days, n_steps):
+    windows = np.asarray(windows, dtype=np.float32)
+    if windows.ndim == 1:
+        windows = windows[None, :]
+    buf = np.empty((windows.shape[0], n_steps + days), dtype=np.float32)
+    buf[:, :n_steps] = windows[:, -n_steps:]
+    return buf
+
+
+def _advance(predict, buf, days, n_steps):
+    n = buf.shape[0]
+    for i in range(days):
+        x_input = buf[:, i:i + n_steps, None]
+        buf[:, n_steps + i] = np.asarray(predict(x_input)).reshape(n)
+        yield i
+
+
+def mc_dropout_paths(engine, window, days, samples=200, seed=None, n_steps=N_STEPS, strategy="recursive"):
+    """``samples`` stochastic forecast paths of one scaled window, as ``(samples, days)``.
+
+    The samples share the batch dimension, so they cost ``days`` model calls in
+    total (one for the direct strategy), the same as a single deterministic path.
+    """
+    window = np.asarray(window, dtype=np.float32).ravel()
+    tiled  = np.broadcast_to(window[-n_steps:], (samples, n_steps))
+    rng    = np.random.default_rng(seed)
+    if strategy == "direct":
+        return np.asarray(engine.predict_stochastic(tiled[:, :, None], rng))[:, :days]
+    buf    = _step_buffer(tiled, days, n_steps)
+    for _ in _advance(lambda x: engine.predict_stochastic(x, rng), buf, days, n_steps):
+        pass
+    return buf[:, n_steps:]
+
+
+def percentile_bands(paths, percentiles=(5, 50, 95)):
+    """``{p: (days,) array}`` of per-day percentiles across sampled price ``paths``."""
+    values = np.percentile(paths, percentiles, axis=0)
+    return dict(zip(percentiles, values))
+
+
+def band_percentiles(coverage):
+    """Lower / upper percentiles of a central ``coverage``% interval (90 → 5, 95)."""
+    tail = (100 - coverage) / 2
+    return tail, 100 - tail
+
+
+def forecast_metrics(latest_price, forecast_vals):
+    """The derived numbers shown on the KPI cards for one forecast path."""
+    forecast_vals   = np.asarray(forecast_vals, dtype=float).ravel()
+    predicted_price = float(forecast_vals[-1])
+    price_change    = predicted_price - latest_price
+    return {
+        "latest_price":    float(latest_price),
+        "predicted_price": predicted_price,
+        "price_change":    price_change,
+        "pct_change":      (price_change / latest_price) * 100,
+        "is_bullish":      price_change >= 0,
+        "peak_price":      float(forecast_vals.max()),
+        "trough_price":    float(forecast_vals.min()),
+        "volatility":      float(np.std(forecast_vals)),
+        "momentum":        float(np.mean(np.diff(forecast_vals))) if len(forecast_vals) > 1 else 0.0,
+    }
+
+
+def valid_tail(values, n):
+    """The last ``n`` non-NaN values as float64; only that slice is copied when it has no gaps."""
+    values = np.asarray(values)
+    tail   = values[-n:]
+    if len(tail) == n and not np.isnan(tail).any():
+        return tail.astype(float)
+    return values[~np.isnan(values)][-n:].astype(float)
+
+
+def forecast_symbols(engine, scaler, frames, days, cache=None, n_steps=N_STEPS, strategy="recursive", interval="1d"):
+    """Forecast every symbol in ``frames`` (symbol → OHLCV DataFrame or ``PriceColumns``) together.
+
+    Returns ``(results, skipped)`` where ``results`` maps symbol to a dict with
+    the ``forecast`` price array plus ``forecast_metrics`` and ``skipped`` maps
+    symbol to the reason it could not be forecast.  With a ``ForecastCache``
+    only the symbols (and steps) it has not seen are computed.  The ``direct``
+    strategy is a single forward pass and bypasses the cache.  ``interval``
+    only keeps cached forecasts of different bar sizes apart; ``days`` counts bars.
+    """
+    symbols, windows, latest, last_ts, skipped = [], [], [], [], {}
+    for symbol, data in frames.items():
+        opn = valid_tail(data["Open"], n_steps)
+        if len(opn) < n_steps:
+            skipped[symbol] = f"only {len(opn)} bars, need {n_steps}"
+            continue
+        symbols.append(symbol)
+        windows.append(scaler.transform(opn.reshape(-1, 1)).ravel())
+        latest.append(float(opn[-1]))
+        last_ts.append(data.index[-1])
+
+    results = {}
+    if not symbols:
+        return results, skipped
+
+    if strategy == "direct":
+        scaled = direct_forecast(engine, np.stack(windows), days, n_steps)
+    elif cache is None:
+        scaled = recursive_forecast(engine, np.stack(windows), days, n_steps)
+    else:
+        from forecast_cache import engine_fingerprint, forecast_key, scaler_fingerprint
+        model_fp, scaler_fp = engine_fingerprint(engine), scaler_fingerprint(scaler)
+        keys   = [forecast_key(sym, ts, model_fp, scaler_fp, interval) for sym, ts in zip(symbols, last_ts)]
+        scaled = cache.forecast_many(engine, keys, np.stack(windows), days)
+    prices = scaler.inverse_transform(scaled.reshape(-1, 1)).reshape(scaled.shape)
+    for symbol, price0, path in zip(symbols, latest, prices):
+        results[symbol] = {"forecast": path, **forecast_metrics(price0, path)}
+    return results, skipped
+
@@ -0,0 +1,182 @@
+"""
+In-memory cache of recursive forecasts.
+
+A recursive forecast is fully determined by its input window and the model, and
+a shorter horizon is always a strict prefix of a longer one.  Entries are keyed
+by ``(symbol, last bar timestamp, model fingerprint, scaler fingerprint)`` and
+hold the longest scaled path computed so far (input window + forecast):
+
+    shorter horizon  → slice of the stored path          (hit)
+    longer horizon   → resume from the stored path's tail (partial)
+    unknown key      → full recursive forecast            (miss)
+
+Entries are evicted least-recently-used once ``max_entries`` is exceeded.
+
+Misses are computed through a ``SingleFlight`` keyed by ``(key, days)``, so
+sessions (or processes) asking for the same forecast at the same moment wait
+for one recursive loop instead of each running their own.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from forecast import N_STEPS, recursive_forecast
+from singleflight import SingleFlight
+
+
+_FILE_HASHES = {}
+
+
+def file_fingerprint(path):
+    """Content hash of a model file, memoized on (path, size, mtime)."""
+    st  = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if key not in _FILE_HASHES:
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        _FILE_HASHES[key] = h.hexdigest()[:16]
+    return _FILE_HASHES[key]
+
+
+def engine_fingerprint(engine):
+    """Model fingerprint: the weights file plus the engine that executes it."""
+    return f"{engine.name}:{file_fingerprint(engine.path)}"
+
+
+def scaler_fingerprint(scaler):
+    h = hashlib.sha1()
+    for attr in ("scale_", "min_"):
+        h.update(np.ascontiguousarray(getattr(scaler, attr), dtype=np.float64).tobytes())
+    return h.hexdigest()[:16]
+
+
+def forecast_key(symbol, last_ts, model_fp, scaler_fp, interval="1d"):
+    return (symbol.upper(), interval, str(last_ts), model_fp, scaler_fp)
+
+
+class ForecastCache:
+    def __init__(self, max_entries=512, n_steps=N_STEPS, flights=None):
+        self.max_entries = max_entries
+        self.n_steps     = n_steps
+        self.flights     = flights if flights is not None else SingleFlight(share=True)
+        self._entries    = OrderedDict()
+        self._lock       = threading.Lock()
+        self.hits        = 0
+        self.partial     = 0
+        self.misses      = 0
+        self.evictions   = 0
+        self.steps_saved = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, key):
+        path = self._entries.get(key)
+        if path is not None:
+            self._entries.move_to_end(key)
+        return path
+
+    def _put(self, key, path):
+        old = self._entries.get(key)
+        if old is None or len(path) > len(old):
+            self._entries[key] = path
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def peek(self, key, days):
+        """Cached scaled forecast of length ``days`` or ``None``; never computes."""
+        with self._lock:
+            path = self._get(key)
+            if path is None or len(path) - self.n_steps < days:
+                return None
+            self.hits += 1
+            self.steps_saved += days
+            return path[self.n_steps:self.n_steps + days].copy()
+
+    def put(self, key, window, forecast):
+        """Store a scaled forecast computed elsewhere (e.g. streamed step by step)."""
+        path = np.concatenate([np.asarray(window, dtype=np.float32)[-self.n_steps:],
+                               np.asarray(forecast, dtype=np.float32).ravel()])
+        with self._lock:
+            self._put(key, path)
+
+    def forecast(self, engine, key, window, days):
+        """Scaled ``(days,)`` forecast for one window, reusing any cached prefix."""
+        return self.forecast_many(engine, [key], np.asarray(window)[None, :], days)[0]
+
+    def forecast_many(self, engine, keys, windows, days):
+        """Scaled ``(N, days)`` forecasts; all misses advance together in one batch."""
+        windows = np.asarray(windows, dtype=np.float32)
+        out     = np.empty((len(keys), days), dtype=np.float32)
+        pending = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                path = self._get(key)
+                have = 0 if path is None else len(path) - self.n_steps
+                if have >= days:
+                    self.hits += 1
+                    self.steps_saved += days
+                    out[i] = path[self.n_steps:self.n_steps + days]
+                    continue
+                if path is None:
+                    self.misses += 1
+                    path = windows[i, -self.n_steps:].copy()
+                else:
+                    self.partial += 1
+                    self.steps_saved += have
+                pending.append((i, key, path, days - have))
+
+        if not pending:
+            return out
+
+        todo = {("forecast", key, days): (key, path, need) for _, key, path, need in pending}
+
+        def compute(flight_keys):
+            items = [todo[k] for k in flight_keys]
+            seeds = np.stack([path[-self.n_steps:] for _, path, _ in items])
+            ahead = recursive_forecast(engine, seeds, max(need for _, _, need in items), self.n_steps)
+            return [np.concatenate([path, ahead[row]]) for row, (_, path, _) in enumerate(items)]
+
+        paths = self.flights.do_many([("forecast", key, days) for _, key, _, _ in pending], compute)
+        with self._lock:
+            for (i, key, _, _), full in zip(pending, paths):
+                self._put(key, full)
+                out[i] = full[self.n_steps:self.n_steps + days]
+        return out
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.partial + self.misses
+            return {
+                "entries":     len(self._entries),
+                "max_entries": self.max_entries,
+                "hits":        self.hits,
+                "partial":     self.partial,
+                "misses":      self.misses,
+                "evictions":   self.evictions,
+                "steps_saved": self.steps_saved,
+                "hit_ratio":   (self.hits + self.partial) / lookups if lookups else 0.0,
+                "coalesced":   self.flights.coalesced + self.flights.coalesced_remote,
+            }
+
+    def prometheus(self, prefix="quantumlens_forecast_cache"):
+        """Counters in Prometheus text exposition format."""
+        s = self.stats()
+        lines = []
+        for name, kind in (("hits", "counter"), ("partial", "counter"), ("misses", "counter"),
+                           ("evictions", "counter"), ("steps_saved", "counter"), ("entries", "gauge")):
+            suffix = "_total" if kind == "counter" else ""
+            lines.append(f"# TYPE {prefix}_{name}{suffix} {kind}")
+            lines.append(f"{prefix}_{name}{suffix} {s[name]}")
+        return "\n".join(lines) + "\n"
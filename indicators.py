@@ -0,0 +1,323 @@
+"""
+Vectorized technical indicators with incremental per-symbol state.
+
+``IndicatorEngine.get(symbol, data)`` returns the same numbers the app used to
+build with separate pandas rolling passes (RSI(14), Bollinger(20, 2σ),
+MA(20)/MA(50), EMA(12/26) MACD, 52-week high/low, 30-day average volume), but
+computes them in one NumPy pass and keeps per-symbol state.  When ``data`` extends
+the previously seen series only the new bars are processed:
+
+    rolling windows   recomputed over the last ``window - 1 + new`` values
+    EMA(12/26)        continued from the stored EMA value
+    52w high / low    monotonic deques of (position, value)
+
+A refresh always re-downloads the last stored bar (a partial session, or a
+forming intraday bar), so unless its OHLCV is unchanged that bar is dropped
+from the state (``drop_last``) and folded in again with the new ones.
+
+RSI uses simple 14-bar averages, as the app always has, not Wilder smoothing.
+Once the history window has slid forward, the first bars of each series keep
+their warmed-up values where a fresh pandas pass would show leading NaNs.
+Nothing here imports Streamlit.
+"""
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+from telemetry import traced
+
+
+RSI_N    = 14
+BB_N     = 20
+BB_K     = 2.0
+MA_FAST  = 20
+MA_SLOW  = 50
+EMA_FAST = 12
+EMA_SLOW = 26
+YEAR_N   = 252
+VOL_N    = 30
+
+# Enough history to recompute any rolling window after appending bars
+_TAIL = max(RSI_N + 1, BB_N, MA_SLOW, VOL_N)
+
+
+# ─────────────────────────────────────────────────────────────────
+# KERNELS
+# ─────────────────────────────────────────────────────────────────
+def rolling_mean(x, n):
+    """Trailing mean, NaN until ``n`` values are available (pandas ``rolling(n).mean()``)."""
+    out = np.full(len(x), np.nan)
+    if len(x) >= n:
+        out[n - 1:] = sliding_window_view(x, n).mean(axis=1)
+    return out
+
+
+def rolling_std(x, n):
+    """Trailing sample std, ddof=1 (pandas ``rolling(n).std()``)."""
+    out = np.full(len(x), np.nan)
+    if len(x) >= n:
+        out[n - 1:] = sliding_window_view(x, n).std(axis=1, ddof=1)
+    return out
+
+
+def ema(x, span, prev=None):
+    """``ewm(span, adjust=False).mean()``, optionally continuing from ``prev``."""
+    alpha = 2.0 / (span + 1)
+    if len(x) == 0:
+        return np.empty(0)
+    seed = x[0] if prev is None else prev
+    return lfilter([alpha], [1.0, alpha - 1.0], x, zi=[(1.0 - alpha) * seed])[0]
+
+
+def _rsi_series(close):
+    """RSI from simple 14-bar mean gain / loss; NaN for the first 14 bars."""
+    delta = np.diff(close)
+    gain  = rolling_mean(np.clip(delta, 0, None), RSI_N)
+    loss  = rolling_mean(np.clip(-delta, 0, None), RSI_N)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + gain / loss)
+    return np.r_[np.nan, rsi], gain, loss
+
+
+class _Series:
+    """Append-only buffer with amortized O(1) growth."""
+
+    def __init__(self, values, dtype=float):
+        values   = np.asarray(values, dtype=dtype)
+        self.buf = np.empty(max(16, 2 * len(values)), dtype=dtype)
+        self.n   = len(values)
+        self.buf[:self.n] = values
+
+    def truncate(self, n):
+        self.n = min(self.n, n)
+
+    def extend(self, values):
+        need = self.n + len(values)
+        if need > len(self.buf):
+            grown = np.empty(max(need, 2 * len(self.buf)), dtype=self.buf.dtype)
+            grown[:self.n] = self.buf[:self.n]
+            self.buf = grown
+        self.buf[self.n:need] = values
+        self.n = need
+
+    @property
+    def values(self):
+        return self.buf[:self.n]
+
+
+class _Extreme:
+    """Sliding-window max (or min) over the last ``n`` positions via a monotonic deque."""
+
+    def __init__(self, n, largest=True):
+        self.n       = n
+        self.largest = largest
+        self.q       = deque()
+
+    def push(self, pos, value):
+        if np.isnan(value):
+            return
+        beats = (lambda a, b: a <= b) if self.largest else (lambda a, b: a >= b)
+        while self.q and beats(self.q[-1][1], value):
+            self.q.pop()
+        self.q.append((pos, value))
+
+    def value(self, last_pos):
+        while self.q and self.q[0][0] <= last_pos - self.n:
+            self.q.popleft()
+        return self.q[0][1] if self.q else None
+
+
+# ─────────────────────────────────────────────────────────────────
+# PER-SYMBOL STATE
+# ─────────────────────────────────────────────────────────────────
+class IndicatorState:
+    SERIES = ("rsi", "bb_mid", "bb_std", "bb_upper", "bb_lower", "ma20", "ma50")
+
+    def __init__(self, index, close, high, low, volume):
+        # Timestamps grow in a buffer too; appending to a pandas Index copies all of it
+        self.dates  = _Series(index.values, dtype="datetime64[ns]")
+        self.close  = _Series(close)
+        self.highs  = _Series(high)
+        self.lows   = _Series(low)
+        self.volume = _Series(volume)
+        self._track_extremes()
+
+        rsi, gain, loss = _rsi_series(close)
+        bb_mid = rolling_mean(close, BB_N)
+        bb_std = rolling_std(close, BB_N)
+        self.series = {
+            "rsi":      _Series(rsi),
+            "bb_mid":   _Series(bb_mid),
+            "bb_std":   _Series(bb_std),
+            "bb_upper": _Series(bb_mid + BB_K * bb_std),
+            "bb_lower": _Series(bb_mid - BB_K * bb_std),
+            "ma20":     _Series(rolling_mean(close, MA_FAST)),
+            "ma50":     _Series(rolling_mean(close, MA_SLOW)),
+        }
+        self.avg_gain = gain[-1] if len(gain) else np.nan
+        self.avg_loss = loss[-1] if len(loss) else np.nan
+        self._set_ema(ema(close, EMA_FAST), ema(close, EMA_SLOW), None, None)
+
+    def _track_extremes(self):
+        # Only the trailing year can ever be the current extreme
+        self.high = _Extreme(YEAR_N, largest=True)
+        self.low  = _Extreme(YEAR_N, largest=False)
+        high, low = self.highs.values, self.lows.values
+        for pos in range(max(0, len(high) - YEAR_N), len(high)):
+            self.high.push(pos, high[pos])
+            self.low.push(pos, low[pos])
+
+    def _set_ema(self, ema12, ema26, prev12, prev26):
+        # The values before the last bar are kept so ``drop_last`` can rewind
+        self.ema12   = ema12[-1]
+        self.ema26   = ema26[-1]
+        self._prev12 = ema12[-2] if len(ema12) > 1 else prev12
+        self._prev26 = ema26[-2] if len(ema26) > 1 else prev26
+
+    @classmethod
+    def from_frame(cls, data):
+        """State for an OHLCV DataFrame (or ``PriceColumns``)."""
+        return cls(data.index, *_columns(data))
+
+    @property
+    def index(self):
+        return pd.DatetimeIndex(self.dates.values, name="Date", copy=False)
+
+    def append_frame(self, data):
+        """``append`` the bars of an OHLCV DataFrame (or ``PriceColumns``)."""
+        self.append(data.index, *_columns(data))
+
+    def append(self, index, close, high, low, volume):
+        """Fold in ``k`` new bars; work is O(k) plus the fixed window tails."""
+        k     = len(close)
+        start = self.close.n
+        self.close.extend(close)
+        self.highs.extend(high)
+        self.lows.extend(low)
+        self.volume.extend(volume)
+        self.dates.extend(index.values)
+        for i in range(k):
+            self.high.push(start + i, high[i])
+            self.low.push(start + i, low[i])
+
+        tail = self.close.values[-(_TAIL + k):]
+        rsi, gain, loss = _rsi_series(tail)
+        bb_mid = rolling_mean(tail, BB_N)[-k:]
+        bb_std = rolling_std(tail, BB_N)[-k:]
+        self.series["rsi"].extend(rsi[-k:])
+        self.series["bb_mid"].extend(bb_mid)
+        self.series["bb_std"].extend(bb_std)
+        self.series["bb_upper"].extend(bb_mid + BB_K * bb_std)
+        self.series["bb_lower"].extend(bb_mid - BB_K * bb_std)
+        self.series["ma20"].extend(rolling_mean(tail, MA_FAST)[-k:])
+        self.series["ma50"].extend(rolling_mean(tail, MA_SLOW)[-k:])
+        self.avg_gain = gain[-1]
+        self.avg_loss = loss[-1]
+        self._set_ema(ema(close, EMA_FAST, prev=self.ema12), ema(close, EMA_SLOW, prev=self.ema26),
+                      self.ema12, self.ema26)
+
+    def last_bar(self):
+        """``(close, high, low, volume)`` of the newest bar."""
+        return tuple(s.values[-1] for s in (self.close, self.highs, self.lows, self.volume))
+
+    def drop_last(self):
+        """Forget the newest bar so a revised version of it can be appended."""
+        n = self.close.n - 1
+        for s in (self.dates, self.close, self.highs, self.lows, self.volume, *self.series.values()):
+            s.truncate(n)
+        self._track_extremes()
+        _, gain, loss = _rsi_series(self.close.values[-(_TAIL + 1):])
+        self.avg_gain = gain[-1] if len(gain) else np.nan
+        self.avg_loss = loss[-1] if len(loss) else np.nan
+        # One level of rewind: a second drop before an append cannot restore the EMAs
+        self.ema12, self._prev12 = self._prev12, None
+        self.ema26, self._prev26 = self._prev26, None
+
+    def snapshot(self, start=None):
+        """Current indicator values; series are trimmed to begin at ``start``."""
+        index = self.index
+        off   = 0 if start is None else int(index.searchsorted(start))
+        last  = self.close.n - 1
+        vol   = self.volume.values[-VOL_N:]
+        if self.avg_loss != 0 and not np.isnan(self.avg_loss):
+            rsi = 100 - (100 / (1 + self.avg_gain / self.avg_loss))
+        else:
+            rsi = 50.0
+        return {
+            "index":    index[off:],
+            "close":    self.close.values[off:],
+            **{name: s.values[off:] for name, s in self.series.items()},
+            "rsi_last": float(rsi),
+            "ema12":    float(self.ema12),
+            "ema26":    float(self.ema26),
+            "macd":     float(self.ema12 - self.ema26),
+            "high_52w": self.high.value(last),
+            "low_52w":  self.low.value(last),
+            "vol_avg":  int(np.mean(vol)) if len(vol) else 0,
+        }
+
+
+def _columns(data):
+    close  = np.asarray(data["Close"], dtype=float).ravel()
+    high   = np.asarray(data["High"], dtype=float).ravel() if "High" in data.columns else np.full(len(close), np.nan)
+    low    = np.asarray(data["Low"], dtype=float).ravel() if "Low" in data.columns else np.full(len(close), np.nan)
+    volume = np.asarray(data["Volume"], dtype=float).ravel() if "Volume" in data.columns else np.zeros(len(close))
+    return close, high, low, volume
+
+
+@traced("indicators")
+def compute_indicators(data):
+    """One-shot vectorized computation with no cached state."""
+    return IndicatorState.from_frame(data).snapshot()
+
+
+class IndicatorEngine:
+    """Keeps ``IndicatorState`` per symbol (LRU-bounded) and updates it incrementally."""
+
+    def __init__(self, max_symbols=256):
+        self.max_symbols = max_symbols
+        self._states     = OrderedDict()
+        self._lock       = threading.Lock()
+        self.full        = 0
+        self.incremental = 0
+        self.unchanged   = 0
+
+    @traced("indicators")
+    def get(self, symbol, data, interval="1d"):
+        key = (symbol.upper(), interval)
+        with self._lock:
+            state = self._states.get(key)
+            if state is not None and len(data) and data.index[0] >= state.index[0]:
+                # The stored history window slides forward as bars arrive, so
+                # match on the last known timestamp rather than on length.
+                self._states.move_to_end(key)
+                last = state.index[-1]
+                pos  = int(data.index.searchsorted(last))
+                if pos < len(data) and data.index[pos] == last and state.close.n > 1:
+                    # A refresh re-downloads the last bar (a partial session
+                    # or a forming intraday bar), so it is folded in again
+                    # unless its OHLCV is unchanged.
+                    bar = data.iloc[pos:pos + 1]
+                    if len(data) == pos + 1 and np.array_equal(state.last_bar(), np.concatenate(_columns(bar)),
+                                                               equal_nan=True):
+                        self.unchanged += 1
+                    else:
+                        state.drop_last()
+                        state.append_frame(data.iloc[pos:])
+                        self.incremental += 1
+                    return state.snapshot(start=data.index[0])
+
+            state = IndicatorState.from_frame(data)
+            self._states[key] = state
+            self.full += 1
+            while len(self._states) > self.max_symbols:
+                self._states.popitem(last=False)
+            return state.snapshot()
+
+    def stats(self):
+        return {"symbols": len(self._states), "full": self.full,
+                "incremental": self.incremental, "unchanged": self.unchanged}
@@ -0,0 +1,275 @@
+"""
+Live mode: new bars on an interval, folded in incrementally.
+
+    QL_LIVE_SOURCE=replay QL_LIVE_INTERVAL=2 streamlit run app.py
+    python live.py GAIL.NS --source replay --bars 60 --interval 0
+
+A ``LiveSession`` seeds itself once from the stored history, then on every
+``tick`` asks its source for the bars after the last one it has seen:
+
+    poll       the local store, refreshed from the provider on each poll; the
+               newest stored bar may be a partial session, so it is held back
+               until a later bar arrives
+    replay     the stored history's last ``bars`` bars, ``per_tick`` at a time,
+               as if they were arriving live (the default for the replay and
+               synthetic providers, which never produce a new bar on their own)
+
+Each tick's work depends only on the new bars, never on the ten-year history:
+
+    indicators   ``IndicatorState.append`` over the new bars plus fixed window tails
+    model input  only the new opens are scaled into the 100-bar window
+    forecast     ``days`` model calls (one for the direct strategy) from the new
+                 window; with a ``ForecastCache`` other sessions watching the same
+                 symbol share them
+    chart        ``charts.extend_live_figure`` appends the new points to the
+                 existing figure, which holds at most ``window`` bars
+
+Nothing here imports Streamlit.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+from bars import future_index, session_hours
+from forecast import N_STEPS, direct_forecast, forecast_metrics, recursive_forecast, valid_tail
+from indicators import IndicatorState
+from market_data import INTERVAL_MINUTES
+from telemetry import span
+
+
+LIVE_INTERVAL = float(os.environ.get("QL_LIVE_INTERVAL", 60))   # seconds between polls
+LIVE_WINDOW   = int(os.environ.get("QL_LIVE_WINDOW", 250))      # bars kept on the live chart
+REPLAY_BARS   = int(os.environ.get("QL_LIVE_REPLAY_BARS", 120))
+LIVE_SERIES   = ("ma20", "ma50", "bb_upper", "bb_lower", "rsi")
+
+
+# ─────────────────────────────────────────────────────────────────
+# BAR SOURCES
+# ─────────────────────────────────────────────────────────────────
+class StoreSource:
+    """Bars after the last one seen, from the store refreshed on every poll."""
+
+    name      = "poll"
+    exhausted = False
+
+    def __init__(self, store, symbol):
+        self.store  = store
+        self.symbol = symbol
+
+    def history(self):
+        data = self.store.columns(self.symbol)
+        return data.iloc[:-1]
+
+    def poll(self, after):
+        # Concurrent sessions polling the same symbol share one download
+        data = self.store.columns(self.symbol, refresh=True)
+        pos  = int(data.index.searchsorted(after, side="right"))
+        return data.iloc[pos:max(pos, len(data) - 1)]
+
+
+class ReplaySource:
+    """The last ``bars`` stored bars, released ``per_tick`` at a time."""
+
+    name = "replay"
+
+    def __init__(self, store, symbol, bars=REPLAY_BARS, per_tick=1):
+        self.data     = store.columns(symbol)
+        self.cursor   = max(0, len(self.data) - bars)
+        self.per_tick = per_tick
+
+    @property
+    def exhausted(self):
+        return self.cursor >= len(self.data)
+
+    def history(self):
+        return self.data.iloc[:self.cursor]
+
+    def poll(self, after):
+        chunk = self.data.iloc[self.cursor:self.cursor + self.per_tick]
+        self.cursor += len(chunk)
+        return chunk
+
+
+SOURCES = {"poll": StoreSource, "replay": ReplaySource}
+
+
+def default_source(provider_name):
+    """``replay`` for providers that never grow on their own, ``poll`` otherwise."""
+    return os.environ.get("QL_LIVE_SOURCE") or ("replay" if provider_name in ("replay", "synthetic") else "poll")
+
+
+def make_source(kind, store, symbol, **kwargs):
+    if kind not in SOURCES:
+        raise ValueError(f"Unknown live source '{kind}', expected one of {tuple(SOURCES)}")
+    return SOURCES[kind](store, symbol, **kwargs)
+
+
+# ─────────────────────────────────────────────────────────────────
+# SESSION
+# ─────────────────────────────────────────────────────────────────
+class LiveSession:
+    """One symbol's live indicators, model window and forecast.
+
+    ``tick()`` and ``view()`` return the same shape of update: the bar
+    ``dates``, the chart ``series`` for those bars, the forecast and its
+    metrics, and the latest indicator readings.
+    """
+
+    def __init__(self, symbol, source, engine, scaler, days=30, strategy="recursive", cache=None,
+                 window=LIVE_WINDOW, n_steps=N_STEPS, interval="1d"):
+        seed = source.history()
+        if seed.empty or "Open" not in seed.columns:
+            raise ValueError(f"{symbol}: symbol not found")
+        opn  = valid_tail(seed["Open"], n_steps)
+        if len(opn) < n_steps:
+            raise ValueError(f"{symbol}: only {len(opn)} bars, need {n_steps}")
+        self.symbol   = symbol.upper()
+        self.source   = source
+        self.engine   = engine
+        self.scaler   = scaler
+        self.days     = days
+        self.strategy = strategy
+        self.cache    = cache
+        self.window   = window
+        self.n_steps  = n_steps
+        self.interval = interval
+        # Session hours come from the seed history once; each view only extends the last bar
+        self.session  = None
+        if interval in INTERVAL_MINUTES:
+            stamps = np.asarray(seed.index.values, dtype="datetime64[ns]").view(np.int64)
+            self.session = session_hours(stamps, INTERVAL_MINUTES[interval] * 60 * 10 ** 9)
+
+        self.state    = IndicatorState.from_frame(seed)
+        self.opens    = deque(np.asarray(seed["Open"][-window:], dtype=float), maxlen=window)
+        self.scaled   = deque(scaler.transform(opn.reshape(-1, 1)).ravel(), maxlen=n_steps)
+        self.latest   = float(opn[-1])
+        self.last     = seed.index[-1]
+        self.ticks    = 0
+        self.bars     = 0
+        self.tick_ms  = deque(maxlen=100)
+        if cache is not None and strategy != "direct":
+            from forecast_cache import engine_fingerprint, scaler_fingerprint
+            self._fps = (engine_fingerprint(engine), scaler_fingerprint(scaler))
+        self.forecast, self.metrics = self._forecast()
+
+    def _forecast(self):
+        window = np.asarray(self.scaled, dtype=np.float32)[None, :]
+        if self.strategy == "direct":
+            scaled = direct_forecast(self.engine, window, self.days, self.n_steps)
+        elif self.cache is not None:
+            from forecast_cache import forecast_key
+            key    = forecast_key(self.symbol, self.last, *self._fps, self.interval)
+            scaled = self.cache.forecast_many(self.engine, [key], window, self.days)
+        else:
+            scaled = recursive_forecast(self.engine, window, self.days, self.n_steps)
+        prices = self.scaler.inverse_transform(scaled.reshape(-1, 1)).ravel()
+        return prices, forecast_metrics(self.latest, prices)
+
+    @property
+    def exhausted(self):
+        return self.source.exhausted
+
+    def tick(self):
+        """Poll once and fold in any new bars; the update for them, or ``None`` if none arrived."""
+        bars = self.source.poll(self.last)
+        if not len(bars):
+            return None
+        t0  = time.perf_counter()
+        with span("live.tick", symbol=self.symbol, bars=len(bars)):
+            opn = np.asarray(bars["Open"], dtype=float)
+            self.state.append_frame(bars)
+            self.opens.extend(opn)
+            valid = opn[~np.isnan(opn)]
+            if len(valid):
+                self.scaled.extend(self.scaler.transform(valid.reshape(-1, 1)).ravel())
+                self.latest = float(valid[-1])
+            self.last = bars.index[-1]
+            self.forecast, self.metrics = self._forecast()
+        self.ticks += 1
+        self.bars  += len(bars)
+        self.tick_ms.append((time.perf_counter() - t0) * 1000)
+        return self.view(len(bars))
+
+    def view(self, bars=None):
+        """The update for the last ``bars`` bars (the whole live window by default)."""
+        bars  = min(bars or self.window, len(self.opens))
+        snap  = self.state.snapshot()
+        opens = np.fromiter(self.opens, dtype=float, count=len(self.opens))
+        return {
+            "dates":    snap["index"][-bars:],
+            "series":   {"open": opens[-bars:], **{name: snap[name][-bars:] for name in LIVE_SERIES}},
+            "future":   future_index(snap["index"][-1:], self.days, self.interval, self.session),
+            "forecast": self.forecast,
+            "metrics":  self.metrics,
+            "rsi":      snap["rsi_last"],
+            "macd":     snap["macd"],
+            "bars":     bars,
+            "tick_ms":  self.tick_ms[-1] if self.tick_ms else 0.0,
+        }
+
+    def stats(self):
+        ms = np.asarray(self.tick_ms) if self.tick_ms else np.zeros(1)
+        return {
+            "symbol":      self.symbol,
+            "source":      self.source.name,
+            "ticks":       self.ticks,
+            "bars":        self.bars,
+            "last":        self.last.isoformat(),
+            "tick_ms_p50": round(float(np.median(ms)), 2),
+            "tick_ms_max": round(float(ms.max()), 2),
+        }
+
+
+def main(argv=None):
+    import joblib
+
+    from bars import INTERVALS, open_bar_store
+    from data_store import DATA_DIR
+    from engine import ENGINES, MODEL_PATH, SCALER_PATH, load_engine
+    from market_data import PROVIDER, PROVIDERS, get_provider
+
+    parser = argparse.ArgumentParser(description="Run a live session headless and report per-tick cost.")
+    parser.add_argument("symbol")
+    parser.add_argument("--source", choices=tuple(SOURCES), help="default: replay for offline providers, else poll")
+    parser.add_argument("--bars", type=int, default=REPLAY_BARS, help="bars to replay")
+    parser.add_argument("--per-tick", type=int, default=1)
+    parser.add_argument("--ticks", type=int, help="stop after this many ticks (default: until the replay ends)")
+    parser.add_argument("--interval", type=float, default=LIVE_INTERVAL)
+    parser.add_argument("--days", type=int, default=30, help="forecast length in bars")
+    parser.add_argument("--bar-size", choices=INTERVALS, default="1d", help="bar interval to stream")
+    parser.add_argument("--engine", choices=ENGINES, default="numpy")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--scaler", default=SCALER_PATH)
+    parser.add_argument("--provider", choices=tuple(PROVIDERS), default=PROVIDER)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    args = parser.parse_args(argv)
+
+    fetch  = get_provider(args.provider)
+    bars   = open_bar_store(fetch, args.data_dir)
+    store  = bars.daily if args.bar_size == "1d" else bars.at(args.bar_size)
+    kind   = args.source or default_source(fetch.name)
+    source = make_source(kind, store, args.symbol, **({"bars": args.bars, "per_tick": args.per_tick}
+                                                      if kind == "replay" else {}))
+    session = LiveSession(args.symbol, source, load_engine(args.engine, args.model), joblib.load(args.scaler),
+                          args.days, interval=args.bar_size)
+    try:
+        while not session.exhausted and (args.ticks is None or session.ticks < args.ticks):
+            update = session.tick()
+            if update is not None:
+                print(f"{update['dates'][-1]:%Y-%m-%d %H:%M}  +{update['bars']} bar  "
+                      f"₹{update['metrics']['latest_price']:,.2f} → ₹{update['metrics']['predicted_price']:,.2f}  "
+                      f"RSI {update['rsi']:5.1f}  {update['tick_ms']:7.2f} ms", file=sys.stderr)
+            if args.interval and not session.exhausted:
+                time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(session.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Market-data providers.
+
+Every provider returns the same shape of OHLCV DataFrame — a
+``DatetimeIndex`` named ``Date`` and float ``Open/High/Low/Close/Volume``
+columns — so the store, the forecaster and the charts never need to know where
+the candles came from.  Providers are also callables with the
+``fetch(symbol, start=None)`` signature ``OHLCVStore`` expects; ``fetcher``
+returns the same kind of callable for intraday bars (``5m``, ``1h``, …).
+Intraday timestamps are exchange-local wall-clock times.
+
+    yfinance   live Yahoo Finance data through one pooled HTTP session
+    replay     CSV / Parquet fixtures from a local directory
+    synthetic  geometric Brownian motion of any length, seeded per symbol
+
+Pick one with ``QL_PROVIDER`` (and ``QL_REPLAY_DIR`` for replay).
+"""
+import os
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+
+PROVIDER   = os.environ.get("QL_PROVIDER", "yfinance")
+REPLAY_DIR = os.environ.get("QL_REPLAY_DIR", "fixtures")
+OHLCV      = ["Open", "High", "Low", "Close", "Volume"]
+_PERIODS   = {"1mo": 21, "3mo": 63, "6mo": 126, "1y": 252, "2y": 504, "5y": 1260, "10y": 2520}
+# The longest history Yahoo serves at each intraday interval
+INTRADAY_PERIODS = {"1m": "7d", "5m": "60d", "15m": "60d", "30m": "60d", "1h": "730d"}
+INTERVAL_MINUTES = {"1m": 1, "5m": 5, "15m": 15, "30m": 30, "1h": 60}
+
+
+def normalize_ohlcv(data):
+    """Flatten yfinance's (Price, Ticker) columns to plain OHLCV float columns."""
+    if isinstance(data.columns, pd.MultiIndex):
+        level = "Price" if "Price" in data.columns.names else 0
+        data = data.copy()
+        data.columns = data.columns.get_level_values(level)
+    cols = [c for c in OHLCV if c in data.columns]
+    data = data[cols].astype("float64")
+    data.index = pd.DatetimeIndex(data.index).tz_localize(None)
+    data.index.name = "Date"
+    return data[~data.index.duplicated(keep="last")].sort_index()
+
+
+def _slice(data, start=None, period="10y"):
+    if start is not None:
+        return data[data.index >= pd.Timestamp(start)]
+    if period in _PERIODS:
+        return data.tail(_PERIODS[period])
+    return data
+
+
+class MarketDataProvider:
+    name  = "base"
+    label = "Unknown"
+
+    def history(self, symbol, start=None, period="10y", interval="1d"):
+        """Candles since ``start`` (inclusive) or over the trailing ``period``."""
+        raise NotImplementedError
+
+    def __call__(self, symbol, start=None):
+        return self.history(symbol, start=start)
+
+    def fetcher(self, interval):
+        """A ``fetch(symbol, start=None)`` callable for ``interval`` bars."""
+        if interval == "1d":
+            return self
+        period = INTRADAY_PERIODS.get(interval, "60d")
+        return lambda symbol, start=None: self.history(symbol, start=start, period=period, interval=interval)
+
+
+# ─────────────────────────────────────────────────────────────────
+# YAHOO FINANCE
+# ─────────────────────────────────────────────────────────────────
+class YFinanceProvider(MarketDataProvider):
+    """``yf.download`` over one shared, connection-pooled session with retries."""
+
+    name  = "yfinance"
+    label = "Yahoo Finance"
+
+    def __init__(self, retries=2, backoff=0.5, timeout=10):
+        self.retries  = retries
+        self.backoff  = backoff
+        self.timeout  = timeout
+        self._session = None
+        self._lock    = threading.Lock()
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                from curl_cffi import requests as curl_requests
+                # yfinance needs a browser-impersonating curl_cffi session;
+                # keeping one alive reuses its TLS connections across calls.
+                self._session = curl_requests.Session(impersonate="chrome")
+            return self._session
+
+    def history(self, symbol, start=None, period="10y", interval="1d"):
+        import yfinance as yf
+        kwargs = {"start": start} if start is not None else {"period": period}
+        for attempt in range(self.retries + 1):
+            try:
+                data = yf.download(symbol, interval=interval, progress=False, session=self.session,
+                                   timeout=self.timeout, **kwargs)
+            except Exception:
+                data = None
+            if data is not None and not data.empty:
+                return normalize_ohlcv(data)
+            if attempt < self.retries:
+                time.sleep(self.backoff * 2 ** attempt)
+        return pd.DataFrame(columns=OHLCV)
+
+
+# ─────────────────────────────────────────────────────────────────
+# REPLAY FIXTURES
+# ─────────────────────────────────────────────────────────────────
+class ReplayProvider(MarketDataProvider):
+    """Serves ``<root>/<SYMBOL>.parquet`` or ``<root>/<SYMBOL>.csv`` fixtures.
+
+    Intraday fixtures are named ``<SYMBOL>_<interval>``, e.g. ``AAPL_5m.parquet``.
+    """
+
+    name  = "replay"
+    label = "Local Replay"
+
+    def __init__(self, root=REPLAY_DIR):
+        self.root   = root
+        self._cache = {}
+
+    def _load(self, symbol, interval="1d"):
+        key = symbol.upper() if interval == "1d" else f"{symbol.upper()}_{interval}"
+        if key not in self._cache:
+            for ext, reader in ((".parquet", pd.read_parquet),
+                                (".csv", lambda p: pd.read_csv(p, index_col=0, parse_dates=True))):
+                path = os.path.join(self.root, key + ext)
+                if os.path.exists(path):
+                    self._cache[key] = normalize_ohlcv(reader(path))
+                    break
+            else:
+                return pd.DataFrame(columns=OHLCV)
+        return self._cache[key]
+
+    def history(self, symbol, start=None, period="10y", interval="1d"):
+        return _slice(self._load(symbol, interval), start, period)
+
+
+# ─────────────────────────────────────────────────────────────────
+# SYNTHETIC GBM
+# ─────────────────────────────────────────────────────────────────
+class SyntheticProvider(MarketDataProvider):
+    """Geometric Brownian motion candles, reproducible per symbol and end date.
+
+    Intraday bars cover a 09:15–15:30 session over the last 60 weekdays.  They
+    are an independent path, not a refinement of the daily one.
+    """
+
+    name  = "synthetic"
+    label = "Synthetic GBM"
+
+    def __init__(self, bars=2520, s0=100.0, mu=0.08, sigma=0.25, end=None, seed=0):
+        self.bars  = bars
+        self.s0    = s0
+        self.mu    = mu
+        self.sigma = sigma
+        self.end   = end
+        self.seed  = seed
+
+    SESSION_OPEN    = "09:15"
+    SESSION_MINUTES = 375
+    SESSIONS        = 60
+
+    def generate(self, symbol, bars=None, interval="1d"):
+        end = pd.Timestamp(self.end) if self.end is not None else pd.Timestamp.today().normalize()
+        if interval != "1d":
+            return self._intraday(symbol, interval, bars, end)
+        bars = bars or self.bars
+        rng  = np.random.default_rng([self.seed, zlib.crc32(symbol.upper().encode())])
+        idx  = pd.bdate_range(end=end, periods=bars, name="Date")
+        return self._candles(rng, idx, 1 / 252, 13.0)
+
+    def _intraday(self, symbol, interval, bars, end):
+        step    = INTERVAL_MINUTES[interval]
+        per_day = -(-self.SESSION_MINUTES // step)
+        bars    = bars or per_day * self.SESSIONS
+        days    = pd.bdate_range(end=end, periods=-(-bars // per_day))
+        offsets = pd.Timedelta(f"{self.SESSION_OPEN}:00") + pd.to_timedelta(np.arange(per_day) * step, unit="min")
+        idx     = pd.DatetimeIndex((days.values[:, None] + offsets.values[None, :]).ravel()[-bars:], name="Date")
+        rng     = np.random.default_rng([self.seed, zlib.crc32(symbol.upper().encode()), zlib.crc32(interval.encode())])
+        return self._candles(rng, idx, 1 / (252 * per_day), 13.0 - np.log(per_day))
+
+    def _candles(self, rng, idx, dt, volume_mu):
+        bars    = len(idx)
+        log_ret = (self.mu - 0.5 * self.sigma ** 2) * dt + self.sigma * np.sqrt(dt) * rng.standard_normal(bars)
+        close   = self.s0 * np.exp(np.cumsum(log_ret))
+        gap     = rng.normal(0.0, 0.2 * self.sigma * np.sqrt(dt), bars)
+        opn     = np.r_[self.s0, close[:-1]] * np.exp(gap)
+        wick    = np.abs(rng.normal(0.0, 0.5 * self.sigma * np.sqrt(dt), (2, bars)))
+        high    = np.maximum(opn, close) * (1 + wick[0])
+        low     = np.minimum(opn, close) * (1 - wick[1])
+        volume  = np.round(rng.lognormal(volume_mu, 0.4, bars))
+        return pd.DataFrame({"Open": opn, "High": high, "Low": low, "Close": close, "Volume": volume}, index=idx)
+
+    def history(self, symbol, start=None, period="10y", interval="1d"):
+        return _slice(self.generate(symbol, interval=interval), start, period)
+
+
+PROVIDERS = {
+    "yfinance":  YFinanceProvider,
+    "replay":    ReplayProvider,
+    "synthetic": SyntheticProvider,
+}
+
+
+def get_provider(name=None, **kwargs):
+    name = name or PROVIDER
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown provider '{name}', expected one of {tuple(PROVIDERS)}")
+    return PROVIDERS[name](**kwargs)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write synthetic GBM fixtures for the replay provider.")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--bars", type=int, help="default: 2520 daily bars, or 60 sessions intraday")
+    parser.add_argument("--interval", default="1d", choices=("1d",) + tuple(INTERVAL_MINUTES))
+    parser.add_argument("--out", default=REPLAY_DIR)
+    parser.add_argument("--format", choices=("parquet", "csv"), default="parquet")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    synth = SyntheticProvider(bars=args.bars or 2520, seed=args.seed)
+    for sym in args.symbols:
+        frame = synth.generate(sym, interval=args.interval)
+        name  = sym.upper() if args.interval == "1d" else f"{sym.upper()}_{args.interval}"
+        path  = os.path.join(args.out, f"{name}.{args.format}")
+        frame.to_parquet(path) if args.format == "parquet" else frame.to_csv(path)
+        print(f"{path}: {len(frame)} bars")
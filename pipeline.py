@@ -0,0 +1,98 @@
+"""
+Per-request stage timing for the forecast path.
+
+The forecast runs as a fixed sequence of stages.  ``StageTimer.stage`` wraps
+each one, measures its wall time with ``perf_counter`` and notifies an optional
+``on_progress(done, total, label)`` callback, so the progress bar moves only
+when a stage actually finishes.  Each stage is also a ``stage.<name>`` span
+in ``telemetry``.  ``record()`` returns the timing as a plain
+dict, which is also logged and optionally appended to ``QL_TIMING_LOG``.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from telemetry import count, span
+
+
+STAGES = ("fetch", "load", "scale", "infer", "inverse", "indicators", "figures")
+
+STAGE_LABELS = {
+    "fetch":      "🛰 Syncing market data…",
+    "load":       "🧠 Loading LSTM neural weights…",
+    "scale":      "🧮 Scaling price history…",
+    "infer":      "⚡ Running recursive inference…",
+    "inverse":    "📐 Inverse-transforming forecast…",
+    "uncertainty": "🎲 Sampling Monte Carlo dropout paths…",
+    "indicators": "📊 Computing technical indicators…",
+    "figures":    "🎨 Building charts…",
+}
+
+TIMING_LOG = os.environ.get("QL_TIMING_LOG")
+
+log = logging.getLogger("quantumlens.timing")
+
+# Most recent records, newest last; read by anything that wants to report them
+RECENT = deque(maxlen=256)
+_log_lock = threading.Lock()
+
+
+class StageTimer:
+    def __init__(self, stages=STAGES, on_progress=None, **context):
+        self.stages      = tuple(stages)
+        self.on_progress = on_progress
+        self.context     = context
+        self.request_id  = uuid.uuid4().hex[:12]
+        self.started     = datetime.now(timezone.utc)
+        self.timings     = {}
+        self._t0         = time.perf_counter()
+        self._total      = None
+
+    @property
+    def done(self):
+        return sum(1 for s in self.stages if s in self.timings)
+
+    def _notify(self, label):
+        if self.on_progress is not None:
+            self.on_progress(self.done, len(self.stages), label)
+
+    @contextmanager
+    def stage(self, name, label=None):
+        """Time one stage; re-entering a stage name adds to its total."""
+        self._notify(label or STAGE_LABELS.get(name, name))
+        t0 = time.perf_counter()
+        try:
+            with span(f"stage.{name}", request=self.request_id):
+                yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + (time.perf_counter() - t0) * 1000
+            self._notify(f"✅ {name} · {self.timings[name]:,.0f} ms")
+
+    def finish(self):
+        """Close the record, log it, and return it."""
+        self._total = (time.perf_counter() - self._t0) * 1000
+        rec = self.record()
+        RECENT.append(rec)
+        count("forecasts", mode=self.context.get("mode", "single"))
+        line = json.dumps(rec)
+        log.info(line)
+        if TIMING_LOG:
+            with _log_lock, open(TIMING_LOG, "a") as f:
+                f.write(line + "\n")
+        return rec
+
+    def record(self):
+        total = self._total if self._total is not None else (time.perf_counter() - self._t0) * 1000
+        return {
+            "request_id": self.request_id,
+            "started":    self.started.isoformat(),
+            **self.context,
+            "total_ms":   round(total, 3),
+            "stages_ms":  {name: round(ms, 3) for name, ms in self.timings.items()},
+        }
@@ -0,0 +1,125 @@
+"""
+Validate the reduced-precision and XLA inference modes against float32.
+
+    python precision.py GAIL.NS RELIANCE.NS TCS.NS
+    python precision.py --tickers universe.txt --days 60 --tol 0.01 --out modes.json
+
+Every mode in ``engine.ENGINES`` forecasts the same tickers ``--days`` ahead
+and is compared, in price units, against the float32 ``keras`` reference:
+
+    max_abs_diff     worst absolute price difference over all tickers and days
+    worst_symbol     the ticker where it occurred
+    single_ms        p50 latency of one ticker's forecast (the app's path)
+    batch_ms         p50 latency of all tickers forecast together
+    ok               max_abs_diff <= --tol (a cent by default)
+
+The fastest mode that stays within tolerance (by ``single_ms``) is reported
+as ``recommended``; pick it in the sidebar or with ``--engine`` on the CLIs.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from engine import ENGINES, MODEL_PATH, SCALER_PATH, load_engine, warm_up
+from forecast import N_STEPS, forecast_symbols
+
+
+REFERENCE = "keras"
+TOLERANCE = 0.01
+
+
+def _p50_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(times))
+
+
+def _forecast_prices(engine, scaler, frames, days):
+    results, _ = forecast_symbols(engine, scaler, frames, days)
+    return {sym: r["forecast"] for sym, r in results.items()}
+
+
+def validate_modes(frames, scaler, modes=ENGINES, days=60, tol=TOLERANCE, model_path=MODEL_PATH,
+                   repeat=5, reference=REFERENCE):
+    """Compare each mode's ``days``-ahead forecasts with ``reference``; returns ``(rows, recommended)``."""
+    ref_engine = load_engine(reference, model_path)
+    expected   = _forecast_prices(ref_engine, scaler, frames, days)
+    if not expected:
+        raise SystemExit(f"no symbol has the {N_STEPS} bars needed to forecast")
+    frames = {sym: frames[sym] for sym in expected}
+    first  = {sym: frames[sym] for sym in list(frames)[:1]}
+
+    rows = []
+    for mode in modes:
+        engine = ref_engine if mode == reference else load_engine(mode, model_path)
+        warm_up(engine, (1, len(frames)))
+        got   = _forecast_prices(engine, scaler, frames, days)
+        diffs = {sym: float(np.max(np.abs(got[sym] - expected[sym]))) for sym in expected}
+        worst = max(diffs, key=diffs.get)
+        rows.append({
+            "mode":         mode,
+            "max_abs_diff": diffs[worst],
+            "worst_symbol": worst,
+            "single_ms":    round(_p50_ms(lambda: forecast_symbols(engine, scaler, first, days), repeat), 2),
+            "batch_ms":     round(_p50_ms(lambda: forecast_symbols(engine, scaler, frames, days), repeat), 2),
+            "ok":           diffs[worst] <= tol,
+        })
+        print(f"  {mode:<16} max |Δ| {diffs[worst]:.5f} ({worst})  single {rows[-1]['single_ms']:8.2f} ms  "
+              f"batch {rows[-1]['batch_ms']:8.2f} ms  {'ok' if rows[-1]['ok'] else 'FAIL'}", file=sys.stderr)
+
+    passing     = [r for r in rows if r["ok"]]
+    recommended = min(passing, key=lambda r: r["single_ms"])["mode"] if passing else None
+    return rows, recommended
+
+
+def main(argv=None):
+    import joblib
+
+    from batch_forecast import read_tickers
+    from data_store import DATA_DIR, OHLCVStore
+    from market_data import PROVIDER, PROVIDERS, get_provider
+
+    parser = argparse.ArgumentParser(description="Check inference modes against the float32 reference.")
+    parser.add_argument("symbols", nargs="*")
+    parser.add_argument("--tickers", help="file with one ticker per line")
+    parser.add_argument("--modes", nargs="*", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--tol", type=float, default=TOLERANCE, help="largest allowed price difference")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--scaler", default=SCALER_PATH)
+    parser.add_argument("--provider", choices=tuple(PROVIDERS), default=PROVIDER)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--out", help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    symbols = list(args.symbols) + (read_tickers(args.tickers) if args.tickers else [])
+    if not symbols:
+        parser.error("give at least one symbol or --tickers")
+
+    fetch  = get_provider(args.provider)
+    store  = OHLCVStore(os.path.join(args.data_dir, fetch.name), fetch=fetch)
+    frames = {sym: store.get(sym) for sym in symbols}
+    frames = {sym: data for sym, data in frames.items() if not data.empty}
+    scaler = joblib.load(args.scaler)
+
+    rows, recommended = validate_modes(frames, scaler, args.modes, args.days, args.tol, args.model, args.repeat)
+    report = {"reference": REFERENCE, "days": args.days, "tolerance": args.tol, "symbols": len(frames),
+              "modes": rows, "recommended": recommended}
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    raise SystemExit(0 if recommended else 1)
+
+
+if __name__ == "__main__":
+    main()
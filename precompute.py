@@ -0,0 +1,236 @@
+"""
+Watchlist pre-computation after each exchange's close.
+
+    QL_WATCHLIST="GAIL.NS,RELIANCE.NS,AAPL,VOD.L" streamlit run app.py
+    python precompute.py --tickers watchlist.txt --once
+
+``Precomputer`` runs on a daemon thread next to the app (or the API).  For
+every exchange with symbols on the watchlist it sleeps until ``delay`` minutes
+after that exchange's weekday close, then:
+
+    refreshes     each symbol's candles in the local store (forced, since a
+                  midday copy still counts as fresh by ``QL_DATA_MAX_AGE``)
+    indicators    folds the new bar into the shared ``IndicatorEngine``
+    forecasts     one batched ``horizon``-day recursive forecast into the shared
+                  ``ForecastCache``; every shorter horizon is a prefix of it
+
+so the first click on a watchlist ticker is a cache hit instead of a
+download plus ``forecast_days`` model calls.  Anything off the watchlist, or
+asked for before the run finishes, is still computed live.
+
+Exchanges are inferred from the ticker suffix (``.NS`` / ``.BO`` → NSE/BSE,
+``.L`` → LSE, anything else → NYSE/NASDAQ).  Holidays are not modelled; a run
+on one just finds no new bar.
+
+Forecasts live in the process's memory, so the scheduler has to run inside
+the app or API process to help them.  As a separate worker (``--loop``) it
+still keeps the on-disk candle cache warm for every process.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import time as clock
+
+import pandas as pd
+
+from forecast import DIRECT_HORIZON, forecast_symbols
+
+
+WATCHLIST = [s.strip().upper() for s in os.environ.get("QL_WATCHLIST", "").split(",") if s.strip()]
+DELAY_MIN = float(os.environ.get("QL_PRECOMPUTE_DELAY_MIN", 20))
+HORIZON   = DIRECT_HORIZON   # the longest forecast window the UI offers
+
+EXCHANGES = {
+    "NSE/BSE":     ("Asia/Kolkata",     clock(15, 30)),
+    "NYSE/NASDAQ": ("America/New_York", clock(16, 0)),
+    "LSE":         ("Europe/London",    clock(16, 30)),
+}
+SUFFIXES  = {".NS": "NSE/BSE", ".BO": "NSE/BSE", ".L": "LSE"}
+
+
+def exchange_for(symbol):
+    for suffix, exchange in SUFFIXES.items():
+        if symbol.upper().endswith(suffix):
+            return exchange
+    return "NYSE/NASDAQ"
+
+
+def group_by_exchange(symbols):
+    groups = {}
+    for sym in symbols:
+        groups.setdefault(exchange_for(sym), []).append(sym.upper())
+    return groups
+
+
+def next_close(exchange, now=None, delay_min=DELAY_MIN):
+    """The next weekday close of ``exchange`` plus ``delay_min``, as a UTC timestamp."""
+    tz, close = EXCHANGES[exchange]
+    now   = pd.Timestamp.now(tz="UTC") if now is None else pd.Timestamp(now).tz_convert("UTC")
+    local = now.tz_convert(tz)
+    day   = local.normalize()
+    while True:
+        due = (day + pd.Timedelta(hours=close.hour, minutes=close.minute + delay_min)).tz_convert("UTC")
+        if day.weekday() < 5 and due > now:
+            return due
+        day += pd.Timedelta(days=1)
+
+
+class Precomputer:
+    """Refreshes and pre-forecasts a watchlist after each exchange's close.
+
+    ``load_assets(symbol)`` returns the ``(engine, scaler)`` serving ``symbol``;
+    it is called on the scheduler thread, so it may block on a background
+    model load.  Symbols that share a model are forecast in one batch.
+    """
+
+    def __init__(self, store, load_assets, cache, indicators, watchlist=WATCHLIST,
+                 horizon=HORIZON, delay_min=DELAY_MIN):
+        self.store       = store
+        self.load_assets = load_assets
+        self.cache       = cache
+        self.indicators  = indicators
+        self.groups      = group_by_exchange(watchlist)
+        self.horizon     = horizon
+        self.delay_min   = delay_min
+        self.runs        = {}
+        self.next_due    = {}
+        self._stop       = threading.Event()
+        self._thread     = None
+
+    def run(self, exchange=None):
+        """Refresh and pre-compute one exchange's symbols (all when ``None``); returns a summary."""
+        symbols = [s for ex, syms in self.groups.items() if exchange in (None, ex) for s in syms]
+        t0      = time.perf_counter()
+        frames, failed = {}, {}
+        for sym in symbols:
+            try:
+                data = self.store.columns(sym, refresh=True)
+            except Exception as exc:
+                failed[sym] = f"{type(exc).__name__}: {exc}"
+                continue
+            if data.empty:
+                failed[sym] = "no data"
+                continue
+            frames[sym] = data
+            self.indicators.get(sym, data)
+        t_fetch = time.perf_counter()
+
+        groups = {}
+        for sym, data in frames.items():
+            try:
+                engine, scaler = self.load_assets(sym)
+            except Exception as exc:
+                # One symbol's missing or broken model must not cost the others theirs
+                failed[sym] = f"{type(exc).__name__}: {exc}"
+                continue
+            groups.setdefault((id(engine), id(scaler)), (engine, scaler, {}))[2][sym] = data
+        results, skipped = {}, {}
+        for engine, scaler, group in groups.values():
+            res, skip = forecast_symbols(engine, scaler, group, self.horizon, cache=self.cache)
+            results.update(res)
+            skipped.update(skip)
+        summary = {
+            "exchange":   exchange or "all",
+            "finished":   pd.Timestamp.now(tz="UTC").isoformat(),
+            "symbols":    len(symbols),
+            "forecast":   len(results),
+            "failed":     {**failed, **skipped},
+            "fetch_ms":   round((t_fetch - t0) * 1000, 1),
+            "forecast_ms": round((time.perf_counter() - t_fetch) * 1000, 1),
+        }
+        self.runs[exchange or "all"] = summary
+        return summary
+
+    # ── scheduling ──
+    def start(self, run_now=True):
+        """Start the scheduler thread; ``run_now`` pre-computes everything immediately first."""
+        if self._thread is None and self.groups:
+            self._thread = threading.Thread(target=self._loop, args=(run_now,), name="precompute", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self, run_now):
+        if run_now:
+            self._safe_run(None)
+        while not self._stop.is_set():
+            now = pd.Timestamp.now(tz="UTC")
+            self.next_due = {ex: next_close(ex, now, self.delay_min) for ex in self.groups}
+            exchange, due = min(self.next_due.items(), key=lambda kv: kv[1])
+            if self._stop.wait(max(0.0, (due - now).total_seconds())):
+                break
+            self._safe_run(exchange)
+
+    def _safe_run(self, exchange):
+        try:
+            self.run(exchange)
+        except Exception as exc:
+            # A bad run must not kill the scheduler; the next close retries
+            self.runs[exchange or "all"] = {"exchange": exchange or "all", "error": f"{type(exc).__name__}: {exc}",
+                                            "finished": pd.Timestamp.now(tz="UTC").isoformat()}
+
+    def stats(self):
+        return {
+            "watchlist": {ex: len(syms) for ex, syms in self.groups.items()},
+            "runs":      dict(self.runs),
+            "next_due":  {ex: due.isoformat() for ex, due in self.next_due.items()},
+        }
+
+
+def main(argv=None):
+    from batch_forecast import read_tickers
+    from data_store import DATA_DIR, OHLCVStore
+    from engine import ENGINES, MODEL_PATH, SCALER_PATH
+    from forecast_cache import ForecastCache
+    from indicators import IndicatorEngine
+    from market_data import PROVIDER, PROVIDERS, get_provider
+    from registry import DEFAULT, REGISTRY_PATH, ModelRegistry, read_manifest
+
+    parser = argparse.ArgumentParser(description="Refresh and pre-compute a watchlist after each market close.")
+    parser.add_argument("symbols", nargs="*")
+    parser.add_argument("--tickers", help="file with one ticker per line (default: QL_WATCHLIST)")
+    parser.add_argument("--once", action="store_true", help="run every exchange now and exit")
+    parser.add_argument("--loop", action="store_true", help="keep running, once per exchange close")
+    parser.add_argument("--horizon", type=int, default=HORIZON)
+    parser.add_argument("--delay", type=float, default=DELAY_MIN, help="minutes after the close to start")
+    parser.add_argument("--engine", choices=ENGINES, default="numpy")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--scaler", default=SCALER_PATH)
+    parser.add_argument("--manifest", default=REGISTRY_PATH, help="per-symbol models; --model/--scaler are the default")
+    parser.add_argument("--provider", choices=tuple(PROVIDERS), default=PROVIDER)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    args = parser.parse_args(argv)
+
+    symbols = list(args.symbols) + (read_tickers(args.tickers) if args.tickers else []) or WATCHLIST
+    if not symbols:
+        parser.error("give symbols, --tickers or set QL_WATCHLIST")
+    if args.once == args.loop:
+        parser.error("pick one of --once or --loop")
+
+    fetch  = get_provider(args.provider)
+    store  = OHLCVStore(os.path.join(args.data_dir, fetch.name), fetch=fetch)
+    models, routes = read_manifest(args.manifest)
+    models[DEFAULT] = {**models[DEFAULT], "model": args.model, "scaler": args.scaler}
+    registry = ModelRegistry(models, routes)
+
+    pre = Precomputer(store, lambda sym: registry.assets(sym, args.engine), ForecastCache(), IndicatorEngine(),
+                      symbols, args.horizon, args.delay)
+    if args.once:
+        print(json.dumps(pre.run()))
+        return
+    pre.start(run_now=True)
+    try:
+        while True:
+            time.sleep(3600)
+            print(json.dumps(pre.stats()), file=sys.stderr)
+    except KeyboardInterrupt:
+        pre.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Per-symbol model and scaler registry.
+
+    QL_REGISTRY=models.json QL_MODEL_BUDGET_MB=256 streamlit run app.py
+    python registry.py GAIL.NS HDFCBANK.NS AAPL --load
+
+``lstm_model.h5`` and ``scaler.save`` were fit on GAIL.NS alone.  A manifest
+maps other symbols (or clusters of them) to artifacts trained for them:
+
+    {
+      "models": {
+        "default":   {"model": "lstm_model.h5", "scaler": "scaler.save", "direct": "lstm_direct.h5"},
+        "nse-banks": {"model": "models/nse_banks.h5", "scaler": "models/nse_banks.save"},
+        "us-tech":   {"model": "models/us_tech.h5", "scaler": "models/us_tech.save"}
+      },
+      "symbols": {
+        "AAPL":     "us-tech",
+        "MSFT":     "us-tech",
+        "*BANK.NS": "nse-banks"
+      }
+    }
+
+A symbol resolves to its exact entry first, then to the first matching
+``fnmatch`` pattern in file order, then to ``default``.  Without a manifest
+everything resolves to ``default``, the GAIL.NS pair the app always used.  An
+artifact with no ``direct`` model serves the direct strategy from ``default``
+(model and scaler together, since a scaler only fits its own model).
+
+Models load on first use, on an ``EngineLoader`` thread, and are shared by
+every session that resolves to them.  Each resident model counts what its
+load added to the process (``EngineLoader.resident_bytes``, at least its
+weight bytes) against ``budget_mb``; for Keras that is mostly the runtime's
+graphs and compiled code, not the weights, and the first model of a kind also
+carries the runtime's one-off setup.  Once a load pushes the total
+over, the least recently used models are dropped until it fits again (the one
+just loaded always stays).  A session still holding an evicted engine keeps
+using it until it lets go; an evicted broker serves such callers unbatched.
+"""
+import argparse
+import fnmatch
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from engine import DIRECT_MODEL_PATH, MODEL_PATH, SCALER_PATH, EngineLoader
+from telemetry import escape_label
+
+
+REGISTRY_PATH   = os.environ.get("QL_REGISTRY", "models.json")
+MODEL_BUDGET_MB = float(os.environ.get("QL_MODEL_BUDGET_MB", 512))
+DEFAULT         = "default"
+
+
+def read_manifest(path=REGISTRY_PATH):
+    """``(models, symbols)`` from a JSON manifest; just ``default`` if there is none."""
+    models  = {DEFAULT: {"model": MODEL_PATH, "scaler": SCALER_PATH, "direct": DIRECT_MODEL_PATH}}
+    symbols = {}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            manifest = json.load(f)
+        base = os.path.dirname(os.path.abspath(path))
+        for name, spec in manifest.get("models", {}).items():
+            if "model" not in spec or "scaler" not in spec:
+                raise ValueError(f"{path}: model '{name}' needs both 'model' and 'scaler'")
+            # Artifact paths are relative to the manifest
+            models[name] = {k: v if os.path.isabs(v) else os.path.join(base, v) for k, v in spec.items()}
+        symbols = {s.upper(): name for s, name in manifest.get("symbols", {}).items()}
+        unknown = set(symbols.values()) - set(models)
+        if unknown:
+            raise ValueError(f"{path}: symbols map to undefined models {sorted(unknown)}")
+    return models, symbols
+
+
+class _Resident:
+    """One loaded (model, strategy, engine) with its broker and usage counters."""
+
+    def __init__(self, loader):
+        self.loader  = loader
+        self.broker  = None
+        self.nbytes  = 0
+        self.uses    = 0
+        self.last    = time.time()
+
+
+class ModelRegistry:
+    """Resolves symbols to artifacts and keeps the loaded ones within a memory budget.
+
+    With ``broker`` every loaded engine sits behind its own ``InferenceBroker``.
+    """
+
+    def __init__(self, models=None, symbols=None, budget_mb=MODEL_BUDGET_MB, broker=False):
+        default = read_manifest(None)[0]
+        self.models    = {**default, **(models or {})}
+        self.symbols   = dict(symbols or {})
+        self.patterns  = [(p, name) for p, name in self.symbols.items() if any(c in p for c in "*?[")]
+        self.budget    = int(budget_mb * 1024 * 1024)
+        self.broker    = broker
+        self._resident = OrderedDict()
+        self._lock     = threading.Lock()
+        self.loads     = 0
+        self.evictions = 0
+        self.hits      = 0
+
+    @classmethod
+    def from_manifest(cls, path=REGISTRY_PATH, **kwargs):
+        return cls(*read_manifest(path), **kwargs)
+
+    # ── resolution ──
+    def resolve(self, symbol, strategy="recursive"):
+        """The artifact name serving ``symbol`` with ``strategy``."""
+        symbol = symbol.upper()
+        name   = self.symbols.get(symbol)
+        if name is None:
+            name = next((n for p, n in self.patterns if fnmatch.fnmatchcase(symbol, p)), DEFAULT)
+        if strategy == "direct" and "direct" not in self.models[name]:
+            name = DEFAULT
+        return name
+
+    def model_path(self, name, strategy="recursive"):
+        return self.models[name]["direct" if strategy == "direct" else "model"]
+
+    def has_model(self, symbol, strategy="recursive"):
+        return os.path.exists(self.model_path(self.resolve(symbol, strategy), strategy))
+
+    def group(self, symbols, strategy="recursive"):
+        """``{artifact: [symbols]}`` so a batch runs one forecast per model."""
+        groups = {}
+        for sym in symbols:
+            groups.setdefault(self.resolve(sym, strategy), []).append(sym)
+        return groups
+
+    # ── loading ──
+    def loader(self, symbol, engine_kind="numpy", strategy="recursive"):
+        """The ``EngineLoader`` for ``symbol``'s model, started on first use (does not block)."""
+        return self.loader_for(self.resolve(symbol, strategy), engine_kind, strategy)
+
+    def loader_for(self, name, engine_kind="numpy", strategy="recursive"):
+        return self._entry(name, engine_kind, strategy).loader
+
+    def assets(self, symbol, engine_kind="numpy", strategy="recursive"):
+        """``(engine, scaler)`` for ``symbol``; blocks until the model is loaded."""
+        return self.assets_for(self.resolve(symbol, strategy), engine_kind, strategy)
+
+    def assets_for(self, name, engine_kind="numpy", strategy="recursive"):
+        key    = (name, strategy, engine_kind)
+        entry  = self._entry(name, engine_kind, strategy)
+        engine = entry.loader.result()
+        with self._lock:
+            self._settle(key)
+            # Evicted while this caller waited for the load: serve it unbatched,
+            # since nothing would ever close a broker made for it now
+            if self.broker and entry.broker is None and self._resident.get(key) is entry:
+                from broker import InferenceBroker
+                entry.broker = InferenceBroker(engine)
+            # A hit is a forecast served by a model an earlier one already
+            # used; ``loader`` lookups (a rerun polling readiness) are not
+            if entry.uses:
+                self.hits += 1
+            entry.uses += 1
+            entry.last  = time.time()
+        return entry.broker or engine, entry.loader.extras["scaler"]
+
+    def _entry(self, name, engine_kind, strategy):
+        key = (name, strategy, engine_kind)
+        with self._lock:
+            entry = self._resident.get(key)
+            if entry is None:
+                scaler = self.models[name]["scaler"]
+                entry  = self._resident[key] = _Resident(EngineLoader(
+                    engine_kind, self.model_path(name, strategy), extras={"scaler": lambda: _load_scaler(scaler)}))
+                self.loads += 1
+            self._resident.move_to_end(key)
+            self._settle(key)
+            return entry
+
+    def _settle(self, keep):
+        """Measure models that finished loading, then evict down to the budget (lock held)."""
+        for entry in self._resident.values():
+            if entry.nbytes == 0 and entry.loader.ready:
+                entry.nbytes = max(int(getattr(entry.loader.engine, "nbytes", 0)), entry.loader.resident_bytes)
+        # Loads still in flight (and failed ones) hold no weights and are never evicted
+        while self.resident_bytes() > self.budget:
+            victim = next((k for k, e in self._resident.items() if k != keep and e.nbytes), None)
+            if victim is None:
+                break
+            entry = self._resident.pop(victim)
+            self.evictions += 1
+            if entry.broker is not None:
+                threading.Thread(target=entry.broker.close, name="registry-evict", daemon=True).start()
+
+    def resident_bytes(self):
+        return sum(e.nbytes for e in self._resident.values())
+
+    def brokers(self):
+        with self._lock:
+            return {"/".join(k): e.broker for k, e in self._resident.items() if e.broker is not None}
+
+    # ── observability ──
+    def stats(self):
+        with self._lock:
+            # The most recently used model is the one a load would have kept
+            self._settle(next(reversed(self._resident), None))
+            return {
+                "artifacts":      len(self.models),
+                "routes":         len(self.symbols),
+                "resident":       len(self._resident),
+                "resident_bytes": self.resident_bytes(),
+                "budget_bytes":   self.budget,
+                "loads":          self.loads,
+                "evictions":      self.evictions,
+                "hits":           self.hits,
+                "models": {
+                    "/".join(key): {
+                        "path":     e.loader.path,
+                        "status":   e.loader.status,
+                        "bytes":    e.nbytes,
+                        "uses":     e.uses,
+                        "last_use": round(e.last, 3),
+                        **{k: round(v, 1) for k, v in e.loader.timings.items()},
+                    }
+                    for key, e in self._resident.items()
+                },
+            }
+
+    def prometheus(self, prefix="quantumlens_registry"):
+        """Counters and per-model resident bytes in Prometheus text exposition format."""
+        s = self.stats()
+        lines = []
+        for name in ("loads", "evictions", "hits"):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {s[name]}")
+        for name in ("resident_bytes", "budget_bytes"):
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {s[name]}")
+        lines.append(f"# TYPE {prefix}_model_bytes gauge")
+        for key, m in s["models"].items():
+            model, strategy, engine = key.split("/")
+            labels = f'model="{escape_label(model)}",strategy="{strategy}",engine="{engine}"'
+            lines.append(f'{prefix}_model_bytes{{{labels}}} {m["bytes"]}')
+        return "\n".join(lines) + "\n"
+
+
+def _load_scaler(path):
+    import joblib
+    return joblib.load(path)
+
+
+def main(argv=None):
+    from engine import ENGINES
+
+    parser = argparse.ArgumentParser(description="Show which model serves each symbol, optionally loading them.")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--manifest", default=REGISTRY_PATH)
+    parser.add_argument("--strategy", choices=("recursive", "direct"), default="recursive")
+    parser.add_argument("--engine", choices=ENGINES, default="numpy")
+    parser.add_argument("--budget-mb", type=float, default=MODEL_BUDGET_MB)
+    parser.add_argument("--load", action="store_true", help="load every resolved model and report memory")
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry.from_manifest(args.manifest, budget_mb=args.budget_mb)
+    for sym in args.symbols:
+        name = registry.resolve(sym, args.strategy)
+        print(f"{sym.upper():<16} {name:<16} {registry.model_path(name, args.strategy)}")
+        if args.load:
+            registry.assets_for(name, args.engine, args.strategy)
+    if args.load:
+        print(json.dumps(registry.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Single-flight deduplication of identical in-flight work.
+
+At market open many sessions ask for the same ticker at once.  ``SingleFlight``
+lets the first caller for a key (the leader) do the work while every other
+caller with the same key waits on a ``Future`` and shares the result:
+
+    in-process      threads (Streamlit sessions, API handlers) register in a
+                    dict of in-flight futures keyed by the request
+    cross-process   the leader also takes an exclusive ``flock`` on
+                    ``<lock_dir>/<sha1(key)>.lock``; a leader in another process
+                    that finds it held blocks until it is released, then reads
+                    the result file the first process left behind (``share``)
+                    or simply re-runs the work, which by then is a cache hit
+
+Keys must have a stable ``repr`` (tuples of strings and numbers).  Results
+shared across processes are pickled, so they should be small: forecast paths,
+not DataFrames.  Without ``fcntl`` (Windows) only the in-process half applies.
+
+``stats()`` reports how many requests were coalesced onto another caller's
+work, in this process and across processes.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not POSIX
+    fcntl = None
+
+
+FLIGHT_DIR = os.environ.get("QL_FLIGHT_DIR", os.path.join(tempfile.gettempdir(), "quantumlens-flights"))
+RESULT_TTL = 300   # seconds a shared result file is kept for late readers
+_MISSING   = object()
+
+
+class SingleFlight:
+    def __init__(self, lock_dir=FLIGHT_DIR, share=False):
+        self.lock_dir = lock_dir if lock_dir and fcntl is not None else None
+        self.share    = share
+        self._calls   = {}
+        self._lock    = threading.Lock()
+        self._pruned  = 0.0
+        self.leaders          = 0
+        self.coalesced        = 0
+        self.coalesced_remote = 0
+        self.lock_waits       = 0
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def do(self, key, fn, *args):
+        """``fn(*args)``, run once for all concurrent callers with the same ``key``."""
+        return self.do_many([key], lambda keys: [fn(*args)])[0]
+
+    def do_many(self, keys, compute):
+        """Values for ``keys``; ``compute(subset)`` returns values for the keys this caller leads.
+
+        Keys led here are computed together in one ``compute`` call, so a batch
+        keeps its batching; keys another caller is already working on are
+        waited for instead.
+        """
+        futures, mine = [], {}
+        with self._lock:
+            for key in keys:
+                fut = self._calls.get(key)
+                if fut is None:
+                    fut = self._calls[key] = mine[key] = Future()
+                else:
+                    self.coalesced += 1
+                futures.append(fut)
+
+        if mine:
+            try:
+                self._lead(list(mine), compute)
+            except BaseException as exc:
+                with self._lock:
+                    for key, fut in mine.items():
+                        if not fut.done():
+                            if self._calls.get(key) is fut:
+                                del self._calls[key]
+                            fut.set_exception(exc)
+                raise
+        return [fut.result() for fut in futures]
+
+    # ── leader side ──
+    def _lead(self, keys, compute):
+        # A lock is never held while blocking on another one: keys locked here
+        # are computed, published and released before waiting on contended
+        # keys, and those are taken one at a time.  Two processes leading
+        # [A, B] and [B, A] therefore cannot wait on each other.
+        opened, locked, held, contended = [], [], [], []
+        try:
+            for key in keys:
+                f = self._open_lock(key)
+                if f is None:
+                    held.append(key)
+                    continue
+                opened.append(f)
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    locked.append(f)
+                    held.append(key)
+                except BlockingIOError:
+                    contended.append((key, f))
+
+            if held:
+                for key, value in zip(held, compute(held)):
+                    if self.share:
+                        self._write_result(key, value)
+                    self.leaders += 1
+                    self._finish(key, value)
+            for f in locked:
+                f.close()   # closing releases the flock
+
+            # Another process is computing these; wait for it, then reuse its result
+            for key, f in contended:
+                self.lock_waits += 1
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    value = self._read_result(key) if self.share else _MISSING
+                    if value is _MISSING:
+                        value = compute([key])[0]
+                        if self.share:
+                            self._write_result(key, value)
+                        self.leaders += 1
+                    else:
+                        self.coalesced_remote += 1
+                    self._finish(key, value)
+                finally:
+                    f.close()
+        finally:
+            for f in opened:
+                f.close()   # no-op for files already closed above
+
+    def _finish(self, key, value):
+        with self._lock:
+            self._calls.pop(key).set_result(value)
+
+    # ── lock and result files ──
+    def _file(self, key, ext):
+        return os.path.join(self.lock_dir, hashlib.sha1(repr(key).encode()).hexdigest() + ext)
+
+    def _open_lock(self, key):
+        if self.lock_dir is None:
+            return None
+        return open(self._file(key, ".lock"), "a+b")
+
+    def _write_result(self, key, value):
+        if self.lock_dir is None:
+            return
+        path = self._file(key, ".result")
+        tmp  = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self._prune()
+
+    def _read_result(self, key):
+        """The result another process left for ``key``, or ``_MISSING``."""
+        path = self._file(key, ".result")
+        try:
+            if time.time() - os.path.getmtime(path) > RESULT_TTL:
+                return _MISSING
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return _MISSING
+
+    def _prune(self):
+        now = time.time()
+        if now - self._pruned < RESULT_TTL / 5:
+            return
+        self._pruned = now
+        # Lock files stay: unlinking one another process holds would split the lock
+        for entry in os.scandir(self.lock_dir):
+            if not entry.name.endswith(".result"):
+                continue
+            try:
+                if now - entry.stat().st_mtime > RESULT_TTL:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            requests = self.leaders + self.coalesced + self.coalesced_remote
+            return {
+                "leaders":          self.leaders,
+                "coalesced":        self.coalesced,
+                "coalesced_remote": self.coalesced_remote,
+                "lock_waits":       self.lock_waits,
+                "in_flight":        len(self._calls),
+                "coalesced_ratio":  (self.coalesced + self.coalesced_remote) / requests if requests else 0.0,
+                "cross_process":    self.lock_dir is not None,
+            }
+
+    def prometheus(self, prefix="quantumlens_singleflight"):
+        """Counters in Prometheus text exposition format."""
+        s = self.stats()
+        lines = []
+        for name in ("leaders", "coalesced", "coalesced_remote", "lock_waits"):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {s[name]}")
+        lines.append(f"# TYPE {prefix}_in_flight gauge")
+        lines.append(f"{prefix}_in_flight {s['in_flight']}")
+        return "\n".join(lines) + "\n"
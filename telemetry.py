@@ -0,0 +1,314 @@
+"""
+Metrics and tracing for the forecast path.
+
+    QL_TRACE_FILE=trace.json streamlit run app.py   # load it in ui.perfetto.dev or chrome://tracing
+    QL_METRICS_PORT=9464 streamlit run app.py       # Prometheus scrape target next to the app
+    curl localhost:8600/metrics                     # the API serves the same text itself
+
+``span(name, **args)`` times a block.  Every span feeds the
+``quantumlens_span_ms{span=...}`` histogram, and with ``QL_TRACE_FILE`` it is
+also written as a Chrome trace "complete" event (thread, start, duration and
+``args``).  The spans in the tree:
+
+    stage.<name>        each ``StageTimer`` stage of an app forecast
+    download            one provider fetch (``yf.download`` for yfinance)
+    predict             one engine call; ``predict_batch_rows`` counts its rows
+    forecast.recursive  a whole recursive loop, ``forecast.direct`` one pass
+    indicators          a full or incremental indicator update
+    figure.<name>       building one Plotly figure
+    live.tick           folding one poll's bars into a live session
+    http.<route>        one API request
+
+``count`` and ``observe`` add labelled counters and histograms
+(``http_requests``, ``forecasts``, ``downloads``, ``predict_batch_rows``).
+Cache, single-flight, broker and registry counters keep living on their own
+objects; ``exposition`` merges their ``prometheus()`` text with this one into
+a single scrape.
+
+With ``QL_METRICS=0`` every entry point returns before reading the clock, so a
+span costs one attribute check.  Trace events are buffered (up to
+``flush_every`` events or ``flush_secs`` seconds) and appended in Chrome's
+JSON array format, whose closing bracket is optional, so the file can
+be loaded while the process is still running.  Appends take an ``flock``, so
+batch workers can share one trace file.
+"""
+import atexit
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not POSIX
+    fcntl = None
+
+
+METRICS      = os.environ.get("QL_METRICS", "1") != "0"
+TRACE_FILE   = os.environ.get("QL_TRACE_FILE")
+METRICS_PORT = int(os.environ.get("QL_METRICS_PORT", 0))
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+SPAN_BUCKETS_MS = (0.1, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+ROW_BUCKETS     = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+_NOOP = nullcontext()
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.counts  = [0] * (len(self.buckets) + 1)
+        self.sum     = 0.0
+        self.count   = 0
+        self._lock   = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sum   += value
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            cumulative, total = {}, 0
+            for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+                total += n
+                cumulative["+Inf" if bound == float("inf") else f"{bound:g}"] = total
+            return {"buckets": cumulative, "sum": self.sum, "count": self.count,
+                    "mean": self.sum / self.count if self.count else 0.0}
+
+    def prometheus(self, name):
+        snap  = self.snapshot()
+        lines = [f"# TYPE {name} histogram"]
+        for le, n in snap["buckets"].items():
+            lines.append(f'{name}_bucket{{le="{le}"}} {n}')
+        lines.append(f"{name}_sum {snap['sum']}")
+        lines.append(f"{name}_count {snap['count']}")
+        return lines
+
+
+def escape_label(value):
+    r"""A label value as the exposition format quotes it: ``\``, ``"`` and newlines backslash-escaped."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    return "{" + ",".join(f'{k}="{escape_label(v)}"' for k, v in labels) + "}" if labels else ""
+
+
+class Telemetry:
+    """Labelled counters, histograms and an optional Chrome trace for one process."""
+
+    def __init__(self, enabled=METRICS, trace_path=TRACE_FILE, flush_every=512, flush_secs=2.0):
+        self.enabled     = enabled
+        self.trace_path  = trace_path if enabled else None
+        self.flush_every = flush_every
+        self.flush_secs  = flush_secs
+        self.counters    = {}
+        self.histograms  = {}
+        self._events     = []
+        self._threads    = set()
+        self._lock       = threading.Lock()
+        self._write_lock = threading.Lock()
+        if self.trace_path:
+            atexit.register(self.flush)
+            self._start_flusher()
+            # Forked batch workers inherit the buffer but not the thread
+            os.register_at_fork(after_in_child=self._start_flusher)
+
+    def _start_flusher(self):
+        threading.Thread(target=self._flush_loop, name="trace-flush", daemon=True).start()
+
+    # ── recording ──
+    def count(self, name, n=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def observe(self, name, value, buckets=SPAN_BUCKETS_MS, **labels):
+        if not self.enabled:
+            return
+        key  = (name, tuple(sorted(labels.items())))
+        hist = self.histograms.get(key)
+        if hist is None:
+            with self._lock:
+                hist = self.histograms.setdefault(key, Histogram(buckets))
+        hist.observe(value)
+
+    def span(self, name, **args):
+        """Context manager timing the block as ``name``; ``args`` only go to the trace."""
+        if not self.enabled:
+            return _NOOP
+        return self._span(name, args)
+
+    @contextmanager
+    def _span(self, name, args):
+        t0 = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, t0, time.perf_counter_ns(), **args)
+
+    def record(self, name, start_ns, end_ns, **args):
+        """A span measured elsewhere, from two ``perf_counter_ns`` readings."""
+        if not self.enabled:
+            return
+        self.observe("span_ms", (end_ns - start_ns) / 1e6, span=name)
+        if self.trace_path:
+            self._trace(name, start_ns, end_ns, args)
+
+    # ── trace file ──
+    def _trace(self, name, start_ns, end_ns, args):
+        # getpid per event: batch workers fork after this object exists
+        thread = threading.current_thread()
+        pid    = os.getpid()
+        event  = {"name": name, "cat": name.split(".", 1)[0], "ph": "X", "pid": pid, "tid": thread.ident,
+                  "ts": start_ns / 1000, "dur": (end_ns - start_ns) / 1000}
+        if args:
+            event["args"] = {k: v if isinstance(v, (int, float, bool)) else str(v) for k, v in args.items()}
+        with self._lock:
+            if (pid, thread.ident) not in self._threads:
+                self._threads.add((pid, thread.ident))
+                self._events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread.ident,
+                                     "args": {"name": thread.name}})
+            self._events.append(event)
+            full = len(self._events) >= self.flush_every
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Append buffered trace events to ``trace_path``."""
+        with self._lock:
+            events, self._events = self._events, []
+        if not events or not self.trace_path:
+            return
+        with self._write_lock, open(self.trace_path, "a") as f:
+            # Batch workers append to the same file; the lock keeps one "[" and whole lines
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)   # released when the file closes
+            f.seek(0, os.SEEK_END)
+            f.write(("[\n" if f.tell() == 0 else "") + "".join(json.dumps(e) + ",\n" for e in events))
+
+    def _flush_loop(self):
+        # Also covers processes that are killed, or worker processes that skip atexit
+        while True:
+            time.sleep(self.flush_secs)
+            self.flush()
+
+    # ── export ──
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            hists    = dict(self.histograms)
+        return {
+            "enabled":  self.enabled,
+            "trace":    self.trace_path,
+            "counters": {name + _labels(labels): v for (name, labels), v in sorted(counters.items())},
+            "spans":    {dict(labels)["span"]: {k: h.snapshot()[k] for k in ("count", "mean")}
+                         for (name, labels), h in sorted(hists.items()) if name == "span_ms"},
+        }
+
+    def prometheus(self, prefix="quantumlens"):
+        """Counters and histograms in Prometheus text exposition format."""
+        with self._lock:
+            counters = sorted(self.counters.items())
+            hists    = sorted(self.histograms.items(), key=lambda kv: kv[0])
+        lines, typed = [], set()
+        for (name, labels), value in counters:
+            metric = f"{prefix}_{name}_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_labels(labels)} {value}")
+        for (name, labels), hist in hists:
+            metric = f"{prefix}_{name}"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            snap = hist.snapshot()
+            for le, n in snap["buckets"].items():
+                lines.append(f"{metric}_bucket{_labels(labels + (('le', le),))} {n}")
+            lines.append(f"{metric}_sum{_labels(labels)} {snap['sum']}")
+            lines.append(f"{metric}_count{_labels(labels)} {snap['count']}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+TELEMETRY = Telemetry()
+span      = TELEMETRY.span
+count     = TELEMETRY.count
+observe   = TELEMETRY.observe
+
+
+def traced(name):
+    """Decorator running the function inside ``span(name)``."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not TELEMETRY.enabled:
+                return fn(*args, **kwargs)
+            with TELEMETRY.span(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+# ─────────────────────────────────────────────────────────────────
+# EXPOSITION
+# ─────────────────────────────────────────────────────────────────
+def relabel(text, **labels):
+    """Add ``labels`` to every sample in an exposition text (to tell several brokers apart)."""
+    extra = _labels(labels.items())[1:-1]
+    lines = []
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            metric, value = line.rsplit(" ", 1)
+            metric = f"{metric[:-1]},{extra}}}" if metric.endswith("}") else f"{metric}{{{extra}}}"
+            line   = f"{metric} {value}"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def exposition(*parts):
+    """This process's telemetry plus each part's text, one TYPE line and one block per family."""
+    families = OrderedDict()
+    for text in (TELEMETRY.prometheus(),) + parts:
+        current = None
+        for line in text.splitlines():
+            if line.startswith("# TYPE "):
+                current = families.setdefault(line.split()[2], (line, []))
+            elif line and not line.startswith("#") and current is not None:
+                current[1].append(line)
+    return "".join(head + "\n" + "".join(s + "\n" for s in samples) for head, samples in families.values())
+
+
+def serve_metrics(collect, port=METRICS_PORT, host="0.0.0.0"):
+    """Serve ``collect()`` at ``/metrics`` on a daemon thread (for processes without an HTTP server)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = collect().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
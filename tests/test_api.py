@@ -0,0 +1,103 @@
+import json
+import os
+
+import pytest
+
+tornado = pytest.importorskip("tornado")
+from tornado.testing import AsyncHTTPTestCase
+
+from api import Services, make_app
+from engine import MODEL_PATH
+
+
+ROOT  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL = os.path.join(ROOT, MODEL_PATH)
+DAYS  = 5
+
+
+def _events(body):
+    """``[(event, data)]`` parsed from a server-sent events body."""
+    events = []
+    for block in body.decode().strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@pytest.mark.skipif(not os.path.exists(MODEL), reason=f"no {MODEL_PATH}")
+class TestForecastAPI(AsyncHTTPTestCase):
+    @pytest.fixture(autouse=True)
+    def _data_dir(self, tmp_path):
+        self.data_dir = str(tmp_path)
+
+    def get_app(self):
+        self.services = Services("numpy", MODEL, os.path.join(ROOT, "scaler.save"), provider="synthetic",
+                                 data_dir=self.data_dir, threads=2, manifest=None)
+        return make_app(self.services)
+
+    def get_json(self, path, status=200):
+        response = self.fetch(path)
+        assert response.code == status, response.body
+        return response, json.loads(response.body)
+
+    def test_forecast_json_shape(self):
+        response, body = self.get_json(f"/forecast/GAIL.NS?days={DAYS}")
+        assert response.headers["Content-Type"].startswith("application/json")
+        assert "Server-Timing" in response.headers and "X-Response-Time-Ms" in response.headers
+        assert (body["symbol"], body["interval"], body["strategy"], body["cached"]) == ("GAIL.NS", "1d", "recursive", False)
+        assert len(body["dates"]) == len(body["forecast"]) == DAYS
+        assert body["dates"][0] > body["last_date"]
+        assert body["predicted_price"] == pytest.approx(body["forecast"][-1])
+        for key in ("latest_price", "price_change", "pct_change", "is_bullish", "volatility", "momentum"):
+            assert key in body
+
+        # A shorter horizon is a prefix of the cached one
+        _, again = self.get_json("/forecast/gail.ns?days=3")
+        assert again["cached"] and again["forecast"] == body["forecast"][:3]
+
+    def test_forecast_stream_shape(self):
+        response = self.fetch(f"/forecast/GAIL.NS?days={DAYS}&stream=1")
+        assert response.code == 200
+        assert response.headers["Content-Type"] == "text/event-stream"
+        events = _events(response.body)
+        names  = [name for name, _ in events]
+        assert names == ["step"] * DAYS + ["done"]
+        steps, done = [data for _, data in events[:-1]], events[-1][1]
+        assert [s["step"] for s in steps] == list(range(1, DAYS + 1))
+        assert [s["date"] for s in steps] == done["dates"]
+        assert [s["price"] for s in steps] == pytest.approx(done["forecast"])
+        assert not any(s["cached"] for s in steps)
+        elapsed = [data["elapsed_ms"] for _, data in events]
+        assert elapsed == sorted(elapsed)
+
+        # The stream left its path in the cache; the JSON answer and a replay match it
+        _, body = self.get_json(f"/forecast/GAIL.NS?days={DAYS}")
+        assert body["cached"] and body["forecast"] == pytest.approx(done["forecast"])
+        replay = _events(self.fetch(f"/forecast/GAIL.NS?days={DAYS}",
+                                    headers={"Accept": "text/event-stream"}).body)
+        assert all(data["cached"] for name, data in replay if name == "step")
+
+    def test_uncertainty_band_in_json_and_stream(self):
+        _, body = self.get_json(f"/forecast/GAIL.NS?days={DAYS}&samples=32&coverage=80")
+        band = body["uncertainty"]
+        assert (band["method"], band["samples"], band["coverage"]) == ("mc_dropout", 32, 80)
+        assert all(lo <= mid <= hi for lo, mid, hi in zip(band["lower"], band["median"], band["upper"]))
+        assert len(band["median"]) == DAYS
+
+        events = _events(self.fetch(f"/forecast/GAIL.NS?days={DAYS}&samples=32&stream=1").body)
+        assert [name for name, _ in events] == ["step"] * DAYS + ["uncertainty", "done"]
+        band = events[-2][1]
+        assert (band["samples"], band["coverage"]) == (32, 90)
+        assert all(lo <= mid <= hi for lo, mid, hi in zip(band["lower"], band["median"], band["upper"]))
+
+    def test_bad_arguments_are_rejected(self):
+        assert self.get_json("/forecast/GAIL.NS?days=0", 400)[1]["error"] == "days must be between 1 and 60"
+        assert self.get_json("/forecast/GAIL.NS?days=x", 400)[1]["error"] == "days must be an integer"
+        assert self.get_json("/forecast/GAIL.NS?strategy=guess", 400)[1]["status"] == 400
+        assert self.get_json("/forecast/GAIL.NS?interval=2m", 400)[1]["status"] == 400
+        assert self.get_json("/forecast/GAIL.NS?samples=-1", 400)[1]["error"] == "samples must be between 0 and 1000"
+        assert self.get_json("/forecast/GAIL.NS?samples=10&coverage=100&stream=1", 400)[1]["error"] == \
+            "coverage must be between 1 and 99"
+        # Rejected before anything was fetched or forecast
+        assert self.services.store.read("GAIL.NS") is None
+        assert len(self.services.cache) == 0
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from bars import BarStore, bucket_starts, future_index
+from data_store import PriceColumns
+
+
+def _session(day, start="09:15", end="15:30", step=5):
+    return pd.date_range(f"{day} {start}", f"{day} {end}", freq=f"{step}min", inclusive="left")
+
+
+def _columns(index, seed=0):
+    rng   = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.1, len(index)))
+    return PriceColumns(pd.DatetimeIndex(index, name="Date"), {
+        "Open": close, "High": close + 0.05, "Low": close - 0.05, "Close": close,
+        "Volume": np.full(len(index), 100.0)})
+
+
+class _Store:
+    """Stands in for the intraday ``OHLCVStore``: serves whatever ``data`` holds."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def columns(self, symbol, history=None, refresh=False):
+        return self.data
+
+
+def _bars(data):
+    return BarStore(daily=None, intraday=_Store(data), base="5m")
+
+
+def test_revised_forming_bar_updates_every_aggregate():
+    index = _session("2024-03-04").append(_session("2024-03-05")[:20])
+    data  = _columns(index)
+    bars  = _bars(data)
+    for interval in ("15m", "1h"):
+        bars.bars("GAIL.NS", interval)
+
+    close = data["Close"].copy()
+    close[-1] += 11.24
+    revised = PriceColumns(data.index, {**{c: data[c] for c in data.columns}, "Close": close,
+                                        "High": np.maximum(data["High"], close)})
+    bars.intraday.data = revised
+    for interval in ("15m", "1h"):
+        got = bars.bars("GAIL.NS", interval)
+        assert got["Close"][-1] == close[-1]
+        assert got["High"][-1] == revised["High"][-1]
+
+
+def test_missing_opening_bar_keeps_session_anchored_buckets():
+    index  = _session("2024-03-04").append(_session("2024-03-05")[1:])   # no 09:15 bar on day two
+    stamps = index.values.view(np.int64)
+    starts = pd.DatetimeIndex(np.unique(bucket_starts(stamps, "1h")))
+    day2   = starts[starts.normalize() == pd.Timestamp("2024-03-05")]
+    assert [t.strftime("%H:%M") for t in day2] == ["09:15", "10:15", "11:15", "12:15", "13:15", "14:15", "15:15"]
+
+
+def test_held_views_do_not_change_under_updates():
+    index = _session("2024-03-04")
+    bars  = _bars(_columns(index))
+    held  = bars.bars("GAIL.NS", "1h")
+    frozen = held["Close"].copy()
+    bars.intraday.data = _columns(index, seed=1)
+    bars.bars("GAIL.NS", "1h")
+    np.testing.assert_array_equal(held["Close"], frozen)
+
+
+def test_intraday_future_stamps_skip_nights_and_weekends():
+    history = pd.DatetimeIndex([t for day in ("2024-03-07", "2024-03-08")
+                                for t in _session(day, step=60)])          # Thu, Fri; last bar 15:15
+    future  = future_index(history, 9, "1h")
+    assert future[0] == pd.Timestamp("2024-03-11 09:15")                   # Monday's open
+    assert future[6] == pd.Timestamp("2024-03-11 15:15")
+    assert future[7] == pd.Timestamp("2024-03-12 09:15")
+    assert all(t.weekday() < 5 for t in future)
+
+
+def test_daily_future_stamps_are_business_days():
+    future = future_index(pd.DatetimeIndex(["2024-03-07", "2024-03-08"]), 3, "1d")
+    assert list(future) == list(pd.to_datetime(["2024-03-11", "2024-03-12", "2024-03-13"]))
@@ -0,0 +1,91 @@
+import json
+import os
+
+import shutil
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+
+from batch_forecast import main
+from data_store import OHLCVStore
+from engine import MODEL_PATH, NumpyLSTM
+from forecast import forecast_symbols
+from market_data import get_provider
+
+
+ROOT  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL = os.path.join(ROOT, MODEL_PATH)
+
+pytestmark = pytest.mark.skipif(not os.path.exists(MODEL), reason=f"no {MODEL_PATH}")
+
+
+def _run(tmp_path, capsys, tickers, *extra):
+    """Run the CLI on ``tickers``; returns its JSON summary line."""
+    path = tmp_path / "tickers.txt"
+    path.write_text("\n".join(tickers) + "\n")
+    main([str(path), "--out", str(tmp_path / "out.parquet"), "--days", "3",
+          "--model", MODEL, "--scaler", os.path.join(ROOT, "scaler.save"),
+          "--provider", "synthetic", "--data-dir", str(tmp_path / "data"),
+          "--workers", "1", "--chunk", "2", "--manifest", str(tmp_path / "none.json"), *extra])
+    return json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+
+
+def test_a_rerun_resumes_from_the_finished_parts(tmp_path, capsys):
+    first = _run(tmp_path, capsys, ["A.NS", "B.NS", "C.NS"])
+    assert (first["processed"], first["resumed"], first["ok"], first["rows"]) == (3, 0, 3, 3)
+    with open(tmp_path / "out.parquet.parts" / "run.json") as f:
+        assert json.load(f)["days"] == 3
+
+    second = _run(tmp_path, capsys, ["A.NS", "B.NS", "C.NS", "D.NS", "E.NS"])
+    assert (second["processed"], second["resumed"], second["rows"]) == (2, 3, 5)
+
+    table = pd.read_parquet(tmp_path / "out.parquet")
+    assert list(table["symbol"]) == ["A.NS", "B.NS", "C.NS", "D.NS", "E.NS"]
+    assert (table["status"] == "ok").all() and table["forecast"].map(len).eq(3).all()
+
+    again = _run(tmp_path, capsys, ["A.NS", "B.NS", "C.NS", "D.NS", "E.NS"])
+    assert (again["processed"], again["resumed"]) == (0, 5)
+
+
+def test_error_rows_are_retried(tmp_path, capsys):
+    _run(tmp_path, capsys, ["A.NS", "B.NS"])
+    # Turn B's finished row into a failed one, as if its download had timed out
+    parts = tmp_path / "out.parquet.parts"
+    for part in parts.glob("part-*.parquet"):
+        table = pd.read_parquet(part)
+        table.loc[table["symbol"] == "B.NS", "status"] = "error"
+        table.to_parquet(part, index=False)
+
+    summary = _run(tmp_path, capsys, ["A.NS", "B.NS"])
+    assert (summary["processed"], summary["resumed"]) == (1, 1)
+    assert pd.read_parquet(tmp_path / "out.parquet").set_index("symbol").loc["B.NS", "status"] == "ok"
+
+
+def test_changed_settings_refuse_to_resume(tmp_path, capsys):
+    _run(tmp_path, capsys, ["A.NS"])
+    with pytest.raises(SystemExit, match="different settings"):
+        _run(tmp_path, capsys, ["A.NS"], "--days", "4")
+    assert _run(tmp_path, capsys, ["A.NS"], "--days", "4", "--fresh")["processed"] == 1
+
+
+def test_symbols_are_forecast_with_the_model_the_manifest_maps_them_to(tmp_path, capsys):
+    shutil.copy(MODEL, tmp_path / "banks.h5")
+    banks = MinMaxScaler().fit(np.array([[10.0], [1000.0]]))
+    joblib.dump(banks, tmp_path / "banks.save")
+    manifest = tmp_path / "models.json"
+    manifest.write_text(json.dumps({"models": {"banks": {"model": "banks.h5", "scaler": "banks.save"}},
+                                    "symbols": {"*BANK.NS": "banks"}}))
+
+    summary = _run(tmp_path, capsys, ["HDFCBANK.NS", "GAIL.NS", "AXISBANK.NS"], "--manifest", str(manifest))
+    assert summary["ok"] == 3
+    table = pd.read_parquet(tmp_path / "out.parquet").set_index("symbol")
+    assert table["model"].to_dict() == {"AXISBANK.NS": "banks", "GAIL.NS": "default", "HDFCBANK.NS": "banks"}
+
+    fetch = get_provider("synthetic")
+    store = OHLCVStore(str(tmp_path / "data" / fetch.name), fetch=fetch)
+    data  = store.columns("HDFCBANK.NS")
+    expected, _ = forecast_symbols(NumpyLSTM(MODEL), banks, {"HDFCBANK.NS": data}, 3)
+    np.testing.assert_allclose(table.loc["HDFCBANK.NS", "forecast"], expected["HDFCBANK.NS"]["forecast"], rtol=1e-6)
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from broker import InferenceBroker
+
+
+class _Gated:
+    """Engine whose first ``predict`` blocks until released, so requests pile up behind it."""
+
+    name    = "gated"
+    path    = "gated.h5"
+    outputs = 1
+
+    def __init__(self):
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.batches = []
+
+    def predict(self, x):
+        self.batches.append(len(x))
+        if len(self.batches) == 1:
+            self.entered.set()
+            assert self.release.wait(10)
+        if np.isnan(x).any():
+            raise ValueError("nan input")
+        return x[:, -1, :] * 2
+
+
+def _rows(value, n=1):
+    return np.full((n, 100, 1), value, dtype=np.float32)
+
+
+def _blocked_broker(**kwargs):
+    engine = _Gated()
+    broker = InferenceBroker(engine, **kwargs)
+    first  = broker.submit(_rows(0))
+    assert engine.entered.wait(10)
+    return engine, broker, first
+
+
+def test_requests_queued_behind_a_call_share_the_next_one():
+    engine, broker, first = _blocked_broker(max_wait=0)
+    futures = [broker.submit(_rows(i, n=i)) for i in range(1, 5)]
+    engine.release.set()
+
+    assert first.result(10).tolist() == [[0.0]]
+    for i, fut in enumerate(futures, 1):
+        np.testing.assert_array_equal(fut.result(10), np.full((i, 1), 2.0 * i))
+    assert engine.batches == [1, 1 + 2 + 3 + 4]
+    stats = broker.stats()
+    assert (stats["calls"], stats["requests"], stats["rows"]) == (2, 5, 11)
+    broker.close()
+
+
+def test_batches_never_exceed_max_batch():
+    engine, broker, first = _blocked_broker(max_batch=4, max_wait=0)
+    futures = [broker.submit(_rows(i, n=3)) for i in range(1, 4)]
+    engine.release.set()
+    for i, fut in enumerate(futures, 1):
+        np.testing.assert_array_equal(fut.result(10), np.full((3, 1), 2.0 * i))
+    assert engine.batches == [1, 3, 3, 3]
+    broker.close()
+
+
+def test_a_failed_call_fails_every_request_in_it():
+    engine, broker, first = _blocked_broker(max_wait=0)
+    good, bad = broker.submit(_rows(1)), broker.submit(_rows(np.nan))
+    engine.release.set()
+    first.result(10)
+    for fut in (good, bad):
+        with pytest.raises(ValueError):
+            fut.result(10)
+    # The broker thread survives the failure
+    assert broker.predict(_rows(3)).tolist() == [[6.0]]
+    broker.close()
+
+
+def test_close_drains_queued_requests_and_serves_later_ones_inline():
+    engine, broker, first = _blocked_broker(max_wait=0)
+    queued = [broker.submit(_rows(i)) for i in range(1, 4)]
+    closer = threading.Thread(target=broker.close)
+    closer.start()
+    deadline = time.monotonic() + 10
+    while not broker._stop.is_set():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+    engine.release.set()
+    closer.join(10)
+    assert not closer.is_alive() and not broker._thread.is_alive()
+
+    assert first.result(0).tolist() == [[0.0]]
+    for i, fut in enumerate(queued, 1):
+        assert fut.result(0).tolist() == [[2.0 * i]]
+    late = broker.submit(_rows(7))
+    assert late.done() and late.result().tolist() == [[14.0]]
+    # Everything after the blocked call ran unbatched on the closing thread
+    assert engine.batches == [1, 1, 1, 1, 1]
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from charts import CONTEXT_POINTS, MAX_POINTS, view_indices
+
+
+def _series(n=2520):
+    return pd.bdate_range("2000-01-03", periods=n), np.random.default_rng(0).normal(size=n).cumsum()
+
+
+def test_max_view_keeps_recent_bars_dense():
+    dates, y = _series()
+    idx = view_indices(dates, y)
+    assert len(idx) == MAX_POINTS
+    assert np.all(np.diff(idx) > 0) and idx[0] == 0
+    np.testing.assert_array_equal(idx[-CONTEXT_POINTS:], np.arange(len(y) - CONTEXT_POINTS, len(y)))
+
+
+def test_window_view_is_dense_with_sparse_context():
+    dates, y = _series()
+    idx = view_indices(dates, y, window=252)
+    np.testing.assert_array_equal(idx[-252:], np.arange(len(y) - 252, len(y)))
+    assert len(idx) == 252 + CONTEXT_POINTS - 1
+
+
+def test_short_series_is_not_sampled():
+    dates, y = _series(500)
+    np.testing.assert_array_equal(view_indices(dates, y), np.arange(500))
@@ -0,0 +1,118 @@
+import json
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+from data_store import OHLCVStore, PriceColumns, write_columns
+
+
+def _frame(n=30):
+    index = pd.date_range("2024-01-01", periods=n, freq="B", name="Date")
+    close = np.linspace(100, 110, n)
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": np.full(n, 1000.0)}, index=index)
+
+
+def _seed(root, prefix, n):
+    store = OHLCVStore(root, fetch=lambda *a, **k: None)
+    for i in range(n):
+        store.seed(f"{prefix}{i}.NS", _frame())
+        store.get(f"{prefix}{i}.NS")
+
+
+def test_processes_sharing_a_root_keep_each_others_index_entries(tmp_path):
+    ctx   = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_seed, args=(str(tmp_path), p, 25)) for p in "ABCD"]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=60)
+    assert all(p.exitcode == 0 for p in procs)
+
+    with open(tmp_path / "_index.json") as f:
+        index = json.load(f)
+    assert len(index) == 100 == len(list(tmp_path.glob("*.parquet")))
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def _rewrite(root, n):
+    store = OHLCVStore(root, fetch=lambda *a, **k: None)
+    for i in range(n):
+        store.seed("GAIL.NS", _frame(30 + i % 5))
+
+
+def test_processes_rewriting_one_symbol_do_not_collide(tmp_path):
+    ctx   = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_rewrite, args=(str(tmp_path), 20)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=60)
+    assert all(p.exitcode == 0 for p in procs)
+    assert not list(tmp_path.glob("*.tmp"))
+    store = OHLCVStore(str(tmp_path), fetch=lambda *a, **k: None)
+    assert 30 <= len(store.read("GAIL.NS")) < 35
+    assert 30 <= len(store.columns("GAIL.NS", history=None)) < 35
+
+
+def test_read_only_hits_do_not_rewrite_the_index(tmp_path):
+    store = OHLCVStore(str(tmp_path), fetch=lambda *a, **k: None)
+    store.seed("GAIL.NS", _frame())
+    before = (tmp_path / "_index.json").stat().st_mtime_ns
+    for _ in range(5):
+        assert len(store.get("GAIL.NS")) == 30
+    assert (tmp_path / "_index.json").stat().st_mtime_ns == before
+
+
+def test_price_columns_round_trip_through_the_memory_map(tmp_path):
+    data = _frame(50)
+    data["Close"] += np.linspace(0, 0.123, 50)
+    path = str(tmp_path / "GAIL.cols")
+    write_columns(path, data)
+
+    cols = PriceColumns.open(path)
+    assert list(cols.columns) == list(data.columns) and len(cols) == 50
+    assert cols.index.equals(data.index)
+    pd.testing.assert_frame_equal(cols.to_frame(), data.astype("float32").astype("float64"), check_freq=False)
+
+    # Slices are views of the same pages
+    part = cols.iloc[10:20]
+    assert np.shares_memory(part["Open"], cols["Open"])
+    assert part.index.equals(data.index[10:20])
+    np.testing.assert_array_equal(cols.window(pd.DateOffset(days=7))["Close"],
+                                  data["Close"].iloc[-6:].to_numpy(dtype=np.float32))
+
+
+def test_store_columns_are_mapped_once_per_file_version(tmp_path):
+    store = OHLCVStore(str(tmp_path), fetch=lambda *a, **k: None)
+    store.seed("GAIL.NS", _frame(30))
+    first = store.columns("GAIL.NS", history=None)
+    assert store.columns("GAIL.NS", history=None) is first
+
+    store.seed("GAIL.NS", _frame(40))
+    second = store.columns("GAIL.NS", history=None)
+    assert len(second) == 40 and len(first) == 30
+    assert store.columns("UNKNOWN.NS").empty
+
+
+def test_an_empty_refresh_keeps_the_copy_stale_and_backs_off(tmp_path):
+    calls = []
+
+    def fetch(symbol, start=None):
+        calls.append(start)
+        return None
+
+    store = OHLCVStore(str(tmp_path), fetch=fetch, max_age=60, retry_after=60)
+    store.seed("GAIL.NS", _frame(), refreshed_at=0)
+    refreshed = store._index["GAIL.NS"]["refreshed"]
+
+    assert len(store.get("GAIL.NS")) == 30
+    assert calls == ["2024-02-09"]
+    assert store._index["GAIL.NS"]["refreshed"] == refreshed == 0
+    # Within the retry window the stale copy is served without another download
+    assert len(store.get("GAIL.NS")) == 30 and len(calls) == 1
+
+    store._retry_at["GAIL.NS"] = 0
+    store.get("GAIL.NS")
+    assert len(calls) == 2
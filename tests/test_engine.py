@@ -0,0 +1,36 @@
+import os
+
+import numpy as np
+import pytest
+
+from engine import MODEL_PATH, NumpyLSTM, check_parity
+from forecast import recursive_forecast
+
+
+MODEL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), MODEL_PATH)
+
+pytestmark = pytest.mark.skipif(not os.path.exists(MODEL), reason=f"no {MODEL_PATH}")
+
+
+def test_numpy_engine_matches_keras():
+    pytest.importorskip("tensorflow")
+    from engine import KerasEngine
+
+    numpy_engine, keras_engine = NumpyLSTM(MODEL), KerasEngine(MODEL)
+    assert numpy_engine.outputs == keras_engine.outputs
+    for batch in (1, 8):
+        assert check_parity(numpy_engine, keras_engine, batch=batch) <= 1e-5
+
+    # Errors compound in the recursive loop, so compare whole forecast paths too
+    windows = np.random.default_rng(1).random((3, 100), dtype=np.float32)
+    np.testing.assert_allclose(recursive_forecast(numpy_engine, windows, 10),
+                               recursive_forecast(keras_engine, windows, 10), atol=1e-5)
+
+
+def test_scratch_buffers_do_not_leak_between_batch_shapes():
+    engine = NumpyLSTM(MODEL)
+    x      = np.random.default_rng(2).random((4, 100, 1), dtype=np.float32)
+    first  = engine.predict(x).copy()
+    engine.predict(x[:1])
+    engine.predict(x[:, :50])
+    np.testing.assert_array_equal(engine.predict(x), first)
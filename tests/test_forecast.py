@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+
+from engine import MODEL_PATH, NumpyLSTM
+from forecast import band_percentiles, forecast_symbols, mc_dropout_paths, percentile_bands, recursive_forecast
+
+
+MODEL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), MODEL_PATH)
+
+pytestmark = pytest.mark.skipif(not os.path.exists(MODEL), reason=f"no {MODEL_PATH}")
+
+
+def _frame(seed, n=150):
+    rng   = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    index = pd.date_range("2024-01-01", periods=n, freq="B", name="Date")
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close,
+                         "Volume": np.full(n, 1000.0)}, index=index)
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return NumpyLSTM(MODEL)
+
+
+@pytest.fixture(scope="module")
+def scaler():
+    return MinMaxScaler().fit(np.array([[50.0], [200.0]]))
+
+
+def test_batched_forecasts_equal_one_at_a_time(engine, scaler):
+    frames = {f"S{i}.NS": _frame(i) for i in range(5)}
+    frames["SHORT.NS"] = _frame(9, n=40)
+
+    batched, skipped = forecast_symbols(engine, scaler, frames, 7)
+    assert set(batched) == {f"S{i}.NS" for i in range(5)}
+    assert skipped == {"SHORT.NS": "only 40 bars, need 100"}
+
+    for symbol in batched:
+        alone, _ = forecast_symbols(engine, scaler, {symbol: frames[symbol]}, 7)
+        np.testing.assert_allclose(batched[symbol]["forecast"], alone[symbol]["forecast"], rtol=1e-5)
+        assert batched[symbol]["predicted_price"] == pytest.approx(alone[symbol]["predicted_price"], rel=1e-5)
+        assert batched[symbol]["latest_price"] == frames[symbol]["Open"].iloc[-1]
+
+
+def test_nan_gaps_are_skipped_before_windowing(engine, scaler):
+    clean = _frame(3)
+    gappy = clean.copy()
+    gappy.iloc[-30:-25, 0] = np.nan
+    a, _ = forecast_symbols(engine, scaler, {"X": gappy}, 3)
+    b, _ = forecast_symbols(engine, scaler, {"X": clean.drop(clean.index[-30:-25])}, 3)
+    np.testing.assert_array_equal(a["X"]["forecast"], b["X"]["forecast"])
+
+
+def test_mc_dropout_bands_are_ordered_around_the_median(engine, scaler):
+    window = scaler.transform(_frame(4)["Open"].to_numpy()[-100:].reshape(-1, 1)).ravel()
+    paths  = mc_dropout_paths(engine, window, 10, samples=64, seed=0)
+    assert paths.shape == (64, 10)
+    # Dropout is on: the samples differ from each other and from the deterministic path
+    assert paths[:, 0].std() > 0
+    assert not np.allclose(paths.mean(axis=0), recursive_forecast(engine, window, 10)[0])
+    np.testing.assert_array_equal(paths, mc_dropout_paths(engine, window, 10, samples=64, seed=0))
+
+    lo, hi = band_percentiles(90)
+    assert (lo, hi) == (5, 95)
+    prices = scaler.inverse_transform(paths.reshape(-1, 1)).reshape(paths.shape)
+    bands  = percentile_bands(prices, (lo, 50, hi))
+    assert np.all(bands[lo] <= bands[50]) and np.all(bands[50] <= bands[hi])
+    assert np.all(bands[lo] < bands[hi])
+    # A wider interval contains the narrower one
+    wide = percentile_bands(prices, band_percentiles(98))
+    assert np.all(wide[1] <= bands[lo]) and np.all(bands[hi] <= wide[99])
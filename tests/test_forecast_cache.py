@@ -0,0 +1,65 @@
+import numpy as np
+
+from forecast import recursive_forecast
+from forecast_cache import ForecastCache
+from singleflight import SingleFlight
+
+
+class _Counting:
+    """Deterministic stand-in model that records how many rows it was asked for."""
+
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+        self.rows  = 0
+
+    def predict(self, x):
+        self.calls += 1
+        self.rows  += len(x)
+        return x[:, -1:, 0] * 0.99 + x[:, -2:-1, 0] * 0.02
+
+
+def _cache(**kwargs):
+    return ForecastCache(flights=SingleFlight(lock_dir=None), **kwargs)
+
+
+def test_shorter_and_longer_horizons_reuse_the_cached_prefix():
+    windows = np.random.default_rng(0).random((2, 100), dtype=np.float32)
+    keys    = [("A", "1d", "t0"), ("B", "1d", "t0")]
+    full    = recursive_forecast(_Counting(), windows, 12)
+
+    engine, cache = _Counting(), _cache()
+    np.testing.assert_array_equal(cache.forecast_many(engine, keys, windows, 5), full[:, :5])
+    assert (engine.calls, cache.misses) == (5, 2)
+
+    np.testing.assert_array_equal(cache.forecast_many(engine, keys, windows, 3), full[:, :3])
+    assert (engine.calls, cache.hits) == (5, 2)
+
+    # Only the 7 missing steps are run, resuming from the stored tail
+    np.testing.assert_array_equal(cache.forecast_many(engine, keys, windows, 12), full)
+    assert (engine.calls, cache.partial) == (12, 2)
+    assert cache.stats()["steps_saved"] == 2 * 3 + 2 * 5
+
+
+def test_misses_and_partials_share_one_batch():
+    windows = np.random.default_rng(1).random((3, 100), dtype=np.float32)
+    engine, cache = _Counting(), _cache()
+    cache.forecast(engine, "A", windows[0], 4)
+    engine.calls = engine.rows = 0
+
+    out = cache.forecast_many(engine, ["A", "B", "C"], windows, 6)
+    np.testing.assert_array_equal(out, recursive_forecast(_Counting(), windows, 6))
+    assert engine.calls == 6
+
+
+def test_peek_never_computes_and_lru_evicts():
+    windows = np.random.default_rng(2).random((3, 100), dtype=np.float32)
+    engine, cache = _Counting(), _cache(max_entries=2)
+    assert cache.peek("A", 1) is None
+    for key, window in zip("ABC", windows):
+        cache.forecast(engine, key, window, 2)
+    assert cache.peek("A", 1) is None
+    assert cache.peek("C", 3) is None
+    np.testing.assert_array_equal(cache.peek("C", 2), recursive_forecast(_Counting(), windows[2], 2)[0])
+    assert (len(cache), cache.evictions) == (2, 1)
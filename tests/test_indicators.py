@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import IndicatorEngine
+
+
+def _frame(n=300, seed=7):
+    rng   = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    index = pd.date_range("2023-01-02", periods=n, freq="B", name="Date")
+    return pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+                         "Volume": rng.integers(1e5, 1e6, n).astype(float)}, index=index)
+
+
+def _pandas(data):
+    """The app's original pandas computations."""
+    close = data["Close"]
+    delta = close.diff()
+    gain  = delta.clip(lower=0).rolling(14).mean()
+    loss  = (-delta.clip(upper=0)).rolling(14).mean()
+    avg_g = np.mean(np.clip(np.diff(close.values), 0, None)[-14:])
+    avg_l = np.mean(np.clip(-np.diff(close.values), 0, None)[-14:])
+    ema12 = close.ewm(span=12, adjust=False).mean().iloc[-1]
+    ema26 = close.ewm(span=26, adjust=False).mean().iloc[-1]
+    return {
+        "close":    close.values,
+        "rsi":      (100 - 100 / (1 + gain / loss)).values,
+        "bb_mid":   close.rolling(20).mean().values,
+        "bb_std":   close.rolling(20).std().values,
+        "ma50":     close.rolling(50).mean().values,
+        "rsi_last": 100 - 100 / (1 + avg_g / avg_l) if avg_l != 0 else 50.0,
+        "macd":     ema12 - ema26,
+        "high_52w": data["High"].tail(252).max(),
+        "low_52w":  data["Low"].tail(252).min(),
+        "vol_avg":  int(data["Volume"].tail(30).mean()),
+    }
+
+
+def _assert_parity(got, want):
+    for key, value in want.items():
+        np.testing.assert_allclose(got[key], value, rtol=1e-9, atol=1e-9, err_msg=key)
+
+
+def _revise_last(data, factor):
+    data = data.copy()
+    data.iloc[-1, data.columns.get_indexer(["Close", "High", "Low"])] *= factor
+    data.iloc[-1, data.columns.get_loc("Volume")] += 12345
+    return data
+
+
+@pytest.mark.parametrize("factor", [1.1, 0.9])
+def test_revised_last_bar_matches_pandas(factor):
+    engine = IndicatorEngine()
+    data   = _frame()
+    engine.get("GAIL.NS", data)
+    revised = _revise_last(data, factor)
+    _assert_parity(engine.get("GAIL.NS", revised), _pandas(revised))
+    assert engine.stats()["full"] == 1
+
+
+def test_revised_last_bar_followed_by_new_bars_matches_pandas():
+    engine = IndicatorEngine()
+    full   = _frame(320)
+    engine.get("GAIL.NS", full.iloc[:300])
+    revised = pd.concat([_revise_last(full.iloc[:300], 1.05), full.iloc[300:]])
+    _assert_parity(engine.get("GAIL.NS", revised), _pandas(revised))
+
+
+def test_repeated_revisions_of_a_forming_bar():
+    engine = IndicatorEngine()
+    data   = _frame()
+    engine.get("GAIL.NS", data)
+    for factor in (1.02, 0.97, 1.04):
+        data = _revise_last(data, factor)
+        _assert_parity(engine.get("GAIL.NS", data), _pandas(data))
+
+
+def test_unchanged_last_bar_takes_the_shortcut():
+    engine = IndicatorEngine()
+    data   = _frame()
+    first  = engine.get("GAIL.NS", data)
+    again  = engine.get("GAIL.NS", data.copy())
+    assert engine.stats()["unchanged"] == 1
+    assert again["rsi_last"] == first["rsi_last"] and again["macd"] == first["macd"]
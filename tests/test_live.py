@@ -0,0 +1,89 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+
+from bars import future_index
+from data_store import OHLCVStore
+from engine import MODEL_PATH, NumpyLSTM
+from forecast import forecast_symbols
+from forecast_cache import ForecastCache
+from indicators import IndicatorState
+from live import LIVE_SERIES, LiveSession, ReplaySource
+from singleflight import SingleFlight
+
+
+MODEL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), MODEL_PATH)
+
+pytestmark = pytest.mark.skipif(not os.path.exists(MODEL), reason=f"no {MODEL_PATH}")
+
+
+def _frame(n=260, index=None):
+    rng   = np.random.default_rng(7)
+    index = pd.bdate_range("2023-01-02", periods=n, name="Date") if index is None else index
+    n     = len(index)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({"Open": close * (1 + rng.normal(0, 0.002, n)), "High": close * 1.01,
+                         "Low": close * 0.99, "Close": close, "Volume": rng.integers(1000, 5000, n).astype(float)},
+                        index=index)
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return NumpyLSTM(MODEL)
+
+
+@pytest.fixture(scope="module")
+def scaler():
+    return MinMaxScaler().fit(np.array([[50.0], [200.0]]))
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_every_tick_matches_a_full_recompute(tmp_path, engine, scaler, cached):
+    store = OHLCVStore(str(tmp_path), fetch=lambda *a, **k: None)
+    store.seed("GAIL.NS", _frame())
+    full  = store.columns("GAIL.NS", history=None).to_frame()
+    cache = ForecastCache(flights=SingleFlight(lock_dir=None)) if cached else None
+
+    source  = ReplaySource(store, "GAIL.NS", bars=12, per_tick=5)
+    session = LiveSession("GAIL.NS", source, engine, scaler, days=4, cache=cache, window=60)
+    while not session.exhausted:
+        update = session.tick()
+        seen   = full.loc[:session.last]
+        assert update["dates"].equals(seen.index[-update["bars"]:])
+
+        snap = IndicatorState.from_frame(seen).snapshot()
+        for name in LIVE_SERIES:
+            np.testing.assert_allclose(update["series"][name], snap[name][-update["bars"]:], rtol=1e-9)
+        np.testing.assert_array_equal(update["series"]["open"], seen["Open"].to_numpy()[-update["bars"]:])
+        assert update["rsi"] == pytest.approx(snap["rsi_last"])
+        assert update["macd"] == pytest.approx(snap["macd"])
+
+        results, _ = forecast_symbols(engine, scaler, {"GAIL.NS": seen}, 4)
+        np.testing.assert_allclose(update["forecast"], results["GAIL.NS"]["forecast"], rtol=1e-5)
+        assert update["metrics"]["latest_price"] == pytest.approx(results["GAIL.NS"]["latest_price"])
+        assert update["future"].equals(future_index(seen.index, 4, "1d"))
+
+    assert (session.ticks, session.bars) == (3, 12)
+    assert session.last == full.index[-1]
+    view = session.view()
+    assert view["bars"] == 60 and view["dates"].equals(full.index[-60:])
+
+
+def test_intraday_future_bars_follow_the_session(tmp_path, engine, scaler):
+    # 09:15-15:30 in 15-minute bars, 10 sessions
+    days  = pd.bdate_range("2024-03-04", periods=10)
+    index = pd.DatetimeIndex([d + pd.Timedelta(minutes=555 + 15 * i) for d in days for i in range(25)], name="Date")
+    store = OHLCVStore(str(tmp_path), fetch=lambda *a, **k: None)
+    store.seed("GAIL.NS", _frame(index=index))
+    full  = store.columns("GAIL.NS", history=None).to_frame()
+
+    source  = ReplaySource(store, "GAIL.NS", bars=30, per_tick=4)
+    session = LiveSession("GAIL.NS", source, engine, scaler, days=30, interval="15m")
+    while not session.exhausted:
+        update = session.tick()
+        assert update["future"].equals(future_index(full.loc[:session.last].index, 30, "15m"))
+    future = session.view()["future"]
+    assert future[0] == pd.Timestamp("2024-03-18 09:15") and future[-1] == pd.Timestamp("2024-03-19 10:15")
@@ -0,0 +1,24 @@
+from pipeline import STAGE_LABELS, STAGES, StageTimer
+
+
+def test_progress_only_moves_forward_through_every_stage():
+    seen  = []
+    timer = StageTimer(on_progress=lambda done, total, label: seen.append((done, total, label)))
+    for name in STAGES:
+        with timer.stage(name):
+            pass
+    done = [d for d, _, _ in seen]
+    assert done == sorted(done) and done[-1] == len(STAGES)
+    assert {total for _, total, _ in seen} == {len(STAGES)}
+    assert all(name in STAGE_LABELS for name in STAGES)
+    assert list(timer.record()["stages_ms"]) == list(STAGES)
+
+
+def test_reentering_a_stage_adds_to_its_total():
+    timer = StageTimer(("a", "b"))
+    with timer.stage("a"):
+        pass
+    first = timer.timings["a"]
+    with timer.stage("a"):
+        sum(range(10000))
+    assert timer.timings["a"] > first and timer.done == 1
@@ -0,0 +1,60 @@
+import json
+import os
+import shutil
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+
+from data_store import OHLCVStore
+from engine import MODEL_PATH
+from forecast_cache import ForecastCache, scaler_fingerprint
+from indicators import IndicatorEngine
+from market_data import get_provider
+from precompute import Precomputer, group_by_exchange, next_close
+from registry import ModelRegistry
+from singleflight import SingleFlight
+
+
+ROOT  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL = os.path.join(ROOT, MODEL_PATH)
+
+
+def test_next_close_skips_weekends_and_passed_closes():
+    # Friday 2024-03-08 16:00 IST is after the NSE close plus delay
+    friday = pd.Timestamp("2024-03-08 16:00", tz="Asia/Kolkata")
+    assert next_close("NSE/BSE", friday, delay_min=20) == pd.Timestamp("2024-03-11 15:50", tz="Asia/Kolkata")
+    assert next_close("NSE/BSE", friday - pd.Timedelta(hours=2), delay_min=20) == \
+        pd.Timestamp("2024-03-08 15:50", tz="Asia/Kolkata")
+    assert group_by_exchange(["gail.ns", "AAPL", "VOD.L", "TCS.BO"]) == \
+        {"NSE/BSE": ["GAIL.NS", "TCS.BO"], "NYSE/NASDAQ": ["AAPL"], "LSE": ["VOD.L"]}
+
+
+@pytest.mark.skipif(not os.path.exists(MODEL), reason=f"no {MODEL_PATH}")
+def test_each_symbol_is_cached_under_the_model_it_resolves_to(tmp_path):
+    shutil.copy(MODEL, tmp_path / "banks.h5")
+    banks = MinMaxScaler().fit(np.array([[10.0], [1000.0]]))
+    joblib.dump(banks, tmp_path / "banks.save")
+    manifest = tmp_path / "models.json"
+    manifest.write_text(json.dumps({"models": {"banks": {"model": "banks.h5", "scaler": "banks.save"}},
+                                    "symbols": {"*BANK.NS": "banks"}}))
+    registry = ModelRegistry.from_manifest(str(manifest))
+    registry.models["default"].update(model=MODEL, scaler=os.path.join(ROOT, "scaler.save"))
+
+    def load_assets(sym):
+        if sym == "BROKEN.NS":
+            raise FileNotFoundError("no model")
+        return registry.assets(sym)
+
+    store = OHLCVStore(str(tmp_path / "data"), fetch=get_provider("synthetic"))
+    cache = ForecastCache(flights=SingleFlight(lock_dir=None))
+    pre   = Precomputer(store, load_assets, cache, IndicatorEngine(), ["HDFCBANK.NS", "GAIL.NS", "BROKEN.NS"], horizon=5)
+
+    summary = pre.run()
+    assert (summary["symbols"], summary["forecast"]) == (3, 2)
+    assert summary["failed"] == {"BROKEN.NS": "FileNotFoundError: no model"}
+    scalers = {key[0]: key[4] for key in cache._entries}
+    assert scalers == {"HDFCBANK.NS": scaler_fingerprint(banks),
+                       "GAIL.NS": scaler_fingerprint(joblib.load(os.path.join(ROOT, "scaler.save")))}
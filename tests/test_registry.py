@@ -0,0 +1,97 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import engine as engine_module
+from engine import MODEL_PATH, NumpyLSTM
+from registry import DEFAULT, ModelRegistry
+
+
+ROOT  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL = os.path.join(ROOT, MODEL_PATH)
+
+pytestmark = pytest.mark.skipif(not os.path.exists(MODEL), reason=f"no {MODEL_PATH}")
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    """Three artifacts (copies of the default pair) routed by exact symbol and pattern."""
+    models = {}
+    for name in ("a", "b", "c"):
+        shutil.copy(MODEL, tmp_path / f"{name}.h5")
+        shutil.copy(os.path.join(ROOT, "scaler.save"), tmp_path / f"{name}.save")
+        models[name] = {"model": f"{name}.h5", "scaler": f"{name}.save"}
+    path = tmp_path / "models.json"
+    path.write_text(json.dumps({"models": models, "symbols": {"AAA": "a", "*.BB": "b", "CCC": "c"}}))
+    return str(path)
+
+
+@pytest.fixture
+def weight_bytes(monkeypatch):
+    # RSS growth of a load depends on whatever else the process has done; count weights only
+    monkeypatch.setattr(engine_module, "_rss", lambda: 0)
+    return NumpyLSTM(MODEL).nbytes
+
+
+def _budget_mb(models, weight_bytes):
+    return (models + 0.5) * weight_bytes / (1024 * 1024)
+
+
+def test_resolution_order(manifest):
+    registry = ModelRegistry.from_manifest(manifest)
+    assert registry.resolve("aaa") == "a"
+    assert registry.resolve("X.BB") == "b"
+    assert registry.resolve("GAIL.NS") == DEFAULT
+    # No direct model in the artifact: the default pair serves it
+    assert registry.resolve("AAA", "direct") == DEFAULT
+    assert registry.group(["AAA", "X.BB", "Y.BB", "GAIL.NS"]) == {"a": ["AAA"], "b": ["X.BB", "Y.BB"], DEFAULT: ["GAIL.NS"]}
+
+
+def test_least_recently_used_models_are_evicted_over_budget(manifest, weight_bytes):
+    registry = ModelRegistry.from_manifest(manifest, budget_mb=_budget_mb(2, weight_bytes))
+    held, _ = registry.assets("AAA")
+    registry.assets("X.BB")
+    registry.assets("CCC")
+    stats = registry.stats()
+    assert set(stats["models"]) == {"b/recursive/numpy", "c/recursive/numpy"}
+    assert (stats["loads"], stats["evictions"]) == (3, 1)
+    assert stats["resident_bytes"] == 2 * weight_bytes <= stats["budget_bytes"]
+
+    # Using b makes c the oldest, so reloading a evicts c
+    registry.assets("Y.BB")
+    registry.assets("AAA")
+    assert set(registry.stats()["models"]) == {"a/recursive/numpy", "b/recursive/numpy"}
+    assert registry.evictions == 2
+    # A caller still holding an evicted engine keeps a working model
+    assert held.predict(np.zeros((1, 100, 1), dtype=np.float32)).shape == (1, 1)
+
+
+def test_the_model_just_loaded_stays_even_alone_over_budget(manifest, weight_bytes):
+    registry = ModelRegistry.from_manifest(manifest, budget_mb=_budget_mb(0, weight_bytes))
+    registry.assets("AAA")
+    registry.assets("CCC")
+    assert set(registry.stats()["models"]) == {"c/recursive/numpy"}
+
+
+def test_evicted_brokers_are_closed(manifest, weight_bytes):
+    registry = ModelRegistry.from_manifest(manifest, budget_mb=_budget_mb(1, weight_bytes), broker=True)
+    broker, _ = registry.assets("AAA")
+    registry.assets("CCC")
+    assert list(registry.brokers()) == ["c/recursive/numpy"]
+    broker._thread.join(10)
+    assert not broker._thread.is_alive()
+
+
+def test_hits_count_reuse_by_forecasts_not_lookups(manifest, weight_bytes):
+    registry = ModelRegistry.from_manifest(manifest)
+    for _ in range(3):
+        registry.loader("AAA").result()
+    assert (registry.loads, registry.hits) == (1, 0)
+    registry.assets("AAA")
+    assert registry.hits == 0
+    registry.assets("AAA")
+    registry.assets_for("a")
+    assert (registry.loads, registry.hits) == (1, 2)
@@ -0,0 +1,76 @@
+import multiprocessing
+import threading
+
+from singleflight import SingleFlight
+
+
+class _Crossed(SingleFlight):
+    """Waits before opening its second key until the other leader has locked its first."""
+
+    def __init__(self, lock_dir, barrier):
+        super().__init__(lock_dir, share=True)
+        self.barrier = barrier
+        self.opened  = 0
+
+    def _open_lock(self, key):
+        self.opened += 1
+        if self.opened == 2:
+            self.barrier.wait(timeout=10)
+        return super()._open_lock(key)
+
+
+def _lead(lock_dir, keys, barrier, out):
+    flights = _Crossed(lock_dir, barrier)
+    name    = multiprocessing.current_process().name
+    out.put(sorted(flights.do_many(keys, lambda subset: [f"{key[0]}@{name}" for key in subset])))
+
+
+def test_opposite_key_orders_across_processes_do_not_deadlock(tmp_path):
+    ctx     = multiprocessing.get_context("fork")
+    barrier = ctx.Barrier(2)
+    out     = ctx.Queue()
+    procs   = [ctx.Process(target=_lead, args=(str(tmp_path), keys, barrier, out), name=name)
+               for name, keys in (("p1", [("A",), ("B",)]), ("p2", [("B",), ("A",)]))]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=30)
+    alive = [p for p in procs if p.is_alive()]
+    for p in alive:
+        p.kill()
+    assert not alive, "leaders deadlocked on each other's locks"
+    assert all(p.exitcode == 0 for p in procs)
+
+    results = [out.get(timeout=5) for _ in procs]
+    # A key is computed by whichever process holds its lock and shared with a waiter
+    for result in results:
+        assert [r.split("@")[0] for r in result] == ["A", "B"]
+    assert "A@p1" in results[0] + results[1] and "B@p2" in results[0] + results[1]
+
+
+def test_threads_share_one_computation():
+    flights = SingleFlight(lock_dir=None)
+    started = threading.Event()
+    release = threading.Event()
+    calls   = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 42
+
+    results = []
+    leader  = threading.Thread(target=lambda: results.append(flights.do(("k",), work)))
+    leader.start()
+    started.wait(5)
+    waiters = [threading.Thread(target=lambda: results.append(flights.do(("k",), work))) for _ in range(4)]
+    for t in waiters:
+        t.start()
+    while flights.stats()["coalesced"] < 4:
+        pass
+    release.set()
+    for t in [leader] + waiters:
+        t.join(5)
+    assert results == [42] * 5
+    assert calls == [1]
@@ -0,0 +1,52 @@
+import json
+import multiprocessing
+
+from telemetry import Telemetry, relabel
+
+
+def _trace(path, n):
+    telemetry = Telemetry(enabled=True, trace_path=path, flush_every=7, flush_secs=60)
+    for i in range(n):
+        with telemetry.span("predict", rows=i):
+            pass
+    telemetry.flush()
+
+
+def test_processes_appending_to_one_trace_file_keep_it_valid(tmp_path):
+    path  = str(tmp_path / "trace.json")
+    ctx   = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_trace, args=(path, 200)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=60)
+    assert all(p.exitcode == 0 for p in procs)
+
+    with open(path) as f:
+        text = f.read()
+    assert text.count("[") == 1
+    events = json.loads(text.rstrip().rstrip(",") + "]")
+    spans  = [e for e in events if e["ph"] == "X"]
+    assert len(spans) == 800
+    assert len({e["pid"] for e in spans}) == 4
+
+
+def test_prometheus_text_has_one_type_line_per_family():
+    telemetry = Telemetry(enabled=True, trace_path=None)
+    telemetry.count("forecasts", mode="single")
+    telemetry.count("forecasts", mode="batch")
+    telemetry.observe("span_ms", 3.0, span="predict")
+    text = telemetry.prometheus()
+    assert text.count("# TYPE quantumlens_forecasts_total counter") == 1
+    assert 'quantumlens_span_ms_bucket{span="predict",le="5"} 1' in text
+
+
+def test_label_values_are_escaped_in_the_exposition():
+    telemetry = Telemetry(enabled=True, trace_path=None)
+    telemetry.count("http_requests", uri='/forecast/A"B\\C\nD')
+    text = telemetry.prometheus()
+    assert 'quantumlens_http_requests_total{uri="/forecast/A\\"B\\\\C\\nD"} 1' in text.splitlines()
+
+    relabelled = relabel("x_total 3\ny_total{a=\"1\"} 4\n", model='tech "us"\n')
+    assert relabelled.splitlines() == ['x_total{model="tech \\"us\\"\\n"} 3',
+                                       'y_total{a="1",model="tech \\"us\\"\\n"} 4']
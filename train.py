@@ -0,0 +1,265 @@
+"""
+Training pipeline for the LSTM forecaster.
+
+    python train.py GAIL.NS RELIANCE.NS TCS.NS --epochs 200
+    python train.py --tickers universe.txt --shuffle
+
+The notebook's approach, packaged as a CLI that scales to many symbols: Open
+prices come from the local ``OHLCVStore``, one ``MinMaxScaler`` is fitted across
+all of them with ``partial_fit``, and each symbol is split 70 / 30 in time.
+
+Nothing is materialized per window.  The scaled series of every symbol are
+laid end to end in one float32 array and ``sliding_window_view`` turns it into
+a zero-copy ``(positions, 101)`` view; a window is valid only if it does not
+straddle two symbols.  ``tf.data`` draws batches of valid start positions and
+gathers just those rows, with prefetching, so memory grows with the raw price
+history (4 bytes per bar) rather than with 101 × the number of windows.
+
+The model and its own scaler are written (atomically, after training) under
+``trained/`` by default, ``trained/lstm_model.h5`` with
+``trained/lstm_model.save``, never over the shipped ``lstm_model.h5`` /
+``scaler.save``.  Every model gets a scaler next to it, so retraining one model
+cannot leave another paired with a scaler it was not fit with.  List the pair
+in ``models.json`` (or pass explicit ``--model-out`` / ``--scaler-out``) to
+serve it.
+
+``--strategy direct`` trains the same network with a ``Dense(60)`` head on the
+next 60 days at once (``trained/lstm_direct.h5``).  It reuses the scaler of
+the recursive model in ``trained/`` (the shipped ``scaler.save`` if there is
+none yet) and saves a copy as its own, so both models share one scaling path.
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from engine import DIRECT_MODEL_PATH, MODEL_PATH, SCALER_PATH
+from forecast import DIRECT_HORIZON, N_STEPS, STRATEGIES
+
+
+OUT_DIR     = "trained"
+TRAIN_FRAC  = 0.70
+SEED        = 42
+
+
+# ─────────────────────────────────────────────────────────────────
+# WINDOWS
+# ─────────────────────────────────────────────────────────────────
+def make_windows(series, n_steps=N_STEPS):
+    """Zero-copy ``(X, y)`` views: ``X[i] = series[i:i + n_steps]``, ``y[i] = series[i + n_steps]``."""
+    series = np.asarray(series)
+    if len(series) <= n_steps:
+        return series[:0].reshape(0, n_steps), series[:0]
+    view = sliding_window_view(series, n_steps + 1)
+    return view[:, :n_steps], view[:, n_steps]
+
+
+class WindowSet:
+    """Windows over many series without copying them.
+
+    ``flat`` holds every series back to back; ``starts`` lists the window
+    start positions that stay inside a single series.
+    """
+
+    def __init__(self, series_list, n_steps=N_STEPS, horizon=1):
+        self.n_steps = n_steps
+        self.horizon = horizon
+        width        = n_steps + horizon
+        series_list  = [np.asarray(s, dtype=np.float32).ravel() for s in series_list]
+        self.flat    = np.concatenate(series_list) if series_list else np.empty(0, np.float32)
+        starts, offset = [], 0
+        for s in series_list:
+            if len(s) >= width:
+                starts.append(np.arange(offset, offset + len(s) - width + 1, dtype=np.int64))
+            offset += len(s)
+        self.starts = np.concatenate(starts) if starts else np.empty(0, np.int64)
+        self.view   = sliding_window_view(self.flat, width) if len(self.flat) >= width else None
+
+    def __len__(self):
+        return len(self.starts)
+
+    def batch(self, idx):
+        """Materialize only the windows starting at ``idx``: ``(X[..., None], y)``."""
+        rows = self.view[idx]
+        return rows[:, :self.n_steps, None], rows[:, self.n_steps:]
+
+    def dataset(self, batch_size=64, shuffle=False, seed=SEED):
+        import tensorflow as tf
+
+        starts = self.starts
+        rng    = np.random.default_rng(seed)
+
+        def batches():
+            # Called once per epoch, so a shuffled order differs every epoch
+            order = rng.permutation(starts) if shuffle else starts
+            for i in range(0, len(order), batch_size):
+                yield self.batch(order[i:i + batch_size])
+
+        signature = (tf.TensorSpec((None, self.n_steps, 1), tf.float32),
+                     tf.TensorSpec((None, self.horizon), tf.float32))
+        return tf.data.Dataset.from_generator(batches, output_signature=signature).prefetch(tf.data.AUTOTUNE)
+
+
+# ─────────────────────────────────────────────────────────────────
+# DATA
+# ─────────────────────────────────────────────────────────────────
+def load_series(symbols, store, min_bars=N_STEPS * 2):
+    """``{symbol: Open prices as float64}`` from the store; short histories are dropped."""
+    out = {}
+    for sym in symbols:
+        data = store.get(sym, history=None)
+        if data.empty:
+            print(f"  {sym}: no data, skipped", file=sys.stderr)
+            continue
+        opn = data["Open"].dropna().to_numpy(dtype=float)
+        if len(opn) < min_bars:
+            print(f"  {sym}: only {len(opn)} bars, skipped", file=sys.stderr)
+            continue
+        out[sym] = opn
+    return out
+
+
+def fit_scaler(series):
+    from sklearn.preprocessing import MinMaxScaler
+
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    for s in series:
+        scaler.partial_fit(s.reshape(-1, 1))
+    return scaler
+
+
+def split_windows(series, scaler, train_frac=TRAIN_FRAC, n_steps=N_STEPS, horizon=1):
+    """Chronological per-symbol split into train / validation ``WindowSet``s."""
+    train, val = [], []
+    for s in series:
+        scaled = scaler.transform(s.reshape(-1, 1)).astype(np.float32).ravel()
+        cut    = int(len(scaled) * train_frac)
+        train.append(scaled[:cut])
+        val.append(scaled[cut:])
+    return WindowSet(train, n_steps, horizon), WindowSet(val, n_steps, horizon)
+
+
+# ─────────────────────────────────────────────────────────────────
+# MODEL
+# ─────────────────────────────────────────────────────────────────
+def build_model(n_steps=N_STEPS, units=64, dropout=0.2, outputs=1):
+    from tensorflow.keras.layers import LSTM, Dense, Dropout, Input
+    from tensorflow.keras.models import Sequential
+
+    model = Sequential([
+        Input((n_steps, 1)),
+        LSTM(units, return_sequences=True),
+        Dropout(dropout),
+        LSTM(units),
+        Dropout(dropout),
+        Dense(outputs),
+    ])
+    model.compile(loss="mean_squared_error", optimizer="adam")
+    return model
+
+
+def _save_atomic(path, save):
+    root, ext = os.path.splitext(path)
+    tmp = f"{root}.tmp{ext}"
+    save(tmp)
+    os.replace(tmp, path)
+
+
+def scaler_path_for(model_path):
+    """The scaler saved next to a trained model: ``x.h5`` → ``x.save``."""
+    return os.path.splitext(model_path)[0] + ".save"
+
+
+def train(symbols, store, epochs=200, batch_size=64, patience=10, shuffle=False,
+          model_out=os.path.join(OUT_DIR, MODEL_PATH), scaler_out=None, n_steps=N_STEPS, horizon=1,
+          scaler_in=None):
+    """Fit a model on ``symbols``; ``horizon > 1`` trains a direct multi-horizon model.
+
+    With ``scaler_in`` the existing scaler is reused instead of fitted, so a
+    direct model shares the scaler of the recursive one.  Either way it is
+    saved to ``scaler_out`` (next to the model by default).
+    """
+    import joblib
+    import tensorflow as tf
+    from tensorflow.keras.callbacks import EarlyStopping
+
+    tf.keras.utils.set_random_seed(SEED)
+
+    series = load_series(symbols, store, min_bars=int((n_steps + horizon) / (1 - TRAIN_FRAC)) + 1)
+    if not series:
+        raise SystemExit("no symbol has enough history to train on")
+    scaler     = joblib.load(scaler_in) if scaler_in else fit_scaler(series.values())
+    train_set, val_set = split_windows(series.values(), scaler, n_steps=n_steps, horizon=horizon)
+    print(f"{len(series)} symbols · {len(train_set):,} train / {len(val_set):,} val windows · "
+          f"{(train_set.flat.nbytes + val_set.flat.nbytes) / 2**20:.1f} MiB of series", file=sys.stderr)
+
+    model = build_model(n_steps, outputs=horizon)
+    early_stop = EarlyStopping(monitor="val_loss", patience=patience, restore_best_weights=True)
+    history = model.fit(train_set.dataset(batch_size, shuffle=shuffle),
+                        validation_data=val_set.dataset(batch_size),
+                        epochs=epochs, callbacks=[early_stop], verbose=2)
+
+    scaler_out = scaler_out or scaler_path_for(model_out)
+    if os.path.dirname(model_out):
+        os.makedirs(os.path.dirname(model_out), exist_ok=True)
+    _save_atomic(model_out, model.save)
+    _save_atomic(scaler_out, lambda p: joblib.dump(scaler, p))
+    return {
+        "symbols":       list(series),
+        "strategy":      "direct" if horizon > 1 else "recursive",
+        "horizon":       horizon,
+        "train_windows": len(train_set),
+        "val_windows":   len(val_set),
+        "epochs_run":    len(history.history["loss"]),
+        "best_val_loss": float(min(history.history["val_loss"])),
+        "model":         model_out,
+        "scaler":        scaler_out,
+    }
+
+
+def main(argv=None):
+    from batch_forecast import read_tickers
+    from data_store import DATA_DIR, OHLCVStore
+    from market_data import PROVIDER, PROVIDERS, get_provider
+
+    parser = argparse.ArgumentParser(description="Train the LSTM forecaster on symbols from the local store.")
+    parser.add_argument("symbols", nargs="*")
+    parser.add_argument("--tickers", help="file with one ticker per line")
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--patience", type=int, default=10)
+    parser.add_argument("--shuffle", action="store_true", help="shuffle windows across symbols each epoch")
+    parser.add_argument("--provider", choices=tuple(PROVIDERS), default=PROVIDER)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--strategy", choices=STRATEGIES, default="recursive",
+                        help="recursive: next-day model; direct: one pass emits --horizon days")
+    parser.add_argument("--horizon", type=int, default=DIRECT_HORIZON)
+    parser.add_argument("--model-out", help=f"default: {OUT_DIR}/{MODEL_PATH}, or {OUT_DIR}/{DIRECT_MODEL_PATH}")
+    parser.add_argument("--scaler-out", help="default: the model path with a .save extension")
+    parser.add_argument("--scaler-in", help="reuse this fitted scaler (default for --strategy direct)")
+    args = parser.parse_args(argv)
+
+    direct    = args.strategy == "direct"
+    model_out = args.model_out or os.path.join(OUT_DIR, DIRECT_MODEL_PATH if direct else MODEL_PATH)
+    scaler_in = args.scaler_in
+    if direct and scaler_in is None:
+        # The recursive model's scaler, so the two can be served as one artifact
+        recursive = scaler_path_for(os.path.join(OUT_DIR, MODEL_PATH))
+        scaler_in = next((p for p in (recursive, SCALER_PATH) if os.path.exists(p)), None)
+
+    symbols = list(args.symbols) + (read_tickers(args.tickers) if args.tickers else [])
+    if not symbols:
+        parser.error("give at least one symbol or --tickers")
+    fetch = get_provider(args.provider)
+    store = OHLCVStore(os.path.join(args.data_dir, fetch.name), fetch=fetch)
+    summary = train(symbols, store, epochs=args.epochs, batch_size=args.batch, patience=args.patience,
+                    shuffle=args.shuffle, model_out=model_out, scaler_out=args.scaler_out,
+                    horizon=args.horizon if direct else 1, scaler_in=scaler_in)
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()